@@ -1,21 +1,26 @@
 from flask import Blueprint, request, jsonify
 from datetime import datetime
-from ..backend.models import Room, Booking, db
+from models import Room
+from services.availability_index import availability_index
+from services.inventory import free_between
 
 # Create a Blueprint for available_slot routes
 available_slot_bp = Blueprint('available_slot', __name__)
 
-# Helper function to check room availability
-def is_room_available(room_id, check_in, check_out):
+# Helper function to find all free rooms with a single anti-join query
+def find_available_rooms(check_in, check_out):
     """
-    Check if a room is available for the given dates.
+    Return rooms with every night of [check_in, check_out) free in the
+    RoomNight inventory, so nights held by bookings and by front desk
+    reservations both count. NOT EXISTS is a range scan of the
+    (room_id, night) primary key per room.
     """
-    conflicting_bookings = Booking.query.filter(
-        Booking.room_id == room_id,
-        Booking.check_in < check_out,
-        Booking.check_out > check_in
-    ).all()
-    return len(conflicting_bookings) == 0
+    return Room.query.filter(free_between(check_in, check_out)).order_by(Room.id).all()
+
+# Build the availability index once the blueprint is registered on an app
+@available_slot_bp.record_once
+def load_availability_index(state):
+    availability_index.init_app(state.app)
 
 # API to get available rooms for a date range
 @available_slot_bp.route('/available', methods=['GET'])
@@ -25,14 +30,19 @@ def get_available_rooms():
     Query Parameters:
         check_in (str): Check-in date in 'YYYY-MM-DD' format.
         check_out (str): Check-out date in 'YYYY-MM-DD' format.
+        engine (str, optional): 'index' (default) for the in-memory index,
+            'sql' for a single set-based query.
     """
     # Get query parameters
     check_in_str = request.args.get('check_in')
     check_out_str = request.args.get('check_out')
+    engine = request.args.get('engine', 'index')
 
     # Validate query parameters
     if not check_in_str or not check_out_str:
         return jsonify({"error": "Both check_in and check_out dates are required"}), 400
+    if engine not in ('index', 'sql'):
+        return jsonify({"error": "engine must be 'index' or 'sql'"}), 400
 
     try:
         check_in = datetime.strptime(check_in_str, '%Y-%m-%d')
@@ -42,19 +52,26 @@ def get_available_rooms():
     except ValueError:
         return jsonify({"error": "Invalid date format. Use 'YYYY-MM-DD'"}), 400
 
-    # Get all rooms
-    rooms = Room.query.all()
-    available_rooms = []
+    if engine == 'sql':
+        # Let the database compute free rooms in one statement
+        rooms = find_available_rooms(check_in, check_out)
+    else:
+        # Get all rooms and resolve availability from the in-memory index in a single pass
+        availability_index.ensure_loaded()
+        rooms = [
+            room for room in Room.query.all()
+            if availability_index.is_available(room.id, check_in, check_out)
+        ]
 
-    # Check availability for each room
-    for room in rooms:
-        if is_room_available(room.id, check_in, check_out):
-            available_rooms.append({
-                'room_id': room.id,
-                'room_number': room.room_number,
-                'room_type': room.room_type,
-                'price': room.price
-            })
+    available_rooms = [
+        {
+            'room_id': room.id,
+            'room_number': room.room_number,
+            'room_type': room.room_type,
+            'price': room.price
+        }
+        for room in rooms
+    ]
 
     return jsonify(available_rooms), 200
 
@@ -89,7 +106,8 @@ def check_room_availability(room_id):
         return jsonify({"error": f"Room {room_id} not found"}), 404
 
     # Check availability
-    if is_room_available(room_id, check_in, check_out):
+    availability_index.ensure_loaded()
+    if availability_index.is_available(room_id, check_in, check_out):
         return jsonify({
             'room_id': room.id,
             'room_number': room.room_number,
@@ -1,45 +1,14 @@
-from flask import Flask, request, jsonify, render_template, abort
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
+from flask import Blueprint, request, jsonify, render_template, abort
+from flask_mail import Message
 from datetime import datetime, timedelta
-import logging
-
-app = Flask(__name__)
-
-# Configurations for SQLAlchemy and Flask-Mail
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-
-# Initialize SQLAlchemy and Flask-Mail
-db = SQLAlchemy(app)
-mail = Mail(app)
-
-# Room model representing hotel rooms
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-# Booking model representing room bookings
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    guest_name = db.Column(db.String(100), nullable=False)
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-# Subscriber model representing email subscribers
-class Subscriber(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
+from extensions import db, add_app_job
+from models import Room, Booking, Subscriber
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.mail_dispatch import RECIPIENT_CHUNK_SIZE, mail_dispatcher
+from services.room_listing import room_list_response
+
+# Create a Blueprint for calendar intelligence routes
+calendar_intelligence_bp = Blueprint('calendar_intelligence', __name__)
 
 # Helper function to check if a room exists
 def get_room_or_404(room_id):
@@ -49,19 +18,18 @@ def get_room_or_404(room_id):
     return room
 
 # Home route displaying available rooms
-@app.route('/')
+@calendar_intelligence_bp.route('/')
 def index():
     rooms = Room.query.all()
     return render_template('index.html', rooms=rooms)
 
 # API to get details of all rooms
-@app.route('/rooms', methods=['GET'])
+@calendar_intelligence_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in rooms]), 200
+    return room_list_response()
 
 # API to get details of a specific room by room_id
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@calendar_intelligence_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = get_room_or_404(room_id)
     return jsonify({
@@ -72,13 +40,10 @@ def get_room(room_id):
     }), 200
 
 # API to book a room
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@calendar_intelligence_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 def book_room(room_id):
     room = get_room_or_404(room_id)
 
-    if not room.available:
-        return jsonify({"error": "Room is already booked"}), 400
-
     data = request.get_json()
     try:
         check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
@@ -88,28 +53,29 @@ def book_room(room_id):
     except (KeyError, ValueError):
         return jsonify({"error": "Invalid date format or missing check-in/check-out"}), 400
 
-    booking = Booking(room_id=room.id, check_in=check_in, check_out=check_out, guest_name=data['guest_name'])
-    room.available = False
-    db.session.add(booking)
+    try:
+        reserve_room(room.id, check_in, check_out, guest_name=data['guest_name'])
+    except BookingConflict:
+        db.session.rollback()
+        return jsonify({"error": "Room is already booked"}), 400
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} booked successfully"}), 200
 
 # API to release a booked room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@calendar_intelligence_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     room = get_room_or_404(room_id)
 
-    if room.available:
+    if not check_out_room(room.id):
         return jsonify({"error": "Room is not currently booked"}), 400
 
-    room.available = True
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} released successfully"}), 200
 
 # API to subscribe to the hotel's mailing list
-@app.route('/subscribe', methods=['POST'])
+@calendar_intelligence_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data.get('email')
@@ -124,15 +90,15 @@ def subscribe():
     return jsonify({"error": "Email is already subscribed"}), 400
 
 # API to get all subscribers
-@app.route('/subscribers', methods=['GET'])
+@calendar_intelligence_bp.route('/subscribers', methods=['GET'])
 def get_subscribers():
-    subscribers = Subscriber.query.all()
+    subscribers = Subscriber.query.with_entities(Subscriber.id, Subscriber.email).all()
     return jsonify([{ 'id': subscriber.id, 'email': subscriber.email } for subscriber in subscribers]), 200
 
 # API to get all bookings
-@app.route('/bookings', methods=['GET'])
+@calendar_intelligence_bp.route('/bookings', methods=['GET'])
 def get_bookings():
-    bookings = Booking.query.all()
+    bookings = Booking.query.with_entities(Booking.id, Booking.room_id, Booking.check_in, Booking.check_out, Booking.guest_name).all()
     return jsonify([{ 'id': booking.id, 'room_id': booking.room_id, 'check_in': booking.check_in.strftime('%Y-%m-%d'), 'check_out': booking.check_out.strftime('%Y-%m-%d'), 'guest_name': booking.guest_name } for booking in bookings]), 200
 
 # Check if it's the festive season (e.g., Christmas or New Year)
@@ -147,18 +113,15 @@ def is_festive_season():
 # Send promotional emails to all subscribers
 def send_promotional_emails():
     if is_festive_season():
-        subscribers = Subscriber.query.all()
-        for subscriber in subscribers:
-            try:
-                msg = Message('Festive Season Offer!', recipients=[subscriber.email])
-                msg.body = 'Enjoy our special festive season discounts at our hotel! Book now and save!'
-                mail.send(msg)
-            except Exception as e:
-                logging.error(f"Failed to send email to {subscriber.email}: {e}")
-        print("Promotional emails sent successfully.")
-
-# Initialize the database and start the app
-if __name__ == '__main__':
-    db.create_all()
-    send_promotional_emails()
-    app.run(debug=True)
+        emails = Subscriber.query.with_entities(Subscriber.email).yield_per(RECIPIENT_CHUNK_SIZE)
+        messages = (
+            Message('Festive Season Offer!', recipients=[email],
+                    body='Enjoy our special festive season discounts at our hotel! Book now and save!')
+            for email, in emails
+        )
+        mail_dispatcher.dispatch('calendar_intelligence.festive_emails', messages)
+
+# Run the festive season check daily on the shared scheduler
+@calendar_intelligence_bp.record_once
+def schedule_jobs(state):
+    add_app_job(state.app, send_promotional_emails, 'interval', days=1)
@@ -1,73 +1,24 @@
-from flask import Flask, request, jsonify, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, session
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
-import numpy as np
 import re
+from extensions import db
+from models import User, Room, Event, Review
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.reward_ledger import BOOKING_REWARD_POINTS, award_points, schedule_rollup
+from services.room_listing import room_list_response
+from services.booking_history import booking_history
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-
-# Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)  # JSON string of user preferences
-    reward_points = db.Column(db.Integer, default=0)
-    visits = db.Column(db.Integer, default=0)
-
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-
-class Review(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    rating = db.Column(db.Integer, nullable=False)
-    comment = db.Column(db.String(1000), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    user = db.relationship('User', backref=db.backref('reviews', lazy=True))
-    room = db.relationship('Room', backref=db.backref('reviews', lazy=True))
-
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Create a Blueprint for chat bot routes
+chat_bot_bp = Blueprint('chat_bot', __name__)
+
+# Fold the reward points ledger into users' balances
+@chat_bot_bp.record_once
+def schedule_jobs(state):
+    schedule_rollup(state.app)
 
 # User Authentication Routes
-@app.route('/login', methods=['POST'])
+@chat_bot_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -78,52 +29,52 @@ def login():
         return jsonify({"message": "Logged in successfully"}), 200
     return jsonify({"error": "User not found"}), 404
 
-@app.route('/logout', methods=['POST'])
+@chat_bot_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Room and Event Booking System
-@app.route('/rooms', methods=['GET'])
+@chat_bot_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in rooms])
+    return room_list_response()
 
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@chat_bot_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = Room.query.get(room_id)
     if room:
         return jsonify({ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available })
     return jsonify({"error": "Room not found"}), 404
 
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@chat_bot_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 @login_required
 def book_room(room_id):
     room = Room.query.get(room_id)
-    if room and room.available:
+    if room:
         data = request.get_json()
         check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
         check_out = datetime.strptime(data['check_out'], '%Y-%m-%d')
-        booking = Booking(user_id=current_user.id, room_id=room_id, check_in=check_in, check_out=check_out)
-        room.available = False
-        current_user.reward_points += 100  # Award 100 points per booking
-        db.session.add(booking)
+        try:
+            reserve_room(room_id, check_in, check_out, user_id=current_user.id)
+        except BookingConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        award_points(current_user.id, BOOKING_REWARD_POINTS, 'booking')
         db.session.commit()
         return jsonify({"message": f"Room {room_id} booked successfully"}), 200
-    return jsonify({"error": "Room not available or not found"}), 400
+    return jsonify({"error": "Room not found"}), 400
 
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@chat_bot_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 @login_required
 def release_room(room_id):
     room = Room.query.get(room_id)
-    if room and not room.available:
-        room.available = True
+    if room and check_out_room(room_id):
         db.session.commit()
         return jsonify({"message": f"Room {room_id} released successfully"}), 200
     return jsonify({"error": "Room not booked or not found"}), 400
 
-@app.route('/subscribe', methods=['POST'])
+@chat_bot_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data['email']
@@ -138,7 +89,7 @@ def subscribe():
     return jsonify({"error": "Already subscribed"}), 400
 
 # Add events
-@app.route('/events', methods=['POST'])
+@chat_bot_bp.route('/events', methods=['POST'])
 @login_required
 def add_event():
     data = request.get_json()
@@ -148,26 +99,24 @@ def add_event():
     return jsonify({"message": "Event added successfully"}), 200
 
 # Room recommendations based on user preferences and bookings
-@app.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
+@chat_bot_bp.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_rooms(user_id):
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
-    user_bookings = Booking.query.filter_by(user_id=user_id).all()
-    if not user_bookings:
+    room_types = booking_history.room_types(user_id)
+    if not room_types:
         return jsonify({"message": "No previous bookings found"}), 200
 
-    room_ids = [booking.room_id for booking in user_bookings]
-    room_types = [Room.query.get(room_id).room_type for room_id in room_ids]
     preferred_room_type = max(set(room_types), key=room_types.count)
 
     recommended_rooms = Room.query.filter_by(room_type=preferred_room_type, available=True).all()
     return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in recommended_rooms])
 
 # Event recommendations based on user preferences
-@app.route('/recommendations/events/<int:user_id>', methods=['GET'])
+@chat_bot_bp.route('/recommendations/events/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_events(user_id):
     user = User.query.get(user_id)
@@ -185,7 +134,7 @@ def recommend_events(user_id):
     return jsonify([{ 'name': event.name, 'date': event.date.strftime('%Y-%m-%d'), 'location': event.location, 'category': event.category } for event in recommended_events])
 
 # Add Review functionality
-@app.route('/rooms/<int:room_id>/review', methods=['POST'])
+@chat_bot_bp.route('/rooms/<int:room_id>/review', methods=['POST'])
 @login_required
 def add_review(room_id):
     room = Room.query.get(room_id)
@@ -209,16 +158,11 @@ def add_review(room_id):
     return jsonify({"message": "Review added successfully"}), 200
 
 # Get all reviews for a room
-@app.route('/rooms/<int:room_id>/reviews', methods=['GET'])
+@chat_bot_bp.route('/rooms/<int:room_id>/reviews', methods=['GET'])
 def get_reviews(room_id):
     room = Room.query.get(room_id)
     if not room:
         return jsonify({"error": "Room not found"}), 404
 
-    reviews = Review.query.filter_by(room_id=room_id).all()
+    reviews = Review.query.with_entities(Review.user_id, Review.rating, Review.comment, Review.created_at).filter_by(room_id=room_id).all()
     return jsonify([{ 'user_id': review.user_id, 'rating': review.rating, 'comment': review.comment, 'created_at': review.created_at.strftime('%Y-%m-%d %H:%M:%S') } for review in reviews])
-
-# Initialize the database and start the app
-if __name__ == '__main__':
-    db.create_all()
-    app.run(debug=True)
@@ -1,71 +1,24 @@
-from flask import Flask, request, jsonify, render_template, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, render_template, session
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
 import re
+from extensions import db
+from models import User, Room, Booking, Event, Campaign
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.engagement import session_start_time
+from services.reward_ledger import BOOKING_REWARD_POINTS, award_points, balance, schedule_rollup
+from services.segmentation import ALL_USERS, SEGMENTATIONS, audience_query, find_segmentation
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-
-# Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)  # JSON string of user preferences
-    reward_points = db.Column(db.Integer, default=0)
-
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-
-class Campaign(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.String(1000), nullable=False)
-    audience_segment = db.Column(db.String(100), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-# User loader for Flask-Login
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Create a Blueprint for content subscription routes
+content_subscription_bp = Blueprint('content_subscription', __name__)
+
+# Fold the reward points ledger into users' balances
+@content_subscription_bp.record_once
+def schedule_jobs(state):
+    schedule_rollup(state.app)
 
 # Routes for user authentication
-@app.route('/login', methods=['POST'])
+@content_subscription_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -74,39 +27,38 @@ def login():
         return jsonify({"message": "Logged in successfully"}), 200
     return jsonify({"error": "User not found"}), 404
 
-@app.route('/logout', methods=['POST'])
+@content_subscription_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Start and end interaction, awarding reward points
-@app.route('/start_interaction', methods=['POST'])
+@content_subscription_bp.route('/start_interaction', methods=['POST'])
 @login_required
 def start_interaction():
     session['start_time'] = datetime.now().isoformat()
     session.permanent = True
-    app.permanent_session_lifetime = timedelta(minutes=30)
     return jsonify({"message": "Interaction started"}), 200
 
-@app.route('/end_interaction', methods=['POST'])
+@content_subscription_bp.route('/end_interaction', methods=['POST'])
 @login_required
 def end_interaction():
     start_time = session.pop('start_time', None)
     if start_time:
         end_time = datetime.now()
-        duration = (end_time - datetime.fromisoformat(start_time)).total_seconds()
-        current_user.reward_points += int(duration / 60)  # Award 1 point per minute
+        duration = (end_time - session_start_time(start_time)).total_seconds()
+        award_points(current_user.id, int(duration / 60), 'interaction')  # Award 1 point per minute
         db.session.commit()
-        return jsonify({"message": "Interaction ended", "reward_points": current_user.reward_points}), 200
+        return jsonify({"message": "Interaction ended", "reward_points": balance(current_user.id)}), 200
     return jsonify({"error": "No active interaction found"}), 404
 
 # Room booking and release routes
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@content_subscription_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 @login_required
 def book_room(room_id):
     room = Room.query.get(room_id)
-    if room and room.available:
+    if room:
         data = request.get_json()
         try:
             check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
@@ -117,26 +69,27 @@ def book_room(room_id):
         if check_in >= check_out:
             return jsonify({"error": "Check-out must be after check-in"}), 400
 
-        booking = Booking(user_id=current_user.id, room_id=room_id, check_in=check_in, check_out=check_out)
-        room.available = False
-        current_user.reward_points += 100  # Award 100 points per booking
-        db.session.add(booking)
+        try:
+            reserve_room(room_id, check_in, check_out, user_id=current_user.id)
+        except BookingConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        award_points(current_user.id, BOOKING_REWARD_POINTS, 'booking')
         db.session.commit()
         return jsonify({"message": f"Room {room_id} booked successfully"}), 200
-    return jsonify({"error": "Room not available or not found"}), 400
+    return jsonify({"error": "Room not found"}), 400
 
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@content_subscription_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 @login_required
 def release_room(room_id):
     room = Room.query.get(room_id)
-    if room and not room.available:
-        room.available = True
+    if room and check_out_room(room_id):
         db.session.commit()
         return jsonify({"message": f"Room {room_id} released successfully"}), 200
     return jsonify({"error": "Room not booked or not found"}), 400
 
 # Subscription route with email validation
-@app.route('/subscribe', methods=['POST'])
+@content_subscription_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data.get('email')
@@ -151,7 +104,7 @@ def subscribe():
     return jsonify({"error": "Already subscribed"}), 400
 
 # Add events
-@app.route('/events', methods=['POST'])
+@content_subscription_bp.route('/events', methods=['POST'])
 @login_required
 def add_event():
     data = request.get_json()
@@ -161,13 +114,13 @@ def add_event():
     return jsonify({"message": "Event added successfully"}), 200
 
 # Get all events
-@app.route('/events', methods=['GET'])
+@content_subscription_bp.route('/events', methods=['GET'])
 def get_events():
-    events = Event.query.all()
+    events = Event.query.with_entities(Event.name, Event.date, Event.location, Event.category).all()
     return jsonify([{ 'name': event.name, 'date': event.date.strftime('%Y-%m-%d'), 'location': event.location, 'category': event.category } for event in events])
 
 # Room recommendations based on user preferences and bookings
-@app.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
+@content_subscription_bp.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_rooms(user_id):
     user = User.query.get(user_id)
@@ -186,7 +139,7 @@ def recommend_rooms(user_id):
     return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in recommended_rooms])
 
 # Event recommendations based on user preferences
-@app.route('/recommendations/events/<int:user_id>', methods=['GET'])
+@content_subscription_bp.route('/recommendations/events/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_events(user_id):
     user = User.query.get(user_id)
@@ -203,29 +156,43 @@ def recommend_events(user_id):
     return jsonify([{ 'name': event.name, 'date': event.date.strftime('%Y-%m-%d'), 'location': event.location, 'category': event.category } for event in recommended_events])
 
 # Campaigns management route
-@app.route('/campaigns', methods=['POST'])
+@content_subscription_bp.route('/campaigns', methods=['POST'])
 @login_required
 def create_campaign():
     data = request.get_json()
+    if data['audience_segment'] != ALL_USERS:
+        try:
+            find_segmentation(data['audience_segment'])
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
     campaign = Campaign(name=data['name'], content=data['content'], audience_segment=data['audience_segment'])
     db.session.add(campaign)
     db.session.commit()
     return jsonify({"message": "Campaign created successfully"}), 200
 
 # Get all campaigns
-@app.route('/campaigns', methods=['GET'])
+@content_subscription_bp.route('/campaigns', methods=['GET'])
 def get_campaigns():
-    campaigns = Campaign.query.all()
-    return jsonify([{ 'name': campaign.name, 'content': campaign.content, 'audience_segment': campaign.audience_segment, 'created_at': campaign.created_at.strftime('%Y-%m-%d %H:%M:%S') } for campaign in campaigns])
+    campaigns = Campaign.query.with_entities(Campaign.id, Campaign.name, Campaign.content, Campaign.audience_segment, Campaign.created_at).all()
+    return jsonify([{ 'id': campaign.id, 'name': campaign.name, 'content': campaign.content, 'audience_segment': campaign.audience_segment, 'created_at': campaign.created_at.strftime('%Y-%m-%d %H:%M:%S') } for campaign in campaigns])
 
-# Graceful shutdown of the scheduler
-@app.before_first_request
-def before_first_request():
-    db.create_all()
-    scheduler.start()
+# Resolve a campaign's audience segment to its members in one query
+@content_subscription_bp.route('/campaigns/<int:campaign_id>/audience', methods=['GET'])
+@login_required
+def get_campaign_audience(campaign_id):
+    campaign = Campaign.query.get(campaign_id)
+    if not campaign:
+        return jsonify({"error": "Campaign not found"}), 404
 
-if __name__ == '__main__':
     try:
-        app.run(debug=True)
-    except (KeyboardInterrupt, SystemExit):
-        scheduler.shutdown()
+        user_ids = [user_id for user_id, in audience_query(campaign.audience_segment, User.id).order_by(User.id)]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({ 'campaign': campaign.name, 'audience_segment': campaign.audience_segment, 'size': len(user_ids), 'user_ids': user_ids })
+
+# User counts per segment for every segmentation, one grouped query each
+@content_subscription_bp.route('/segments', methods=['GET'])
+@login_required
+def get_segments():
+    return jsonify({ name: segmentation.counts() for name, segmentation in SEGMENTATIONS.items() })
@@ -1,27 +1,12 @@
-from flask import Flask, request, jsonify, abort
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, request, jsonify, abort
 from datetime import datetime
+from extensions import db
+from models import Room, Reservation
+from services.booking import BookingConflict, cancel_reservation as cancel_held_reservation, check_out_room, hold_reservation
+from services.room_listing import room_list_response
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-db = SQLAlchemy(app)
-
-# Room model representing rooms in the hotel
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-# Reservation model representing reservations made by guests
-class Reservation(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    guest_name = db.Column(db.String(100), nullable=False)
-    room = db.relationship('Room', backref=db.backref('reservations', lazy=True))
+# Create a Blueprint for data-driven decision routes
+data_driven_decision_bp = Blueprint('data_driven_decision', __name__)
 
 # Helper function to validate room existence
 def get_room_or_404(room_id):
@@ -42,65 +27,62 @@ def parse_dates(data):
         abort(400, description="Invalid date format or missing check-in/check-out")
 
 # Route to get all rooms with their details
-@app.route('/rooms', methods=['GET'])
+@data_driven_decision_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in rooms]), 200
+    return room_list_response()
 
 # Route to get details of a specific room by room_id
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@data_driven_decision_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = get_room_or_404(room_id)
     return jsonify({ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available }), 200
 
 # Route to reserve a room
-@app.route('/rooms/<int:room_id>/reserve', methods=['POST'])
+@data_driven_decision_bp.route('/rooms/<int:room_id>/reserve', methods=['POST'])
 def reserve_room(room_id):
     room = get_room_or_404(room_id)
 
-    if not room.available:
-        return jsonify({"error": "Room is already reserved"}), 400
-
     data = request.get_json()
     check_in, check_out = parse_dates(data)
 
     # Create reservation
-    reservation = Reservation(room_id=room.id, check_in=check_in, check_out=check_out, guest_name=data['guest_name'])
-    room.available = False  # Mark room as unavailable
-    db.session.add(reservation)
+    try:
+        reservation = hold_reservation(room.id, check_in, check_out, guest_name=data['guest_name'])
+    except BookingConflict:
+        db.session.rollback()
+        return jsonify({"error": "Room is already reserved"}), 400
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} reserved successfully", "reservation_id": reservation.id}), 200
 
 # Route to release a reserved room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@data_driven_decision_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     room = get_room_or_404(room_id)
 
-    if room.available:
+    # Frees the nights of tonight's stay
+    if not check_out_room(room.id):
         return jsonify({"error": "Room is not reserved"}), 400
 
-    # Mark room as available again
-    room.available = True
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} released successfully"}), 200
 
 # Route to get all reservations
-@app.route('/reservations', methods=['GET'])
+@data_driven_decision_bp.route('/reservations', methods=['GET'])
 def get_reservations():
     reservations = Reservation.query.all()
     return jsonify([{ 'id': reservation.id, 'room_id': reservation.room_id, 'check_in': reservation.check_in.strftime('%Y-%m-%d'), 'check_out': reservation.check_out.strftime('%Y-%m-%d'), 'guest_name': reservation.guest_name } for reservation in reservations]), 200
 
 # Route to get reservations for a specific room
-@app.route('/rooms/<int:room_id>/reservations', methods=['GET'])
+@data_driven_decision_bp.route('/rooms/<int:room_id>/reservations', methods=['GET'])
 def get_room_reservations(room_id):
     room = get_room_or_404(room_id)
     reservations = Reservation.query.filter_by(room_id=room_id).all()
     return jsonify([{ 'id': reservation.id, 'check_in': reservation.check_in.strftime('%Y-%m-%d'), 'check_out': reservation.check_out.strftime('%Y-%m-%d'), 'guest_name': reservation.guest_name } for reservation in reservations]), 200
 
 # Route to cancel a reservation
-@app.route('/reservations/<int:reservation_id>/cancel', methods=['POST'])
+@data_driven_decision_bp.route('/reservations/<int:reservation_id>/cancel', methods=['POST'])
 def cancel_reservation(reservation_id):
     reservation = Reservation.query.get(reservation_id)
     if not reservation:
@@ -110,14 +92,13 @@ def cancel_reservation(reservation_id):
     if not room:
         return jsonify({"error": "Room not found"}), 404
 
-    room.available = True  # Mark room as available again
-    db.session.delete(reservation)
+    cancel_held_reservation(reservation)  # Frees its nights
     db.session.commit()
 
     return jsonify({"message": f"Reservation {reservation_id} canceled successfully"}), 200
 
 # Route to get insights like total reservations, peak times, and guest preferences
-@app.route('/insights', methods=['GET'])
+@data_driven_decision_bp.route('/insights', methods=['GET'])
 def get_insights():
     total_reservations = Reservation.query.count()
 
@@ -140,16 +121,11 @@ def get_insights():
     return jsonify(insights), 200
 
 # Custom error handler for 404
-@app.errorhandler(404)
+@data_driven_decision_bp.errorhandler(404)
 def not_found(error):
     return jsonify({"error": str(error)}), 404
 
 # Custom error handler for 400
-@app.errorhandler(400)
+@data_driven_decision_bp.errorhandler(400)
 def bad_request(error):
     return jsonify({"error": str(error)}), 400
-
-# Initialize the database and start the Flask app
-if __name__ == '__main__':
-    db.create_all()
-    app.run(debug=True)
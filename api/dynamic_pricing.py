@@ -1,70 +1,23 @@
-from flask import Flask, request, jsonify, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, session
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
-import numpy as np
 import re
+from extensions import db
+from models import User, Room, Booking, Event
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.reward_ledger import BOOKING_REWARD_POINTS, award_points, schedule_rollup
+from services.room_listing import room_list_response
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-
-# Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)  # JSON string of user preferences
-    reward_points = db.Column(db.Integer, default=0)
-    visits = db.Column(db.Integer, default=0)
-
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-
-class Campaign(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    content = db.Column(db.String(1000), nullable=False)
-    audience_segment = db.Column(db.String(100), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Create a Blueprint for dynamic pricing routes
+dynamic_pricing_bp = Blueprint('dynamic_pricing', __name__)
+
+# Fold the reward points ledger into users' balances
+@dynamic_pricing_bp.record_once
+def schedule_jobs(state):
+    schedule_rollup(state.app)
 
 # User Authentication Routes
-@app.route('/login', methods=['POST'])
+@dynamic_pricing_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -75,30 +28,29 @@ def login():
         return jsonify({"message": "Logged in successfully"}), 200
     return jsonify({"error": "User not found"}), 404
 
-@app.route('/logout', methods=['POST'])
+@dynamic_pricing_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Room and Event Booking System
-@app.route('/rooms', methods=['GET'])
+@dynamic_pricing_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in rooms])
+    return room_list_response()
 
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@dynamic_pricing_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = Room.query.get(room_id)
     if room:
         return jsonify({ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available })
     return jsonify({"error": "Room not found"}), 404
 
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@dynamic_pricing_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 @login_required
 def book_room(room_id):
     room = Room.query.get(room_id)
-    if room and room.available:
+    if room:
         data = request.get_json()
         try:
             check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
@@ -109,25 +61,26 @@ def book_room(room_id):
         if check_in >= check_out:
             return jsonify({"error": "Check-out must be after check-in"}), 400
 
-        booking = Booking(user_id=current_user.id, room_id=room_id, check_in=check_in, check_out=check_out)
-        room.available = False
-        current_user.reward_points += 100  # Example: 100 points per booking
-        db.session.add(booking)
+        try:
+            reserve_room(room_id, check_in, check_out, user_id=current_user.id)
+        except BookingConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        award_points(current_user.id, BOOKING_REWARD_POINTS, 'booking')
         db.session.commit()
         return jsonify({"message": f"Room {room_id} booked successfully"}), 200
-    return jsonify({"error": "Room not available or not found"}), 400
+    return jsonify({"error": "Room not found"}), 400
 
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@dynamic_pricing_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 @login_required
 def release_room(room_id):
     room = Room.query.get(room_id)
-    if room and not room.available:
-        room.available = True
+    if room and check_out_room(room_id):
         db.session.commit()
         return jsonify({"message": f"Room {room_id} released successfully"}), 200
     return jsonify({"error": "Room not booked or not found"}), 400
 
-@app.route('/subscribe', methods=['POST'])
+@dynamic_pricing_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data['email']
@@ -142,13 +95,13 @@ def subscribe():
     return jsonify({"error": "Already subscribed"}), 400
 
 # Get all users
-@app.route('/users', methods=['GET'])
+@dynamic_pricing_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
+    users = User.query.with_entities(User.id, User.email, User.reward_points, User.visits).all()
     return jsonify([{ 'id': user.id, 'email': user.email, 'reward_points': user.reward_points, 'visits': user.visits } for user in users]), 200
 
 # Get all bookings for a user
-@app.route('/users/<int:user_id>/bookings', methods=['GET'])
+@dynamic_pricing_bp.route('/users/<int:user_id>/bookings', methods=['GET'])
 @login_required
 def get_user_bookings(user_id):
     user = User.query.get(user_id)
@@ -159,12 +112,7 @@ def get_user_bookings(user_id):
     return jsonify([{ 'id': booking.id, 'room_id': booking.room_id, 'check_in': booking.check_in.strftime('%Y-%m-%d'), 'check_out': booking.check_out.strftime('%Y-%m-%d') } for booking in bookings]), 200
 
 # Get all events
-@app.route('/events', methods=['GET'])
+@dynamic_pricing_bp.route('/events', methods=['GET'])
 def get_events():
-    events = Event.query.all()
+    events = Event.query.with_entities(Event.id, Event.name, Event.date, Event.location, Event.category).all()
     return jsonify([{ 'id': event.id, 'name': event.name, 'date': event.date.strftime('%Y-%m-%d'), 'location': event.location, 'category': event.category } for event in events]), 200
-
-# Initialize the database and start the app
-if __name__ == '__main__':
-    db.create_all()
-    app.run(debug=True)
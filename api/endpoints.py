@@ -1,7 +1,9 @@
-from flask import Flask, request, jsonify
-from datetime import datetime
+from flask import Blueprint, request, jsonify
+from datetime import date
+from services.reservation_store import ReservationStore
 
-app = Flask(__name__)
+# Create a Blueprint for the front desk reservation endpoints
+endpoints_bp = Blueprint('endpoints', __name__)
 
 # Sample data representing rooms and reservations
 rooms = {
@@ -10,7 +12,8 @@ rooms = {
     3: {"type": "Suite", "price": 300, "available": True}
 }
 
-reservations = []
+# Indexed by id, room and check-in date; ids are never reused after a delete
+reservations = ReservationStore()
 
 def validate_reservation_data(data):
     """Helper function to validate reservation data."""
@@ -19,29 +22,29 @@ def validate_reservation_data(data):
         if field not in data:
             return False, f"'{field}' is required"
     
-    # Validate dates
+    # Validate dates with the parser the reservation store indexes them with
     try:
-        check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
-        check_out = datetime.strptime(data['check_out'], '%Y-%m-%d')
+        check_in = date.fromisoformat(data['check_in'])
+        check_out = date.fromisoformat(data['check_out'])
         if check_in >= check_out:
             return False, "Check-out date must be after check-in date"
-    except ValueError:
+    except (TypeError, ValueError):
         return False, "Invalid date format. Use 'YYYY-MM-DD'"
     
     return True, ""
 
-@app.route('/rooms', methods=['GET'])
+@endpoints_bp.route('/rooms', methods=['GET'])
 def get_rooms():
     """Get all rooms and their availability."""
     return jsonify(rooms), 200
 
-@app.route('/rooms/available', methods=['GET'])
+@endpoints_bp.route('/rooms/available', methods=['GET'])
 def get_available_rooms():
     """Get all available rooms."""
     available_rooms = {room_id: room for room_id, room in rooms.items() if room['available']}
     return jsonify(available_rooms), 200
 
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@endpoints_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     """Get details of a specific room by room_id."""
     room = rooms.get(room_id)
@@ -49,18 +52,25 @@ def get_room(room_id):
         return jsonify(room), 200
     return jsonify({"error": "Room not found"}), 404
 
-@app.route('/reservations', methods=['GET'])
+@endpoints_bp.route('/reservations', methods=['GET'])
 def get_reservations():
-    """Get all reservations."""
-    return jsonify(reservations), 200
+    """Get all reservations, or with `from` and `to` (YYYY-MM-DD) those staying any night in that range."""
+    start, end = request.args.get('from'), request.args.get('to')
+    if start is None and end is None:
+        return jsonify(reservations.all()), 200
+    try:
+        if date.fromisoformat(start or '') >= date.fromisoformat(end or ''):
+            return jsonify({"error": "'to' must be after 'from'"}), 400
+    except ValueError:
+        return jsonify({"error": "'from' and 'to' must be dates in 'YYYY-MM-DD' format"}), 400
+    return jsonify(reservations.overlapping(start, end)), 200
 
-@app.route('/reservations/room/<int:room_id>', methods=['GET'])
+@endpoints_bp.route('/reservations/room/<int:room_id>', methods=['GET'])
 def get_reservations_for_room(room_id):
     """Get all reservations for a specific room."""
-    room_reservations = [r for r in reservations if r['room_id'] == room_id]
-    return jsonify(room_reservations), 200
+    return jsonify(reservations.for_room(room_id)), 200
 
-@app.route('/reservations', methods=['POST'])
+@endpoints_bp.route('/reservations', methods=['POST'])
 def create_reservation():
     """Create a new reservation for a room."""
     data = request.json
@@ -76,44 +86,35 @@ def create_reservation():
     if room_id not in rooms or not rooms[room_id]['available']:
         return jsonify({"error": "Room not available"}), 400
     
-    reservation = {
-        "id": len(reservations) + 1,
-        "room_id": room_id,
-        "guest_name": data.get('guest_name'),
-        "check_in": data.get('check_in'),
-        "check_out": data.get('check_out')
-    }
-    reservations.append(reservation)
+    reservation = reservations.add(room_id, data.get('guest_name'), data.get('check_in'), data.get('check_out'))
     rooms[room_id]['available'] = False
 
     return jsonify({"message": "Reservation created successfully", "reservation": reservation}), 201
 
-@app.route('/reservations/<int:reservation_id>', methods=['GET'])
+@endpoints_bp.route('/reservations/<int:reservation_id>', methods=['GET'])
 def get_reservation(reservation_id):
     """Get a specific reservation by reservation_id."""
-    reservation = next((r for r in reservations if r['id'] == reservation_id), None)
+    reservation = reservations.get(reservation_id)
     if reservation:
         return jsonify(reservation), 200
     return jsonify({"error": "Reservation not found"}), 404
 
-@app.route('/reservations/<int:reservation_id>', methods=['DELETE'])
+@endpoints_bp.route('/reservations/<int:reservation_id>', methods=['DELETE'])
 def delete_reservation(reservation_id):
     """Delete a reservation by reservation_id."""
-    global reservations
-    reservation = next((r for r in reservations if r['id'] == reservation_id), None)
+    reservation = reservations.remove(reservation_id)
     
     if reservation:
-        reservations = [r for r in reservations if r['id'] != reservation_id]
         rooms[reservation['room_id']]['available'] = True
         return jsonify({"message": "Reservation cancelled successfully"}), 200
     
     return jsonify({"error": "Reservation not found"}), 404
 
-@app.route('/reservations/<int:reservation_id>', methods=['PUT'])
+@endpoints_bp.route('/reservations/<int:reservation_id>', methods=['PUT'])
 def update_reservation(reservation_id):
     """Update an existing reservation."""
     data = request.json
-    reservation = next((r for r in reservations if r['id'] == reservation_id), None)
+    reservation = reservations.get(reservation_id)
     
     if not reservation:
         return jsonify({"error": "Reservation not found"}), 404
@@ -132,14 +133,12 @@ def update_reservation(reservation_id):
         rooms[reservation['room_id']]['available'] = True
         rooms[room_id]['available'] = False
 
-    reservation.update({
-        "room_id": room_id,
-        "guest_name": data.get('guest_name'),
-        "check_in": data.get('check_in'),
-        "check_out": data.get('check_out')
-    })
+    reservation = reservations.update(
+        reservation_id,
+        room_id=room_id,
+        guest_name=data.get('guest_name'),
+        check_in=data.get('check_in'),
+        check_out=data.get('check_out'),
+    )
 
     return jsonify({"message": "Reservation updated successfully", "reservation": reservation}), 200
-
-if __name__ == '__main__':
-    app.run(debug=True)
@@ -1,27 +1,12 @@
-from flask import Flask, request, jsonify, render_template, abort
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, request, jsonify, render_template, abort
 from datetime import datetime
+from extensions import db
+from models import Room, Booking
+from services.booking import BookingConflict, cancel_booking as cancel_held_booking, check_out_room, reserve_room
+from services.room_listing import room_list_response
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-db = SQLAlchemy(app)
-
-# Room model to store room details
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-# Booking model to store guest booking information
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    guest_name = db.Column(db.String(100), nullable=False)
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
+# Create a Blueprint for enhanced visibility routes
+enhanched_visibility_bp = Blueprint('enhanched_visibility', __name__)
 
 # Helper function to validate room existence
 def get_room_or_404(room_id):
@@ -42,26 +27,20 @@ def parse_dates(data):
         abort(400, description="Invalid date format or missing check-in/check-out")
 
 # Home route with a dynamic index.html page showing room details
-@app.route('/')
+@enhanched_visibility_bp.route('/')
 def index():
     rooms = Room.query.all()
     return render_template('index.html', rooms=rooms)
 
 # API to get details of all rooms
-@app.route('/rooms', methods=['GET'])
+@enhanched_visibility_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{
-        'room_number': room.room_number,
-        'room_type': room.room_type,
-        'price': room.price,
-        'available': room.available
-    } for room in rooms]), 200
+    return room_list_response()
 
 # API to get details of all available rooms
-@app.route('/rooms/available', methods=['GET'])
+@enhanched_visibility_bp.route('/rooms/available', methods=['GET'])
 def get_available_rooms():
-    available_rooms = Room.query.filter_by(available=True).all()
+    available_rooms = Room.query.with_entities(Room.room_number, Room.room_type, Room.price, Room.available).filter_by(available=True).all()
     return jsonify([{
         'room_number': room.room_number,
         'room_type': room.room_type,
@@ -70,7 +49,7 @@ def get_available_rooms():
     } for room in available_rooms]), 200
 
 # API to get details of a specific room by room_id
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@enhanched_visibility_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = get_room_or_404(room_id)
     return jsonify({
@@ -81,45 +60,38 @@ def get_room(room_id):
     }), 200
 
 # API to book a room
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@enhanched_visibility_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 def book_room(room_id):
     room = get_room_or_404(room_id)
 
-    if not room.available:
-        return jsonify({"error": f"Room {room.room_number} is already booked"}), 400
-
     data = request.get_json()
     check_in, check_out = parse_dates(data)
 
-    booking = Booking(
-        room_id=room.id, 
-        check_in=check_in, 
-        check_out=check_out, 
-        guest_name=data['guest_name']
-    )
-    room.available = False
-    db.session.add(booking)
+    try:
+        reserve_room(room.id, check_in, check_out, guest_name=data['guest_name'])
+    except BookingConflict:
+        db.session.rollback()
+        return jsonify({"error": f"Room {room.room_number} is already booked"}), 400
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} booked successfully"}), 200
 
 # API to release a booked room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@enhanched_visibility_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     room = get_room_or_404(room_id)
 
-    if room.available:
+    if not check_out_room(room.id):
         return jsonify({"error": f"Room {room.room_number} is not currently booked"}), 400
 
-    room.available = True
     db.session.commit()
 
     return jsonify({"message": f"Room {room.room_number} released successfully"}), 200
 
 # API to get all bookings
-@app.route('/bookings', methods=['GET'])
+@enhanched_visibility_bp.route('/bookings', methods=['GET'])
 def get_bookings():
-    bookings = Booking.query.all()
+    bookings = Booking.query.with_entities(Booking.id, Booking.room_id, Booking.check_in, Booking.check_out, Booking.guest_name).all()
     return jsonify([{
         'id': booking.id,
         'room_id': booking.room_id,
@@ -129,10 +101,10 @@ def get_bookings():
     } for booking in bookings]), 200
 
 # API to get bookings for a specific room
-@app.route('/rooms/<int:room_id>/bookings', methods=['GET'])
+@enhanched_visibility_bp.route('/rooms/<int:room_id>/bookings', methods=['GET'])
 def get_bookings_for_room(room_id):
     room = get_room_or_404(room_id)
-    bookings = Booking.query.filter_by(room_id=room_id).all()
+    bookings = Booking.query.with_entities(Booking.id, Booking.check_in, Booking.check_out, Booking.guest_name).filter_by(room_id=room_id).all()
     return jsonify([{
         'id': booking.id,
         'check_in': booking.check_in.strftime('%Y-%m-%d'),
@@ -141,7 +113,7 @@ def get_bookings_for_room(room_id):
     } for booking in bookings]), 200
 
 # API to cancel a booking
-@app.route('/bookings/<int:booking_id>/cancel', methods=['DELETE'])
+@enhanched_visibility_bp.route('/bookings/<int:booking_id>/cancel', methods=['DELETE'])
 def cancel_booking(booking_id):
     booking = Booking.query.get(booking_id)
     if not booking:
@@ -151,23 +123,17 @@ def cancel_booking(booking_id):
     if not room:
         return jsonify({"error": "Room not found"}), 404
 
-    room.available = True
-    db.session.delete(booking)
+    cancel_held_booking(booking)
     db.session.commit()
 
     return jsonify({"message": f"Booking {booking_id} canceled successfully"}), 200
 
 # Custom error handler for 404 errors
-@app.errorhandler(404)
+@enhanched_visibility_bp.errorhandler(404)
 def not_found(error):
     return jsonify({"error": str(error)}), 404
 
 # Custom error handler for 400 errors
-@app.errorhandler(400)
+@enhanched_visibility_bp.errorhandler(400)
 def bad_request(error):
     return jsonify({"error": str(error)}), 400
-
-# Initialize the database and start the app
-if __name__ == '__main__':
-    db.create_all()
-    app.run(debug=True)
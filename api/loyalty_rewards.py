@@ -1,65 +1,22 @@
-from flask import Flask, request, jsonify, render_template, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, render_template, session
+from flask_mail import Message
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
 import re
-
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-scheduler.start()
-
-# Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)
-    reward_points = db.Column(db.Integer, default=0)
-
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-
-# Login and User Loader
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+from extensions import db, add_app_job
+from models import User, Room, Booking, Event
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.engagement import session_start_time
+from services.mail_dispatch import RECIPIENT_CHUNK_SIZE, mail_dispatcher
+from services.reward_ledger import BOOKING_REWARD_POINTS, award_points, balance, redeem_points, schedule_rollup
+from services.segmentation import REWARD_POINTS
+from services.write_behind import write_behind
+
+# Create a Blueprint for loyalty rewards routes
+loyalty_rewards_bp = Blueprint('loyalty_rewards', __name__)
 
 # Routes
-@app.route('/login', methods=['POST'])
+@loyalty_rewards_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -68,39 +25,39 @@ def login():
         return jsonify({"message": "Logged in successfully"}), 200
     return jsonify({"error": "User not found"}), 404
 
-@app.route('/logout', methods=['POST'])
+@loyalty_rewards_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Start interaction (session)
-@app.route('/start_interaction', methods=['POST'])
+@loyalty_rewards_bp.route('/start_interaction', methods=['POST'])
 @login_required
 def start_interaction():
     session['start_time'] = datetime.now().isoformat()
     session.permanent = True
-    app.permanent_session_lifetime = timedelta(minutes=30)
     return jsonify({"message": "Interaction started"}), 200
 
-@app.route('/end_interaction', methods=['POST'])
+@loyalty_rewards_bp.route('/end_interaction', methods=['POST'])
 @login_required
 def end_interaction():
     start_time = session.pop('start_time', None)
     if start_time:
         end_time = datetime.now()
-        duration = (end_time - datetime.fromisoformat(start_time)).total_seconds()
-        current_user.reward_points += int(duration / 60)  # 1 point per minute
-        db.session.commit()
-        return jsonify({"message": "Interaction ended", "reward_points": current_user.reward_points}), 200
+        duration = (end_time - session_start_time(start_time)).total_seconds()
+        write_behind.add_reward_points(current_user.id, int(duration / 60))  # 1 point per minute
+        # Includes points still waiting in the buffer
+        reward_points = balance(current_user.id) + write_behind.pending_reward_points(current_user.id)
+        return jsonify({"message": "Interaction ended", "reward_points": reward_points}), 200
     return jsonify({"error": "No active interaction found"}), 404
 
 # Room booking
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@loyalty_rewards_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 @login_required
 def book_room(room_id):
     room = Room.query.get(room_id)
-    if room and room.available:
+    if room:
         data = request.get_json()
         try:
             check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
@@ -111,27 +68,41 @@ def book_room(room_id):
         if check_in >= check_out:
             return jsonify({"error": "Check-out must be after check-in"}), 400
 
-        booking = Booking(user_id=current_user.id, room_id=room_id, check_in=check_in, check_out=check_out)
-        room.available = False
-        current_user.reward_points += 100  # Example: 100 points per booking
-        db.session.add(booking)
+        try:
+            reserve_room(room_id, check_in, check_out, user_id=current_user.id)
+        except BookingConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        award_points(current_user.id, BOOKING_REWARD_POINTS, 'booking')
         db.session.commit()
         return jsonify({"message": f"Room {room_id} booked successfully"}), 200
-    return jsonify({"error": "Room not available or not found"}), 400
+    return jsonify({"error": "Room not found"}), 400
+
+# Spend reward points; the balance check and the burn entry share one transaction
+@loyalty_rewards_bp.route('/redeem', methods=['POST'])
+@login_required
+def redeem():
+    data = request.get_json()
+    try:
+        reward_points = redeem_points(current_user.id, int(data['points']))
+    except (KeyError, TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 400
+    db.session.commit()
+    return jsonify({"message": "Points redeemed", "reward_points": reward_points}), 200
 
 # Release room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@loyalty_rewards_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 @login_required
 def release_room(room_id):
     room = Room.query.get(room_id)
-    if room and not room.available:
-        room.available = True
+    if room and check_out_room(room_id):
         db.session.commit()
         return jsonify({"message": f"Room {room_id} released successfully"}), 200
     return jsonify({"error": "Room not booked or not found"}), 400
 
 # Subscription
-@app.route('/subscribe', methods=['POST'])
+@loyalty_rewards_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data.get('email')
@@ -146,7 +117,7 @@ def subscribe():
     return jsonify({"error": "Already subscribed"}), 400
 
 # Add Event
-@app.route('/events', methods=['POST'])
+@loyalty_rewards_bp.route('/events', methods=['POST'])
 @login_required
 def add_event():
     data = request.get_json()
@@ -156,9 +127,12 @@ def add_event():
     return jsonify({"message": "Event added successfully"}), 200
 
 # Room recommendations using Nearest Neighbors (based on price)
-@app.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
+@loyalty_rewards_bp.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_rooms(user_id):
+    from sklearn.neighbors import NearestNeighbors
+    import numpy as np
+
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -186,7 +160,7 @@ def recommend_rooms(user_id):
     return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in recommendations])
 
 # Event recommendations based on preferences
-@app.route('/recommendations/events/<int:user_id>', methods=['GET'])
+@loyalty_rewards_bp.route('/recommendations/events/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_events(user_id):
     user = User.query.get(user_id)
@@ -203,26 +177,21 @@ def recommend_events(user_id):
 
 # Send promotional emails
 def send_promotional_emails():
-    users = User.query.all()
-    for user in users:
-        if user.reward_points > 1000:  # Example threshold for exclusive offers
-            discount = "50%"
-        elif user.reward_points > 500:  # Example threshold for other offers
-            discount = "25%"
-        else:
-            continue
-
-        msg = Message("Exclusive Offer!", recipients=[user.email])
-        msg.body = f"Dear {user.email}, based on your reward points, you get a {discount} discount on your next booking!"
-        mail.send(msg)
+    # Users below the lowest tier are filtered out and the rest labelled by one SQL CASE
+    users = REWARD_POINTS.labelled_query(User.email).yield_per(RECIPIENT_CHUNK_SIZE)
 
-# Schedule email promotions every Monday at 9:00 AM
-scheduler.add_job(func=send_promotional_emails, trigger='cron', day_of_week='mon', hour=9)
+    def messages():
+        for email, segment in users:
+            discount = REWARD_POINTS.discounts[segment]
+            msg = Message("Exclusive Offer!", recipients=[email])
+            msg.body = f"Dear {email}, based on your reward points, you get a {discount} discount on your next booking!"
+            yield msg
 
-# Run the app
-if __name__ == '__main__':
-    db.create_all()
-    try:
-        app.run(debug=True)
-    except (KeyboardInterrupt, SystemExit):
-        scheduler.shutdown()
+    mail_dispatcher.dispatch('loyalty_rewards.promotional_emails', messages())
+
+# Schedule email promotions every Monday at 9:00 AM
+@loyalty_rewards_bp.record_once
+def schedule_jobs(state):
+    write_behind.init_app(state.app)
+    schedule_rollup(state.app)
+    add_app_job(state.app, send_promotional_emails, 'cron', day_of_week='mon', hour=9)
@@ -1,9 +1,27 @@
-from flask import Flask, request, jsonify
-
-app = Flask(__name__)
+from flask import Blueprint, request, jsonify
+from services.occupancy import OccupancyTracker, occupancy_labels
+from services.promotion_rules import PromotionEngine, PromotionRule, rule_from_json, rule_to_json
+from services.room_store import RoomMap
+
+# Create a Blueprint for promotion routes
+promtions_bp = Blueprint('promtions', __name__)
+
+# Room types of the sample rooms, for occupancy per type
+room_types = {
+    101: "Single",
+    102: "Double",
+    103: "Suite",
+    104: "Single",
+    105: "Double",
+    201: "Single",
+    202: "Double",
+    203: "Suite",
+    204: "Single",
+    205: "Double"
+}
 
-# Sample data representing the room map (False = unreserved, True = reserved)
-rooms = {
+# Sample data representing the room map (False = unreserved, True = reserved), kept in the configured room store
+rooms = RoomMap('promtions', {
     101: False,
     102: False,
     103: False,
@@ -14,93 +32,110 @@ rooms = {
     203: False,
     204: False,
     205: False
-}
+}, labels=occupancy_labels(room_types))
+
+# Occupancy counters (overall, per floor, per room type) and their snapshot history
+occupancy = OccupancyTracker(rooms)
 
-# List to store promotions
-promotions = []
+# Promotion launched while fewer than half of the rooms are reserved
+LOW_OCCUPANCY_RULE = PromotionRule('low-occupancy', "Special discount for low occupancy!", "20%", 0.5)
 
-# Helper function to check occupancy rate
+# Rules engine launching and expiring promotions as rooms are reserved and released
+promotion_rules = PromotionEngine(occupancy, [LOW_OCCUPANCY_RULE])
+
+@promtions_bp.record_once
+def init_occupancy(state):
+    occupancy.init_app(state.app)
+    promotion_rules.init_app(state.app)
+
+# Helper function to check occupancy rate, read from the counters rather than the rooms
 def check_occupancy():
-    total_rooms = len(rooms)
-    occupied_rooms = sum(rooms.values())
-    occupancy_rate = occupied_rooms / total_rooms
-    return occupancy_rate
-
-# Helper function to launch a promotion if occupancy is below a threshold
-def launch_promotion():
-    promotion_id = len(promotions) + 1
-    promotion = {
-        "id": promotion_id,
-        "description": "Special discount for low occupancy!",
-        "discount": "20%"
-    }
-    promotions.append(promotion)
-    return promotion
+    return occupancy.rate()
 
 # Helper function to check if a room is valid
 def room_exists(room_id):
     return room_id in rooms
 
-# Helper function to prevent duplicate promotions based on occupancy
-def promotion_already_exists():
-    return any(promo for promo in promotions if promo["description"] == "Special discount for low occupancy!")
-
 # Route to get the status of all rooms
-@app.route('/rooms', methods=['GET'])
+@promtions_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    return jsonify(rooms), 200
+    return jsonify(rooms.all()), 200
 
 # Route to reserve a room
-@app.route('/rooms/<int:room_id>/reserve', methods=['POST'])
+@promtions_bp.route('/rooms/<int:room_id>/reserve', methods=['POST'])
 def reserve_room(room_id):
     if not room_exists(room_id):
         return jsonify({"error": "Room not found"}), 404
-    if rooms[room_id]:
+    if not rooms.compare_and_set(room_id, False, True):
         return jsonify({"error": f"Room {room_id} is already reserved"}), 400
 
-    rooms[room_id] = True
     return jsonify({"message": f"Room {room_id} reserved successfully"}), 200
 
 # Route to release a room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@promtions_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     if not room_exists(room_id):
         return jsonify({"error": "Room not found"}), 404
-    if not rooms[room_id]:
+    if not rooms.compare_and_set(room_id, True, False):
         return jsonify({"error": f"Room {room_id} is already unreserved"}), 400
 
-    rooms[room_id] = False
     return jsonify({"message": f"Room {room_id} released successfully"}), 200
 
 # Route to check current occupancy rate
-@app.route('/occupancy', methods=['GET'])
+@promtions_bp.route('/occupancy', methods=['GET'])
 def get_occupancy():
-    occupancy_rate = check_occupancy()
-    return jsonify({"occupancy_rate": occupancy_rate}), 200
+    return jsonify(occupancy.breakdown()), 200
 
-# Route to get all available promotions
-@app.route('/promotions', methods=['GET'])
-def get_promotions():
-    return jsonify(promotions), 200
+# Route to get occupancy snapshots, oldest first, optionally since an ISO timestamp
+@promtions_bp.route('/occupancy/history', methods=['GET'])
+def get_occupancy_history():
+    return jsonify(occupancy.history(request.args.get('since'))), 200
 
-# Route to launch a promotion if the occupancy is below a threshold
-@app.route('/promotions/launch', methods=['POST'])
+# Route to get promotions in launch order; ?active=true leaves out expired ones
+@promtions_bp.route('/promotions', methods=['GET'])
+def get_promotions():
+    return jsonify(promotion_rules.promotions(active_only=request.args.get('active') == 'true')), 200
+
+# Route to get the promotion rules
+@promtions_bp.route('/promotions/rules', methods=['GET'])
+def get_promotion_rules():
+    return jsonify([rule_to_json(rule) for rule in promotion_rules.rules()]), 200
+
+# Route to add or replace a promotion rule, which is evaluated straight away
+@promtions_bp.route('/promotions/rules', methods=['POST'])
+def add_promotion_rule():
+    try:
+        rule = rule_from_json(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if rule.room_type is not None and rule.room_type not in room_types.values():
+        return jsonify({"error": f"Unknown room type {rule.room_type}"}), 400
+
+    promotion_rules.add_rule(rule)
+    promotion_rules.evaluate([rule.rule_id])
+    return jsonify(dict(rule_to_json(rule), promotion=promotion_rules.active(rule.rule_id))), 201
+
+# Route to delete a promotion rule, expiring its promotion
+@promtions_bp.route('/promotions/rules/<rule_id>', methods=['DELETE'])
+def delete_promotion_rule(rule_id):
+    if promotion_rules.remove_rule(rule_id) is None:
+        return jsonify({"error": f"Rule {rule_id} not found"}), 404
+    return jsonify({"message": f"Rule {rule_id} deleted"}), 200
+
+# Route to launch the low occupancy promotion now rather than on the next reservation or sweep
+@promtions_bp.route('/promotions/launch', methods=['POST'])
 def launch_promotion_endpoint():
-    occupancy_rate = check_occupancy()
-    
-    if occupancy_rate >= 0.5:
-        return jsonify({"message": "Occupancy rate is sufficient, no promotion needed"}), 200
-    
-    if promotion_already_exists():
+    rule_id = LOW_OCCUPANCY_RULE.rule_id
+    if promotion_rules.active(rule_id):
         return jsonify({"message": "A promotion is already running due to low occupancy"}), 400
-    
-    promotion = launch_promotion()
+
+    promotion_rules.evaluate([rule_id])
+    promotion = promotion_rules.active(rule_id)
+    if promotion is None:
+        return jsonify({"message": "Occupancy rate is sufficient, no promotion needed"}), 200
     return jsonify(promotion), 200
 
 # Error handler for custom 404 errors
-@app.errorhandler(404)
+@promtions_bp.errorhandler(404)
 def not_found(error):
     return jsonify({"error": str(error)}), 404
-
-if __name__ == '__main__':
-    app.run(debug=True)
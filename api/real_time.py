@@ -1,11 +1,36 @@
-from flask import Flask, render_template, jsonify, request, abort
-from flask_socketio import SocketIO, emit
+from flask import Blueprint, render_template, jsonify, request, abort
+from flask_socketio import SocketIO, emit, join_room, leave_room
+from services.occupancy import occupancy_labels
+from services.room_store import RoomMap
+from services.room_updates import UPDATE_EVENT, RoomUpdateBatcher, subscription_labels
 
-app = Flask(__name__)
-socketio = SocketIO(app)
+# Create a Blueprint for real-time room map routes
+real_time_bp = Blueprint('real_time', __name__)
+socketio = SocketIO()
 
-# Sample data representing the room map (False = unreserved, True = reserved)
-rooms = {
+# Attach Socket.IO to the application the blueprint is mounted on
+@real_time_bp.record_once
+def init_socketio(state):
+    socketio.init_app(state.app)
+    rooms.init_app(state.app)
+    room_updates.init_app(state.app)
+
+# Room types of the sample rooms; clients subscribe to updates per floor or room type
+room_types = {
+    101: "Single",
+    102: "Double",
+    103: "Suite",
+    104: "Single",
+    105: "Double",
+    201: "Single",
+    202: "Double",
+    203: "Suite",
+    204: "Single",
+    205: "Double"
+}
+
+# Sample data representing the room map (False = unreserved, True = reserved), kept in the configured room store
+rooms = RoomMap('real_time', {
     101: False,
     102: False,
     103: False,
@@ -16,55 +41,77 @@ rooms = {
     203: False,
     204: False,
     205: False
-}
+}, labels=occupancy_labels(room_types))
+
+# Every reserve and release is queued here and sent to the Socket.IO room of each of the room's labels in batches
+room_updates = RoomUpdateBatcher(
+    rooms.labels, lambda label, payload: socketio.emit(UPDATE_EVENT, payload, to=label),
+    spawn=socketio.start_background_task, sleep=socketio.sleep)
+rooms.subscribe(room_updates.add)
 
 # Helper function to validate if a room exists
 def room_exists(room_id):
     if room_id not in rooms:
         abort(404, description=f"Room {room_id} not found")
 
-# Helper function to send room update via SocketIO
-def send_room_update(room_id, status):
-    socketio.emit('update_room', {'room_id': room_id, 'status': status}, broadcast=True)
+# Socket.IO rooms a client may join: every room, each floor and each room type
+def known_labels():
+    return {label for room_labels in rooms.labels.values() for label in room_labels}
+
+@socketio.on('subscribe')
+def subscribe(data=None):
+    """Join the rooms for {"floors": [...], "room_types": [...]} (everything when empty) and send their current status."""
+    try:
+        labels = subscription_labels(data, known_labels())
+    except ValueError as e:
+        emit('subscribe_error', {'error': str(e)})
+        return
+    for label in labels:
+        join_room(label)
+    emit('room_snapshot', {'labels': labels, 'rooms': {room_id: status for room_id, status in rooms.all().items()
+                                                       if set(labels) & set(rooms.labels[room_id])}})
 
-@app.route('/')
+@socketio.on('unsubscribe')
+def unsubscribe(data=None):
+    """Leave the rooms for {"floors": [...], "room_types": [...]}."""
+    try:
+        labels = subscription_labels(data, known_labels())
+    except ValueError as e:
+        emit('subscribe_error', {'error': str(e)})
+        return
+    for label in labels:
+        leave_room(label)
+
+@real_time_bp.route('/')
 def index():
     """Render the index page."""
     return render_template('index.html')
 
-@app.route('/api/rooms', methods=['GET'])
+@real_time_bp.route('/api/rooms', methods=['GET'])
 def get_rooms():
     """API endpoint to get the status of all rooms."""
-    return jsonify(rooms), 200
+    return jsonify(rooms.all()), 200
 
-@app.route('/api/rooms/<int:room_id>/reserve', methods=['POST'])
+@real_time_bp.route('/api/rooms/<int:room_id>/reserve', methods=['POST'])
 def reserve_room(room_id):
     """Reserve a room if it's available."""
     room_exists(room_id)
-    if rooms[room_id]:
+    if not rooms.compare_and_set(room_id, False, True):
         return jsonify({"error": f"Room {room_id} is already reserved"}), 400
 
-    rooms[room_id] = True
-    send_room_update(room_id, True)  # Emit room status to all connected clients
+    # Subscribed clients hear about it in the next room_updates batch
     return jsonify({"message": f"Room {room_id} reserved successfully"}), 200
 
-@app.route('/api/rooms/<int:room_id>/release', methods=['POST'])
+@real_time_bp.route('/api/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     """Release a room if it's currently reserved."""
     room_exists(room_id)
-    if not rooms[room_id]:
+    if not rooms.compare_and_set(room_id, True, False):
         return jsonify({"error": f"Room {room_id} is already unreserved"}), 400
 
-    rooms[room_id] = False
-    send_room_update(room_id, False)  # Emit room status to all connected clients
     return jsonify({"message": f"Room {room_id} released successfully"}), 200
 
 # Error handler for custom 404 errors
-@app.errorhandler(404)
+@real_time_bp.errorhandler(404)
 def not_found(error):
     return jsonify({"error": str(error)}), 404
-
-if __name__ == '__main__':
-    # Concurrency handling is built-in with Flask-SocketIO
-    # Ensure that you have eventlet or gevent installed in production
-    socketio.run(app, debug=True)
@@ -1,48 +1,19 @@
-from flask import Flask, request, jsonify, render_template, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, render_template, session
+from flask_mail import Message
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
+from extensions import db, add_app_job
+from models import User, Interaction
+from services.engagement import DEFAULT_HISTORY_DAYS, MAX_HISTORY_DAYS, daily_summary, user_engagement
+from services.mail_dispatch import RECIPIENT_CHUNK_SIZE, mail_dispatcher
+from services.segmentation import TIME_SPENT
+from services.write_behind import write_behind
 
-app = Flask(__name__)
-
-# Configuration for SQLAlchemy, Flask-Mail, and Flask-Login
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-
-# Initialize Flask extensions
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-
-# Models for User and Interaction
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    total_time_spent = db.Column(db.Integer, default=0)  # in seconds
-
-class Interaction(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    start_time = db.Column(db.DateTime, nullable=False)
-    end_time = db.Column(db.DateTime, nullable=True)
-    user = db.relationship('User', backref=db.backref('interactions', lazy=True))
-
-# User loader for Flask-Login
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Create a Blueprint for session tracking routes
+track_session_bp = Blueprint('track_session', __name__)
 
 # User login endpoint
-@app.route('/login', methods=['POST'])
+@track_session_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -52,52 +23,73 @@ def login():
     return jsonify({"error": "User not found"}), 404
 
 # User logout endpoint
-@app.route('/logout', methods=['POST'])
+@track_session_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Start user interaction (tracks time spent)
-@app.route('/start_interaction', methods=['POST'])
+@track_session_bp.route('/start_interaction', methods=['POST'])
 @login_required
 def start_interaction():
-    interaction = Interaction(user_id=current_user.id, start_time=datetime.now())
-    db.session.add(interaction)
+    # Kept server-side: a start time in the signed cookie could be replayed to end it again
+    db.session.add(Interaction(user_id=current_user.id, start_time=datetime.now()))
     db.session.commit()
     return jsonify({"message": "Interaction started"}), 200
 
 # End user interaction and calculate duration
-@app.route('/end_interaction', methods=['POST'])
+@track_session_bp.route('/end_interaction', methods=['POST'])
 @login_required
 def end_interaction():
-    interaction = Interaction.query.filter_by(user_id=current_user.id, end_time=None).first()
+    # Served by the partial index on open interactions
+    interaction = Interaction.query.filter_by(user_id=current_user.id, end_time=None) \
+        .order_by(Interaction.start_time.desc()).first()
     if interaction:
-        interaction.end_time = datetime.now()
-        duration = (interaction.end_time - interaction.start_time).total_seconds()
-        current_user.total_time_spent += int(duration)
+        start_time, end_time = interaction.start_time, datetime.now()
+        # Closing only a still-open row lets one of two concurrent requests end it
+        closed = Interaction.query.filter_by(id=interaction.id, end_time=None) \
+            .update({'end_time': end_time}, synchronize_session=False)
         db.session.commit()
-        return jsonify({"message": "Interaction ended", "duration": duration}), 200
+        if closed:
+            # Time spent and the daily rollup go through the write-behind buffer
+            write_behind.record_interaction(current_user.id, start_time, end_time, stored=True)
+            return jsonify({"message": "Interaction ended", "duration": (end_time - start_time).total_seconds()}), 200
     return jsonify({"error": "No active interaction found"}), 404
 
+# Current user's daily engagement, read from the rollup instead of the Interaction table
+@track_session_bp.route('/engagement', methods=['GET'])
+@login_required
+def get_engagement():
+    days = min(max(request.args.get('days', DEFAULT_HISTORY_DAYS, type=int), 1), MAX_HISTORY_DAYS)
+    return jsonify(user_engagement(current_user.id, datetime.now().date(), days)), 200
+
+# Engagement across all users for one day (defaults to today)
+@track_session_bp.route('/engagement/daily', methods=['GET'])
+@login_required
+def get_daily_engagement():
+    try:
+        day = datetime.strptime(request.args['date'], '%Y-%m-%d').date() if 'date' in request.args else datetime.now().date()
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    return jsonify(daily_summary(day)), 200
+
 # Send promotional emails based on user time spent on platform
 def send_promotional_emails():
-    users = User.query.all()
-    for user in users:
-        if user.total_time_spent > 3600:  # 1 hour
-            discount = "30%"
-        elif user.total_time_spent > 1800:  # 30 minutes
-            discount = "20%"
-        else:
-            discount = "10%"
-        msg = Message('Special Offer Just for You!', recipients=[user.email])
-        msg.body = f'We appreciate your time on our platform. Enjoy a special {discount} discount on your next booking!'
-        mail.send(msg)
+    # Tiers are assigned by one SQL CASE over the table (see services/segmentation.py)
+    users = TIME_SPENT.labelled_query(User.email).yield_per(RECIPIENT_CHUNK_SIZE)
 
-# Schedule daily promotional email sending
-scheduler.add_job(send_promotional_emails, 'interval', days=1)
-scheduler.start()
+    def messages():
+        for email, segment in users:
+            discount = TIME_SPENT.discounts[segment]
+            msg = Message('Special Offer Just for You!', recipients=[email])
+            msg.body = f'We appreciate your time on our platform. Enjoy a special {discount} discount on your next booking!'
+            yield msg
+
+    mail_dispatcher.dispatch('track_session.promotional_emails', messages())
 
-if __name__ == '__main__':
-    db.create_all()
-    app.run(debug=True)
+# Schedule daily promotional email sending
+@track_session_bp.record_once
+def schedule_jobs(state):
+    write_behind.init_app(state.app)
+    add_app_job(state.app, send_promotional_emails, 'interval', days=1)
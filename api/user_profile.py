@@ -1,64 +1,21 @@
-from flask import Flask, request, jsonify, render_template, session
-from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
-from flask_login import LoginManager, UserMixin, login_user, logout_user, current_user, login_required
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Blueprint, request, jsonify, render_template, session
+from flask_mail import Message
+from flask_login import login_user, logout_user, current_user, login_required
 from datetime import datetime, timedelta
-from sklearn.neighbors import NearestNeighbors
-import numpy as np
 import re
+from extensions import db, add_app_job
+from models import User, Room, Booking, Event
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.engagement import session_start_time
+from services.mail_dispatch import RECIPIENT_CHUNK_SIZE, mail_dispatcher
+from services.reward_ledger import BOOKING_REWARD_POINTS, award_points, balance, pending_points, schedule_rollup
+from services.segmentation import REWARD_POINTS
 
-app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///hotel.db'
-app.config['SECRET_KEY'] = 'your-secret-key'
-app.config['MAIL_SERVER'] = 'smtp.example.com'
-app.config['MAIL_PORT'] = 587
-app.config['MAIL_USE_TLS'] = True
-app.config['MAIL_USERNAME'] = 'your-email@example.com'
-app.config['MAIL_PASSWORD'] = 'your-email-password'
-app.config['MAIL_DEFAULT_SENDER'] = 'your-email@example.com'
-db = SQLAlchemy(app)
-mail = Mail(app)
-login_manager = LoginManager(app)
-scheduler = BackgroundScheduler()
-scheduler.start()
-
-# Models
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)  # JSON string of user preferences
-    reward_points = db.Column(db.Integer, default=0)
-
-class Room(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    room_number = db.Column(db.Integer, unique=True, nullable=False)
-    room_type = db.Column(db.String(50), nullable=False)
-    price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
-
-class Booking(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
-    check_in = db.Column(db.DateTime, nullable=False)
-    check_out = db.Column(db.DateTime, nullable=False)
-    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
-    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
-
-class Event(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    date = db.Column(db.DateTime, nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    category = db.Column(db.String(50), nullable=False)
-
-@login_manager.user_loader
-def load_user(user_id):
-    return User.query.get(int(user_id))
+# Create a Blueprint for user profile routes
+user_profile_bp = Blueprint('user_profile', __name__)
 
 # User authentication routes
-@app.route('/login', methods=['POST'])
+@user_profile_bp.route('/login', methods=['POST'])
 def login():
     data = request.get_json()
     user = User.query.filter_by(email=data['email']).first()
@@ -67,39 +24,38 @@ def login():
         return jsonify({"message": "Logged in successfully"}), 200
     return jsonify({"error": "User not found"}), 404
 
-@app.route('/logout', methods=['POST'])
+@user_profile_bp.route('/logout', methods=['POST'])
 @login_required
 def logout():
     logout_user()
     return jsonify({"message": "Logged out successfully"}), 200
 
 # Interaction start and end with reward system
-@app.route('/start_interaction', methods=['POST'])
+@user_profile_bp.route('/start_interaction', methods=['POST'])
 @login_required
 def start_interaction():
     session['start_time'] = datetime.now().isoformat()
     session.permanent = True
-    app.permanent_session_lifetime = timedelta(minutes=30)  # Sessions expire after 30 minutes
     return jsonify({"message": "Interaction started"}), 200
 
-@app.route('/end_interaction', methods=['POST'])
+@user_profile_bp.route('/end_interaction', methods=['POST'])
 @login_required
 def end_interaction():
     start_time = session.pop('start_time', None)
     if start_time:
         end_time = datetime.now()
-        duration = (end_time - datetime.fromisoformat(start_time)).total_seconds()
-        current_user.reward_points += int(duration / 60)  # 1 point per minute
+        duration = (end_time - session_start_time(start_time)).total_seconds()
+        award_points(current_user.id, int(duration / 60), 'interaction')  # 1 point per minute
         db.session.commit()
-        return jsonify({"message": "Interaction ended", "reward_points": current_user.reward_points}), 200
+        return jsonify({"message": "Interaction ended", "reward_points": balance(current_user.id)}), 200
     return jsonify({"error": "No active interaction found"}), 404
 
 # Room booking and release
-@app.route('/rooms/<int:room_id>/book', methods=['POST'])
+@user_profile_bp.route('/rooms/<int:room_id>/book', methods=['POST'])
 @login_required
 def book_room(room_id):
     room = Room.query.get(room_id)
-    if room and room.available:
+    if room:
         data = request.get_json()
         try:
             check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
@@ -110,26 +66,27 @@ def book_room(room_id):
         if check_in >= check_out:
             return jsonify({"error": "Check-out must be after check-in"}), 400
 
-        booking = Booking(user_id=current_user.id, room_id=room_id, check_in=check_in, check_out=check_out)
-        room.available = False
-        current_user.reward_points += 100  # Example: 100 points per booking
-        db.session.add(booking)
+        try:
+            reserve_room(room_id, check_in, check_out, user_id=current_user.id)
+        except BookingConflict as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 409
+        award_points(current_user.id, BOOKING_REWARD_POINTS, 'booking')
         db.session.commit()
         return jsonify({"message": f"Room {room_id} booked successfully"}), 200
-    return jsonify({"error": "Room not available or not found"}), 400
+    return jsonify({"error": "Room not found"}), 400
 
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@user_profile_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 @login_required
 def release_room(room_id):
     room = Room.query.get(room_id)
-    if room and not room.available:
-        room.available = True
+    if room and check_out_room(room_id):
         db.session.commit()
         return jsonify({"message": f"Room {room_id} released successfully"}), 200
     return jsonify({"error": "Room not booked or not found"}), 400
 
 # Subscription management
-@app.route('/subscribe', methods=['POST'])
+@user_profile_bp.route('/subscribe', methods=['POST'])
 def subscribe():
     data = request.get_json()
     email = data.get('email')
@@ -144,7 +101,7 @@ def subscribe():
     return jsonify({"error": "Already subscribed"}), 400
 
 # Event creation
-@app.route('/events', methods=['POST'])
+@user_profile_bp.route('/events', methods=['POST'])
 @login_required
 def add_event():
     data = request.get_json()
@@ -154,9 +111,12 @@ def add_event():
     return jsonify({"message": "Event added successfully"}), 200
 
 # Room recommendations using Nearest Neighbors (based on price)
-@app.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
+@user_profile_bp.route('/recommendations/rooms/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_rooms(user_id):
+    from sklearn.neighbors import NearestNeighbors
+    import numpy as np
+
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
@@ -183,7 +143,7 @@ def recommend_rooms(user_id):
     return jsonify([{ 'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available } for room in recommendations])
 
 # Event recommendations based on user preferences
-@app.route('/recommendations/events/<int:user_id>', methods=['GET'])
+@user_profile_bp.route('/recommendations/events/<int:user_id>', methods=['GET'])
 @login_required
 def recommend_events(user_id):
     user = User.query.get(user_id)
@@ -199,7 +159,7 @@ def recommend_events(user_id):
     return jsonify([{ 'name': event.name, 'date': event.date.strftime('%Y-%m-%d'), 'location': event.location, 'category': event.category } for event in recommended_events])
 
 # User profile and bookings
-@app.route('/profile/<int:user_id>', methods=['GET'])
+@user_profile_bp.route('/profile/<int:user_id>', methods=['GET'])
 @login_required
 def get_profile(user_id):
     user = User.query.get(user_id)
@@ -214,38 +174,31 @@ def get_profile(user_id):
         'room_type': booking.room.room_type
     } for booking in bookings]
 
+    # Cached balance from the last ledger rollup, plus what has been earned or spent since
     return jsonify({
         'email': user.email,
         'reward_points': user.reward_points,
+        'pending_reward_points': pending_points(user_id),
         'preferences': user.preferences,
         'bookings': booking_data
     })
 
 # Email promotions based on user reward points
 def send_promotional_emails():
-    users = User.query.all()
-    for user in users:
-        if user.reward_points > 1000:  # Example threshold for exclusive offers
-            discount = "50%"
-        elif user.reward_points > 500:  # Example threshold for smaller offers
-            discount = "25%"
-        else:
-            continue
-
-        msg = Message("Exclusive Offer!", recipients=[user.email])
-        msg.body = f"Dear {user.email}, based on your reward points, you get a {discount} discount on your next booking!"
-        mail.send(msg)
-
-# Schedule promotional emails every Monday at 9:00 AM
-scheduler.add_job(func=send_promotional_emails, trigger='cron', day_of_week='mon', hour=9)
-
-# Graceful shutdown of the scheduler
-@app.before_first_request
-def before_first_request():
-    db.create_all()
-
-if __name__ == '__main__':
-    try:
-        app.run(debug=True)
-    except (KeyboardInterrupt, SystemExit):
-        scheduler.shutdown()
+    # Users below the lowest tier are filtered out and the rest labelled by one SQL CASE
+    users = REWARD_POINTS.labelled_query(User.email).yield_per(RECIPIENT_CHUNK_SIZE)
+
+    def messages():
+        for email, segment in users:
+            discount = REWARD_POINTS.discounts[segment]
+            msg = Message("Exclusive Offer!", recipients=[email])
+            msg.body = f"Dear {email}, based on your reward points, you get a {discount} discount on your next booking!"
+            yield msg
+
+    mail_dispatcher.dispatch('user_profile.promotional_emails', messages())
+
+# Schedule the reward ledger rollup, and promotional emails every Monday at 9:00 AM
+@user_profile_bp.record_once
+def schedule_jobs(state):
+    schedule_rollup(state.app)
+    add_app_job(state.app, send_promotional_emails, 'cron', day_of_week='mon', hour=9)
@@ -1,9 +1,12 @@
-from flask import Flask, request, jsonify, abort
+from flask import Blueprint, request, jsonify, abort
+from services.room_store import RoomMap
 
-app = Flask(__name__)
+# Create a Blueprint for room view routes
+view_room_bp = Blueprint('view_room', __name__)
 
-# Sample data representing the room map with room type, price, and availability
-rooms = {
+# Sample data representing the room map with room type, price, and availability,
+# kept in the configured room store (ROOM_STORE_BACKEND)
+rooms = RoomMap('view_room', {
     101: {"type": "Single", "price": 100, "available": True},
     102: {"type": "Double", "price": 150, "available": True},
     103: {"type": "Suite", "price": 300, "available": True},
@@ -14,7 +17,11 @@ rooms = {
     203: {"type": "Suite", "price": 300, "available": True},
     204: {"type": "Single", "price": 100, "available": True},
     205: {"type": "Double", "price": 150, "available": True}
-}
+})
+
+@view_room_bp.record_once
+def init_room_map(state):
+    rooms.init_app(state.app)
 
 # Helper function to check if room exists
 def room_exists(room_id):
@@ -24,41 +31,38 @@ def room_exists(room_id):
     return room
 
 # Route to get a list of all available rooms
-@app.route('/rooms', methods=['GET'])
+@view_room_bp.route('/rooms', methods=['GET'])
 def get_rooms():
-    available_rooms = {room_id: details for room_id, details in rooms.items() if details['available']}
+    available_rooms = {room_id: details for room_id, details in rooms.all().items() if details['available']}
     return jsonify(available_rooms), 200
 
 # Route to get details of a specific room
-@app.route('/rooms/<int:room_id>', methods=['GET'])
+@view_room_bp.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room(room_id):
     room = room_exists(room_id)
     return jsonify(room), 200
 
 # Route to reserve a room
-@app.route('/rooms/<int:room_id>/reserve', methods=['POST'])
+@view_room_bp.route('/rooms/<int:room_id>/reserve', methods=['POST'])
 def reserve_room(room_id):
     room = room_exists(room_id)
     
-    if room['available']:
-        room['available'] = False
-        return jsonify({"message": f"Room {room_id} reserved successfully", "room": room}), 200
+    reserved = dict(room, available=False)
+    if room['available'] and rooms.compare_and_set(room_id, room, reserved):
+        return jsonify({"message": f"Room {room_id} reserved successfully", "room": reserved}), 200
     return jsonify({"error": f"Room {room_id} is not available"}), 400
 
 # Route to release a reserved room
-@app.route('/rooms/<int:room_id>/release', methods=['POST'])
+@view_room_bp.route('/rooms/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
     room = room_exists(room_id)
     
-    if not room['available']:
-        room['available'] = True
-        return jsonify({"message": f"Room {room_id} released successfully", "room": room}), 200
+    released = dict(room, available=True)
+    if not room['available'] and rooms.compare_and_set(room_id, room, released):
+        return jsonify({"message": f"Room {room_id} released successfully", "room": released}), 200
     return jsonify({"error": f"Room {room_id} is not reserved"}), 400
 
 # Error handler for custom 404 errors
-@app.errorhandler(404)
+@view_room_bp.errorhandler(404)
 def not_found(error):
     return jsonify({"error": str(error)}), 404
-
-if __name__ == '__main__':
-    app.run(debug=True)
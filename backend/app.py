@@ -1,31 +1,169 @@
-from flask import Flask
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager
-from flask_migrate import Migrate
-from flask_cors import CORS
+import atexit
+import click
+import importlib
+import logging
+import os
+import sys
+from flask import Flask, jsonify
 from config import Config
+from extensions import db, migrate, login_manager, mail, cors, scheduler
+from utils.db_pool import engine_options, pool_metrics
 
-# Initialize Flask app and extensions
-app = Flask(__name__)
-app.config.from_object(Config)
+# The core routes/ and feature api/ packages live next to backend/
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
 
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
-login_manager = LoginManager(app)
-login_manager.login_view = 'user.login'
-CORS(app)  # Enable CORS for cross-origin requests
+# Feature blueprints from api/: name -> (module, blueprint attribute, url prefix).
+# Modules are only imported when their feature is enabled, so heavy dependencies
+# such as scikit-learn are never loaded for workers that don't serve them.
+FEATURE_BLUEPRINTS = {
+    'analytics_insights': ('api.analytics_&_insights', 'analytics_insights_bp', '/api/analytics'),
+    'available_slot': ('api.available_slot', 'available_slot_bp', '/api/availability'),
+    'calendar_intelligence': ('api.calendar_intelligence', 'calendar_intelligence_bp', '/api/calendar'),
+    'chat_bot': ('api.chat_bot', 'chat_bot_bp', '/api/chat-bot'),
+    'content_subscription': ('api.content_subscription', 'content_subscription_bp', '/api/content'),
+    'data_driven_decision': ('api.data_driven_decision', 'data_driven_decision_bp', '/api/decisions'),
+    'dynamic_pricing': ('api.dynamic_pricing', 'dynamic_pricing_bp', '/api/pricing'),
+    'endpoints': ('api.endpoints', 'endpoints_bp', '/api/front-desk'),
+    'enhanched_visibility': ('api.enhanched_visibility', 'enhanched_visibility_bp', '/api/visibility'),
+    'loyalty_rewards': ('api.loyalty_rewards', 'loyalty_rewards_bp', '/api/loyalty'),
+    'machine_learning': ('api.machine_learning', 'machine_learning_bp', '/api/ml'),
+    'occupancy_level': ('api.occupancy_level', 'occupancy_level_bp', '/api/occupancy'),
+    'personalized_recommedation': ('api.personalized_recommedation', 'personalized_recommedation_bp', '/api/personalized'),
+    'promtions': ('api.promtions', 'promtions_bp', '/api/promotions'),
+    'real_time': ('api.real_time', 'real_time_bp', ''),  # Serves index.html, which polls /api/rooms
+    'room_map': ('api.room_map', 'room_map_bp', '/api/room-map'),
+    'social_handle': ('api.social_handle', 'social_handle_bp', '/api/social'),
+    'track_session': ('api.track_session', 'track_session_bp', '/api/sessions'),
+    'user_profile': ('api.user_profile', 'user_profile_bp', '/api/profile'),
+    'view_room': ('api.view_room', 'view_room_bp', '/api/view-room'),
+}
 
-# Import routes
-from routes import user_routes, room_routes
 
-# Register blueprints
-app.register_blueprint(user_routes, url_prefix="/users")
-app.register_blueprint(room_routes, url_prefix="/rooms")
+def enabled_features(setting):
+    if isinstance(setting, str):
+        setting = [name.strip() for name in setting.split(',') if name.strip()]
+    if 'all' in setting:
+        return list(FEATURE_BLUEPRINTS)
 
-# Error handler for 404
-@app.errorhandler(404)
-def not_found(error):
-    return {"error": "Resource not found"}, 404
+    unknown = set(setting) - set(FEATURE_BLUEPRINTS)
+    if unknown:
+        raise ValueError(f"Unknown features in ENABLED_FEATURES: {', '.join(sorted(unknown))}")
+    return list(setting)
+
+
+def register_features(app, features):
+    for name in features:
+        module_name, blueprint_name, url_prefix = FEATURE_BLUEPRINTS[name]
+        module = importlib.import_module(module_name)
+        app.register_blueprint(getattr(module, blueprint_name), url_prefix=url_prefix or None)
+        logging.info(f"Mounted feature '{name}' at '{url_prefix or '/'}'.")
+
+
+def create_app(config_class=Config, features=None):
+    # Initialize Flask app and extensions
+    app = Flask(__name__)
+    app.config.from_object(config_class)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(app.config))
+
+    db.init_app(app)
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+    login_manager.login_view = 'user_routes.login'
+    mail.init_app(app)
+    cors.init_app(app)  # Enable CORS for cross-origin requests
+
+    # Import models so every table is registered on the shared metadata
+    import models  # noqa: F401
+
+    # Core routes
+    from routes.user_routes import user_routes
+    from routes.room_routes import room_routes
+    app.register_blueprint(user_routes, url_prefix="/users")
+    app.register_blueprint(room_routes, url_prefix="/rooms")
+
+    register_features(app, enabled_features(features if features is not None else app.config['ENABLED_FEATURES']))
+
+    @app.cli.command('init-db')
+    def init_db():
+        """Create all tables on the configured database."""
+        db.create_all()
+        logging.info("Database tables created.")
+
+    @app.cli.command('rebuild-inventory')
+    def rebuild_inventory():
+        """Repopulate the per-night room inventory from existing bookings and reservations."""
+        from services.inventory import rebuild
+
+        written = rebuild()
+        db.session.commit()
+        click.echo(f"{written} room nights written")
+
+    @app.cli.command('import-profile')
+    @click.argument('names', nargs=-1)
+    @click.option('--top', default=5, show_default=True, help='Heaviest direct imports to list per feature.')
+    def import_profile(names, top):
+        """Report cold import time per feature module (python -X importtime)."""
+        from utils.import_profile import profile_import
+
+        for name in enabled_features(list(names) or 'all'):
+            try:
+                profile = profile_import(FEATURE_BLUEPRINTS[name][0], top=top)
+            except RuntimeError as e:
+                click.echo(f"{name:<28} error: {e}")
+                continue
+            heaviest = ', '.join(f"{timing.module} {timing.cumulative_us / 1000:.1f}ms" for timing in profile.heaviest)
+            click.echo(f"{name:<28} {profile.total_us / 1000:>9.1f}ms  {heaviest}")
+
+    # Connection pool usage: checked-out connections, checkout wait histogram, overflow events
+    @app.route('/metrics/db-pool', methods=['GET'])
+    def db_pool_metrics():
+        return jsonify(pool_metrics.snapshot(db.engine.pool)), 200
+
+    # Throughput of the most recent bulk email runs
+    @app.route('/metrics/mail', methods=['GET'])
+    def mail_metrics():
+        from services.mail_dispatch import mail_dispatcher
+        return jsonify(mail_dispatcher.recent_runs()), 200
+
+    # Outbox queue depth, delivery latency and send outcomes
+    @app.route('/metrics/mail-outbox', methods=['GET'])
+    def mail_outbox_metrics():
+        from services.mail_outbox import outbox_sender
+        return jsonify(outbox_sender.stats()), 200
+
+    # Interaction events waiting in the write-behind buffer and flush outcomes
+    @app.route('/metrics/write-behind', methods=['GET'])
+    def write_behind_metrics():
+        from services.write_behind import write_behind
+        return jsonify(write_behind.stats()), 200
+
+    # Error handler for 404
+    @app.errorhandler(404)
+    def not_found(error):
+        return {"error": "Resource not found"}, 404
+
+    # Load scikit-learn and fit the recommender before traffic instead of on the first request
+    if app.config.get('WARM_UP_ML'):
+        from services.recommendation_service import warm_up
+        with app.app_context():
+            warm_up()
+
+    # One scheduler per process, shared by every feature's jobs
+    if app.config.get('SCHEDULER_ENABLED') and not scheduler.running:
+        scheduler.start()
+        atexit.register(lambda: scheduler.shutdown(wait=False) if scheduler.running else None)
+
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    # The real_time feature attaches Socket.IO, which needs its own server loop
+    socketio = app.extensions.get('socketio')
+    if socketio:
+        socketio.run(app, debug=True)
+    else:
+        app.run(debug=True)
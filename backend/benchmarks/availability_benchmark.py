@@ -0,0 +1,139 @@
+"""
+Compare the per-room availability loop with the single set-based query.
+
+Run from the backend directory:
+    python benchmarks/availability_benchmark.py [--sizes 100 1000 10000] [--database-url URL]
+
+Each room gets back-to-back stays of 1-5 nights over a 90 day horizon with
+short gaps, which gives roughly 70% occupancy, and one RoomNight inventory
+row per night booked as services/inventory.py writes them. The loop path
+reads bookings the way the old endpoint did; the set-based path is the
+NOT EXISTS over the inventory that `/available?engine=sql` runs. The search
+window is a three night stay two weeks out.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+app = Flask(__name__)
+db = SQLAlchemy()
+
+
+class Room(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    room_number = db.Column(db.Integer, unique=True, nullable=False)
+    room_type = db.Column(db.String(50), nullable=False)
+    price = db.Column(db.Float, nullable=False)
+
+
+class Booking(db.Model):
+    __table_args__ = (
+        db.Index('ix_bookings_room_dates', 'room_id', 'check_in', 'check_out'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+
+
+class RoomNight(db.Model):
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), primary_key=True)
+    night = db.Column(db.Date, primary_key=True, index=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id'), nullable=True)
+
+
+START = datetime(2025, 1, 1)
+HORIZON_DAYS = 90
+
+
+def seed(room_count, rng):
+    db.drop_all()
+    db.create_all()
+    rooms, bookings, nights = [], [], []
+    for room_id in range(1, room_count + 1):
+        rooms.append({'id': room_id, 'room_number': room_id, 'room_type': rng.choice(['Single', 'Double', 'Suite']),
+                      'price': rng.choice([100, 150, 300])})
+        day = rng.randint(0, 3)
+        while day < HORIZON_DAYS:
+            length = rng.randint(1, 5)
+            booking_id = len(bookings) + 1
+            bookings.append({'id': booking_id, 'room_id': room_id, 'check_in': START + timedelta(days=day),
+                             'check_out': START + timedelta(days=day + length)})
+            nights += [{'room_id': room_id, 'night': (START + timedelta(days=day + n)).date(),
+                        'booking_id': booking_id} for n in range(length)]
+            day += length + rng.choice([0, 0, 1, 2, 3])
+    db.session.bulk_insert_mappings(Room, rooms)
+    db.session.bulk_insert_mappings(Booking, bookings)
+    for start in range(0, len(nights), 10000):
+        db.session.execute(RoomNight.__table__.insert(), nights[start:start + 10000])
+    db.session.commit()
+    return len(bookings)
+
+
+def loop_path(check_in, check_out):
+    # Mirrors the removed is_room_available() helper being called once per room
+    available = []
+    for room in Room.query.all():
+        conflicting = Booking.query.filter(
+            Booking.room_id == room.id,
+            Booking.check_in < check_out,
+            Booking.check_out > check_in
+        ).all()
+        if len(conflicting) == 0:
+            available.append(room)
+    return available
+
+
+def set_based_path(check_in, check_out):
+    # Mirrors find_available_rooms(): services.inventory.free_between() over the RoomNight primary key
+    occupied = db.session.query(RoomNight.room_id).filter(
+        RoomNight.room_id == Room.id,
+        RoomNight.night >= check_in.date(),
+        RoomNight.night < check_out.date()
+    )
+    return Room.query.filter(~occupied.exists()).order_by(Room.id).all()
+
+
+def timed(func, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    check_in = START + timedelta(days=14)
+    check_out = check_in + timedelta(days=3)
+
+    print(f"{'rooms':>8} {'bookings':>9} {'free':>6} {'loop (ms)':>10} {'set (ms)':>10} {'speedup':>8}")
+    with app.app_context():
+        for size in args.sizes:
+            booking_count = seed(size, random.Random(args.seed))
+            loop_time, loop_rooms = timed(loop_path, check_in, check_out)
+            set_time, set_rooms = timed(set_based_path, check_in, check_out)
+            assert [room.id for room in loop_rooms] == [room.id for room in set_rooms]
+            print(f"{size:>8} {booking_count:>9} {len(set_rooms):>6} {loop_time * 1000:>10.1f} "
+                  f"{set_time * 1000:>10.1f} {loop_time / set_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
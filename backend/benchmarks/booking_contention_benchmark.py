@@ -0,0 +1,197 @@
+"""
+Contention benchmark for concurrent booking requests against the same rooms.
+
+Run from the backend directory:
+    python benchmarks/booking_contention_benchmark.py [--requests 500] [--concurrency 100] [--rooms 1] [--database-url URL]
+
+Serves a minimal app on a threaded local server and fires every request at
+once, spread round-robin over --rooms rooms, all for the same dates, so
+exactly one booking per room should succeed. "naive" mirrors the old
+routes: load the room, check `room.available`, do the request's work
+(--think-ms), set it to False and insert the booking. "locked" claims the
+room with FOR UPDATE SKIP LOCKED and a conditional `UPDATE ... WHERE
+available`, checks for overlapping stays, then inserts. "nights" mirrors
+services/booking.py: insert the booking and one inventory row per night,
+letting the (room_id, night) primary key reject the losers. Reports
+throughput, the conflict rate (409s) and rooms that ended up with more than
+one booking.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import IntegrityError
+from werkzeug.serving import make_server
+
+app = Flask(__name__)
+db = SQLAlchemy()
+
+CHECK_IN, CHECK_OUT = datetime(2026, 5, 1), datetime(2026, 5, 3)
+
+
+class Room(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    room_number = db.Column(db.Integer, unique=True, nullable=False)
+    available = db.Column(db.Boolean, default=True)
+
+
+class Booking(db.Model):
+    __table_args__ = (
+        db.Index('ix_bookings_room_dates', 'room_id', 'check_in', 'check_out'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+
+
+class RoomNight(db.Model):
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id'), nullable=False)
+
+
+@app.route('/naive/<int:room_id>/book', methods=['POST'])
+def book_naive(room_id):
+    room = db.session.get(Room, room_id)
+    if not room.available:
+        return jsonify({'error': 'taken'}), 409
+    time.sleep(app.config['THINK_SECONDS'])
+    room.available = False
+    db.session.add(Booking(room_id=room_id, check_in=CHECK_IN, check_out=CHECK_OUT))
+    db.session.commit()
+    return jsonify({}), 200
+
+
+@app.route('/locked/<int:room_id>/book', methods=['POST'])
+def book_locked(room_id):
+    rooms = Room.__table__
+    time.sleep(app.config['THINK_SECONDS'])
+    claimed = db.session.execute(
+        select(rooms.c.id).where(rooms.c.id == room_id, rooms.c.available).with_for_update(skip_locked=True)
+    ).scalar()
+    if claimed is None or not db.session.execute(
+        rooms.update().where(rooms.c.id == room_id, rooms.c.available).values(available=False)
+    ).rowcount:
+        db.session.rollback()
+        return jsonify({'error': 'taken'}), 409
+    overlapping = db.session.query(Booking.id).filter(
+        Booking.room_id == room_id, Booking.check_in < CHECK_OUT, Booking.check_out > CHECK_IN,
+    ).first()
+    if overlapping:
+        db.session.rollback()
+        return jsonify({'error': 'taken'}), 409
+    db.session.add(Booking(room_id=room_id, check_in=CHECK_IN, check_out=CHECK_OUT))
+    db.session.commit()
+    return jsonify({}), 200
+
+
+@app.route('/nights/<int:room_id>/book', methods=['POST'])
+def book_nights(room_id):
+    time.sleep(app.config['THINK_SECONDS'])
+    booking = Booking(room_id=room_id, check_in=CHECK_IN, check_out=CHECK_OUT)
+    db.session.add(booking)
+    try:
+        db.session.flush()
+        db.session.execute(RoomNight.__table__.insert(), [
+            {'room_id': room_id, 'night': CHECK_IN.date() + timedelta(days=n), 'booking_id': booking.id}
+            for n in range((CHECK_OUT - CHECK_IN).days)
+        ])
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'error': 'taken'}), 409
+    db.session.commit()
+    return jsonify({}), 200
+
+
+def post(url):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method='POST'), timeout=120) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+
+def run(base_url, path, room_ids, requests, concurrency):
+    with app.app_context():
+        db.session.execute(RoomNight.__table__.delete())
+        db.session.execute(Booking.__table__.delete())
+        db.session.execute(Room.__table__.update().values(available=True))
+        db.session.commit()
+
+    urls = [f"{base_url}/{path}/{room_ids[n % len(room_ids)]}/book" for n in range(requests)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        statuses = list(pool.map(post, urls))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        double_booked = db.session.query(Booking.room_id).group_by(Booking.room_id) \
+            .having(func.count(Booking.id) > 1).count()
+        db.session.remove()
+    return statuses, double_booked, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--rooms', type=int, default=1)
+    parser.add_argument('--think-ms', type=float, default=2, help='work done by each request before it books')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file in WAL mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bookings.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['THINK_SECONDS'] = args.think_ms / 1000
+        if args.database_url:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.concurrency, 'max_overflow': 0}
+        else:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 120}}
+        db.init_app(app)
+
+        with app.app_context():
+            if db.engine.dialect.name == 'sqlite':
+                event.listen(db.engine, 'connect', lambda connection, _: connection.execute('PRAGMA journal_mode=WAL'))
+            db.drop_all()
+            db.create_all()
+            db.session.add_all([Room(id=n, room_number=100 + n) for n in range(1, args.rooms + 1)])
+            db.session.commit()
+        room_ids = list(range(1, args.rooms + 1))
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # One access log line per request drowns the results
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server.socket.listen(args.concurrency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        print(f"{'path':<7} {'requests':>9} {'booked':>7} {'conflicts':>10} {'errors':>7} {'conflict %':>11} "
+              f"{'double-booked':>14} {'req/s':>8}")
+        for path in ('naive', 'locked', 'nights'):
+            statuses, double_booked, elapsed = run(base_url, path, room_ids, args.requests, args.concurrency)
+            booked, conflicts = statuses.count(200), statuses.count(409)
+            errors = len(statuses) - booked - conflicts
+            print(f"{path:<7} {args.requests:>9} {booked:>7} {conflicts:>10} {errors:>7} "
+                  f"{100 * conflicts / len(statuses):>10.1f}% {double_booked:>14} {len(statuses) / elapsed:>8.0f}")
+
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Compare full ORM entity loads with column-only projections for list endpoints.
+
+Run from the backend directory:
+    python benchmarks/list_projection_benchmark.py [--rows 100000] [--database-url URL]
+
+Each case mirrors a list endpoint (get_bookings, get_users): query every row,
+then build the JSON-ready list of dicts the endpoint returns. "entity" loads
+Model.query.all() as before; "columns" loads the same fields with
+with_entities() and serializes the Row objects directly.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+app = Flask(__name__)
+db = SQLAlchemy()
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(256), nullable=True)
+    preferences = db.Column(db.String(500), nullable=True)
+    reward_points = db.Column(db.Integer, default=0)
+    visits = db.Column(db.Integer, default=0)
+    total_time_spent = db.Column(db.Integer, default=0)
+    last_login = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class Booking(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=True)
+    room_id = db.Column(db.Integer, nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+    guest_name = db.Column(db.String(100), nullable=True)
+    booked_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+START = datetime(2025, 1, 1)
+
+
+def seed(row_count, rng):
+    db.drop_all()
+    db.create_all()
+    db.session.bulk_insert_mappings(User, [
+        {'id': n, 'email': f"guest{n}@example.com", 'password': 'x' * 60, 'preferences': 'Suite,Concert',
+         'reward_points': rng.randint(0, 5000), 'visits': rng.randint(0, 50), 'total_time_spent': rng.randint(0, 10 ** 5),
+         'last_login': START, 'created_at': START}
+        for n in range(1, row_count + 1)
+    ])
+    bookings = []
+    for n in range(1, row_count + 1):
+        check_in = START + timedelta(days=rng.randint(0, 365))
+        bookings.append({'id': n, 'user_id': rng.randint(1, row_count), 'room_id': rng.randint(1, 500),
+                         'check_in': check_in, 'check_out': check_in + timedelta(days=rng.randint(1, 5)),
+                         'guest_name': f"Guest {n}", 'booked_at': START})
+    db.session.bulk_insert_mappings(Booking, bookings)
+    db.session.commit()
+
+
+def booking_dicts(bookings):
+    return [{'id': booking.id, 'room_id': booking.room_id, 'check_in': booking.check_in.strftime('%Y-%m-%d'),
+             'check_out': booking.check_out.strftime('%Y-%m-%d'), 'guest_name': booking.guest_name}
+            for booking in bookings]
+
+
+def user_dicts(users):
+    return [{'id': user.id, 'email': user.email, 'reward_points': user.reward_points, 'visits': user.visits}
+            for user in users]
+
+
+CASES = {
+    'get_bookings': (
+        lambda: booking_dicts(Booking.query.all()),
+        lambda: booking_dicts(Booking.query.with_entities(
+            Booking.id, Booking.room_id, Booking.check_in, Booking.check_out, Booking.guest_name).all()),
+    ),
+    'get_users': (
+        lambda: user_dicts(User.query.all()),
+        lambda: user_dicts(User.query.with_entities(User.id, User.email, User.reward_points, User.visits).all()),
+    ),
+}
+
+
+def timed(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        db.session.remove()
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--database-url', default='sqlite://')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+
+    print(f"{'endpoint':<14} {'rows':>8} {'entity (rows/s)':>16} {'columns (rows/s)':>17} {'speedup':>8}")
+    with app.app_context():
+        seed(args.rows, random.Random(args.seed))
+        for name, (entity_path, column_path) in CASES.items():
+            entity_time, entity_rows = timed(entity_path)
+            column_time, column_rows = timed(column_path)
+            assert entity_rows == column_rows
+            print(f"{name:<14} {len(column_rows):>8} {len(entity_rows) / entity_time:>16,.0f} "
+                  f"{len(column_rows) / column_time:>17,.0f} {entity_time / column_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Load test for fanning real_time room updates out to thousands of Socket.IO clients.
+
+Run from the backend directory:
+    python benchmarks/realtime_fanout_load_test.py [--clients 2000] [--floors 20] [--rooms-per-floor 20]
+                                                   [--changes 1000] [--rate 500] [--batch-ms 100]
+
+Connects --clients Flask-SocketIO test clients to an in-process server,
+each subscribed to one random floor as a front desk or kiosk would. Test
+clients skip the network, but every message still goes through the
+server's room bookkeeping and is encoded and decoded per client, so the
+fan-out work is real. A producer flips random rooms at --rate changes per
+second. "broadcast" mirrors the old send_room_update: each change is sent
+at once to every client. "rooms" sends each change at once to the Socket.IO
+rooms of its floor, room type and 'all'. "batched" is
+services/room_updates.py coalescing over --batch-ms. Reports the achieved
+change rate, messages delivered per client, seconds spent emitting, and
+fan-out latency in milliseconds on --probes clients: how long a client's
+view of a room on its floor lagged behind a change before the update
+arrived.
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+from flask import Flask
+from flask_socketio import SocketIO, join_room
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.occupancy import occupancy_labels  # noqa: E402
+from services.room_store import RoomMap  # noqa: E402
+from services.room_updates import UPDATE_EVENT, RoomUpdateBatcher, subscription_labels  # noqa: E402
+
+ROOM_TYPES = ('Single', 'Double', 'Suite')
+
+
+class CountingQueue(list):
+    """Stands in for a test client's message queue: counts messages without keeping them."""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+
+    def append(self, message):
+        self.count += 1
+
+
+class ProbeQueue(CountingQueue):
+    """Keeps every message with the time it arrived."""
+
+    def __init__(self):
+        super().__init__()
+        self.received = []
+
+    def append(self, message):
+        self.count += 1
+        self.received.append((time.perf_counter(), message))
+
+
+def build_server(room_types):
+    app = Flask(__name__)
+    socketio = SocketIO(app, async_mode='threading')
+    known = {label for labels in occupancy_labels(room_types).values() for label in labels}
+
+    @socketio.on('subscribe')
+    def subscribe(data=None):
+        for label in subscription_labels(data, known):
+            join_room(label)
+
+    return app, socketio
+
+
+def connect_clients(app, socketio, floors, count, probes, rng):
+    clients = []
+    for n in range(count):
+        client = socketio.test_client(app)
+        floor = rng.choice(floors)
+        client.emit('subscribe', {'floors': [floor]})
+        client.queue = ProbeQueue() if n < probes else CountingQueue()
+        clients.append((client, floor))
+    return clients
+
+
+def produce(rooms, room_ids, changes, rate, rng):
+    """Flip random rooms at `rate` per second; returns each room's (time, new status) changes and the elapsed seconds."""
+    changed = {room_id: [] for room_id in room_ids}
+    started = time.perf_counter()
+    for n in range(changes):
+        delay = started + n / rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        room_id = rng.choice(room_ids)
+        current = rooms.get(room_id)
+        changed[room_id].append((time.perf_counter(), not current))
+        rooms.compare_and_set(room_id, current, not current)
+    return changed, time.perf_counter() - started
+
+
+def latencies(clients, room_floors, changed):
+    """
+    Milliseconds each probe client's view of a room on its floor was stale:
+    from the change that made it differ from the room's real status (flips
+    that cancel out before an update are not counted) to the update arriving.
+    """
+    results = []
+    for client, floor in clients:
+        if not isinstance(client.queue, ProbeQueue):
+            continue
+        seen, next_change = {}, {}
+        for received, message in client.queue.received:
+            payload = message['args'][0]
+            updates = payload['rooms'] if 'rooms' in payload else {payload['room_id']: payload['status']}
+            for room_id, status in updates.items():
+                room_id = int(room_id)
+                if room_floors[room_id] != floor:
+                    continue  # A broadcast the client has no use for
+                changes, n = changed[room_id], next_change.get(room_id, 0)
+                stale_since = None
+                while n < len(changes) and changes[n][0] <= received:
+                    changed_at, new_status = changes[n]
+                    if new_status == seen.get(room_id, False):
+                        stale_since = None
+                    elif stale_since is None:
+                        stale_since = changed_at
+                    n += 1
+                if stale_since is not None:
+                    results.append((received - stale_since) * 1000)
+                seen[room_id], next_change[room_id] = status, n
+    return sorted(results)
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run(mode, args, app, socketio, clients, room_types):
+    rng = random.Random(args.seed)
+    labels = occupancy_labels(room_types)
+    rooms = RoomMap(f'fanout-{mode}', {room_id: False for room_id in room_types}, labels=labels)
+    emitting = [0.0]
+
+    def timed_emit(event, payload, **kwargs):
+        started = time.perf_counter()
+        socketio.emit(event, payload, **kwargs)
+        emitting[0] += time.perf_counter() - started
+
+    batcher = None
+    if mode == 'broadcast':
+        rooms.subscribe(lambda room_id, old, new: timed_emit('update_room', {'room_id': room_id, 'status': new}))
+    else:
+        batcher = RoomUpdateBatcher(labels, lambda label, payload: timed_emit(UPDATE_EVENT, payload, to=label),
+                                    interval_ms=args.batch_ms if mode == 'batched' else 0)
+        rooms.subscribe(batcher.add)
+
+    for client, _ in clients:
+        client.queue.__init__()
+    changed, elapsed = produce(rooms, list(room_types), args.changes, args.rate, rng)
+    if batcher is not None:
+        time.sleep(batcher.interval)
+        batcher.close()
+
+    delivered = sum(client.queue.count for client, _ in clients)
+    room_floors = {room_id: room_id // 100 for room_id in room_types}
+    results = latencies(clients, room_floors, changed)
+    return args.changes / elapsed, delivered / len(clients), emitting[0], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--floors', type=int, default=20)
+    parser.add_argument('--rooms-per-floor', type=int, default=20)
+    parser.add_argument('--changes', type=int, default=1000)
+    parser.add_argument('--rate', type=float, default=500, help='room changes per second')
+    parser.add_argument('--batch-ms', type=int, default=100)
+    parser.add_argument('--probes', type=int, default=50, help='clients whose message times are recorded')
+    parser.add_argument('--modes', nargs='+', choices=['broadcast', 'rooms', 'batched'],
+                        default=['broadcast', 'rooms', 'batched'])
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+    if not 0 < args.rooms_per_floor < 100:
+        parser.error("--rooms-per-floor must be 1-99: room numbers are floor * 100 + n")
+    logging.getLogger('socketio').setLevel(logging.WARNING)
+    logging.getLogger('engineio').setLevel(logging.WARNING)
+
+    floors = list(range(1, args.floors + 1))
+    room_types = {floor * 100 + n: ROOM_TYPES[n % len(ROOM_TYPES)]
+                  for floor in floors for n in range(1, args.rooms_per_floor + 1)}
+    app, socketio = build_server(room_types)
+    started = time.perf_counter()
+    clients = connect_clients(app, socketio, floors, args.clients, args.probes, random.Random(args.seed))
+    print(f"Connected {args.clients} clients in {time.perf_counter() - started:.1f}s; "
+          f"{len(room_types)} rooms on {args.floors} floors, {args.changes} changes at {args.rate:.0f}/s")
+
+    print(f"{'mode':<10} {'changes/s':>10} {'msgs/client':>12} {'emit (s)':>9} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9} {'max (ms)':>9}")
+    for mode in args.modes:
+        rate, per_client, emitting, results = run(mode, args, app, socketio, clients, room_types)
+        print(f"{mode:<10} {rate:>10.0f} {per_client:>12.1f} {emitting:>9.2f} {percentile(results, 0.5):>9.2f} "
+              f"{percentile(results, 0.99):>9.2f} {(results[-1] if results else 0.0):>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
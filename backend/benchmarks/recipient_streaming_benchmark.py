@@ -0,0 +1,116 @@
+"""
+Peak memory of the promotional email jobs' recipient scan: full table load vs
+SQL-filtered streaming.
+
+Run from the backend directory:
+    python benchmarks/recipient_streaming_benchmark.py [--users 1000000] [--database-url URL]
+
+"all" mirrors the old jobs: User.query.all() and the reward_points tiers
+checked in Python. "stream" pushes the lowest tier (reward_points > 500) into
+SQL, selects only email and reward_points, and iterates with yield_per.
+Both build the same (email, discount) pairs, which are counted rather than
+kept, as the dispatcher consumes them. Peak memory is measured with
+tracemalloc, so absolute timings are inflated.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+app = Flask(__name__)
+db = SQLAlchemy()
+
+RECIPIENT_CHUNK_SIZE = 1000
+INSERT_CHUNK_SIZE = 50000
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    password = db.Column(db.String(256), nullable=True)
+    preferences = db.Column(db.String(500), nullable=True)
+    reward_points = db.Column(db.Integer, default=0, index=True)
+    visits = db.Column(db.Integer, default=0)
+    total_time_spent = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def seed(user_count, rng):
+    db.drop_all()
+    db.create_all()
+    created_at = datetime(2025, 1, 1)
+    for start in range(1, user_count + 1, INSERT_CHUNK_SIZE):
+        db.session.execute(User.__table__.insert(), [
+            {'id': n, 'email': f"guest{n}@example.com", 'password': 'x' * 60, 'preferences': 'Suite,Concert',
+             # Long-tailed balances: most users sit below the first offer tier
+             'reward_points': int(rng.expovariate(1 / 300)), 'visits': rng.randint(0, 50),
+             'total_time_spent': rng.randint(0, 10 ** 5), 'created_at': created_at}
+            for n in range(start, min(start + INSERT_CHUNK_SIZE, user_count + 1))
+        ])
+    db.session.commit()
+
+
+def discount_for(reward_points):
+    return "50%" if reward_points > 1000 else "25%"
+
+
+def load_all_path():
+    sent = 0
+    for user in User.query.all():
+        if user.reward_points > 500:
+            recipient = (user.email, discount_for(user.reward_points))  # noqa: F841
+            sent += 1
+    return sent
+
+
+def streaming_path():
+    sent = 0
+    users = User.query.with_entities(User.email, User.reward_points).filter(User.reward_points > 500) \
+        .yield_per(RECIPIENT_CHUNK_SIZE)
+    for user in users:
+        recipient = (user.email, discount_for(user.reward_points))  # noqa: F841
+        sent += 1
+    return sent
+
+
+def measured(func):
+    db.session.remove()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    db.session.remove()
+    return result, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000000)
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'users.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        db.init_app(app)
+
+        with app.app_context():
+            seed(args.users, random.Random(args.seed))
+            print(f"{'path':<8} {'users':>9} {'recipients':>11} {'peak MiB':>9} {'seconds':>8}")
+            for name, func in (('all', load_all_path), ('stream', streaming_path)):
+                recipients, peak, elapsed = measured(func)
+                print(f"{name:<8} {args.users:>9} {recipients:>11} {peak / 2 ** 20:>9.1f} {elapsed:>8.1f}")
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare the front desk's old reservation list with the indexed ReservationStore.
+
+Run from the backend directory:
+    python benchmarks/reservation_store_benchmark.py [--sizes 1000 10000 100000 1000000] [--ops 200]
+
+Each size is loaded with stays of 1-7 nights spread over two years and 500
+rooms. "list" mirrors the old api/endpoints.py: a plain list scanned for
+every lookup, rebuilt on delete. "store" is services/reservation_store.py.
+Reports the mean latency per operation in microseconds. The store's get,
+add and delete should stay flat as the size grows; room and range
+listings grow only with the rows they return ("rows" is the mean per
+range query). The list path is skipped above --list-max, where a single
+scan takes too long to be worth timing.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.reservation_store import ReservationStore  # noqa: E402
+
+ROOMS = 500
+HORIZON_DAYS = 730
+FIRST_NIGHT = date(2026, 1, 1)
+
+
+def stays(count, rng):
+    for _ in range(count):
+        check_in = FIRST_NIGHT + timedelta(days=rng.randrange(HORIZON_DAYS))
+        yield rng.randrange(1, ROOMS + 1), check_in, check_in + timedelta(days=rng.randint(1, 7))
+
+
+class ListReservations:
+    """The previous list-backed storage, kept here for comparison."""
+
+    def __init__(self):
+        self.reservations = []
+
+    def add(self, room_id, guest_name, check_in, check_out):
+        reservation = {'id': len(self.reservations) + 1, 'room_id': room_id, 'guest_name': guest_name,
+                       'check_in': check_in, 'check_out': check_out}
+        self.reservations.append(reservation)
+        return reservation
+
+    def get(self, reservation_id):
+        return next((r for r in self.reservations if r['id'] == reservation_id), None)
+
+    def for_room(self, room_id):
+        return [r for r in self.reservations if r['room_id'] == room_id]
+
+    def overlapping(self, start, end):
+        return [r for r in self.reservations if r['check_in'] < end and r['check_out'] > start]
+
+    def remove(self, reservation_id):
+        reservation = self.get(reservation_id)
+        self.reservations = [r for r in self.reservations if r['id'] != reservation_id]
+        return reservation
+
+
+def timed(func, args_list):
+    started = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - started) / len(args_list) * 1e6
+
+
+def measure(store, size, ops, rng):
+    ids = [rng.randint(1, size) for _ in range(ops)]
+    windows = []
+    for _ in range(ops):
+        start = FIRST_NIGHT + timedelta(days=rng.randrange(HORIZON_DAYS))
+        windows.append((start.isoformat(), (start + timedelta(days=3)).isoformat()))
+    results = {
+        'get': timed(store.get, [(reservation_id,) for reservation_id in ids]),
+        'room': timed(store.for_room, [(rng.randint(1, ROOMS),) for _ in range(ops)]),
+        'range': timed(store.overlapping, windows),
+        'add': timed(store.add, [(room_id, 'Guest', check_in.isoformat(), check_out.isoformat())
+                                 for room_id, check_in, check_out in stays(ops, rng)]),
+        'delete': timed(store.remove, [(reservation_id,) for reservation_id in dict.fromkeys(ids)]),
+    }
+    results['rows'] = sum(len(store.overlapping(*window)) for window in windows) / ops
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    parser.add_argument('--ops', type=int, default=200, help='operations timed per kind')
+    parser.add_argument('--list-max', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    operations = ('get', 'room', 'range', 'add', 'delete')
+    print(f"{'path':<6} {'size':>9} " + ' '.join(f"{name + ' (us)':>12}" for name in operations) + f" {'rows':>7}")
+    for size in args.sizes:
+        for path, factory in (('list', ListReservations), ('store', ReservationStore)):
+            if path == 'list' and size > args.list_max:
+                continue
+            rng = random.Random(args.seed)
+            store = factory()
+            for room_id, check_in, check_out in stays(size, rng):
+                store.add(room_id, 'Guest', check_in.isoformat(), check_out.isoformat())
+            results = measure(store, size, args.ops, rng)
+            print(f"{path:<6} {size:>9} " + ' '.join(f"{results[name]:>12.1f}" for name in operations)
+                  + f" {results['rows']:>7.0f}")
+
+
+if __name__ == '__main__':
+    main()
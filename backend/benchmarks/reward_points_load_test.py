@@ -0,0 +1,147 @@
+"""
+Load test for lost reward point updates under concurrent requests.
+
+Run from the backend directory:
+    python benchmarks/reward_points_load_test.py [--requests 500] [--concurrency 500] [--database-url URL]
+
+Serves a minimal app on a threaded local server and fires every request at
+once, each awarding one point to the same user. "orm" mirrors the old
+booking and end_interaction code: load the user, do the request's work
+(--think-ms), `user.reward_points += 1`, commit. "sql" is one `UPDATE ...
+SET reward_points = reward_points + 1` and a read-back in the same
+transaction. "ledger" mirrors services/reward_ledger.py: the request only
+inserts a ledger entry, and the balance is their sum. The stored balance
+is compared with the number of successful requests; any shortfall is a
+lost update.
+"""
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, jsonify
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, select
+from werkzeug.serving import make_server
+
+app = Flask(__name__)
+db = SQLAlchemy()
+
+
+class User(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+    reward_points = db.Column(db.Integer, default=0)
+
+
+class RewardLedgerEntry(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False)
+
+
+@app.route('/award/orm/<int:user_id>', methods=['POST'])
+def award_orm(user_id):
+    user = db.session.get(User, user_id)
+    time.sleep(app.config['THINK_SECONDS'])
+    user.reward_points += 1
+    db.session.commit()
+    return jsonify({'reward_points': user.reward_points})
+
+
+@app.route('/award/sql/<int:user_id>', methods=['POST'])
+def award_sql(user_id):
+    users = User.__table__
+    time.sleep(app.config['THINK_SECONDS'])
+    db.session.execute(users.update().where(users.c.id == user_id).values(
+        reward_points=func.coalesce(users.c.reward_points, 0) + 1,
+    ))
+    balance = db.session.execute(select(users.c.reward_points).where(users.c.id == user_id)).scalar()
+    db.session.commit()
+    return jsonify({'reward_points': balance})
+
+
+@app.route('/award/ledger/<int:user_id>', methods=['POST'])
+def award_ledger(user_id):
+    time.sleep(app.config['THINK_SECONDS'])
+    db.session.execute(RewardLedgerEntry.__table__.insert().values(user_id=user_id, points=1))
+    db.session.commit()
+    return jsonify({})
+
+
+def post(url):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method='POST'), timeout=120) as response:
+            return response.status == 200
+    except OSError:
+        return False
+
+
+def run(base_url, path, user_id, requests, concurrency):
+    with app.app_context():
+        db.session.execute(User.__table__.update().values(reward_points=0))
+        db.session.execute(RewardLedgerEntry.__table__.delete())
+        db.session.commit()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        succeeded = sum(pool.map(post, [f"{base_url}/award/{path}/{user_id}"] * requests))
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        stored = db.session.get(User, user_id).reward_points + db.session.query(
+            func.coalesce(func.sum(RewardLedgerEntry.points), 0)).filter(RewardLedgerEntry.user_id == user_id).scalar()
+        db.session.remove()
+    return succeeded, stored, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--think-ms', type=float, default=5, help='work done by each request between read and write')
+    parser.add_argument('--database-url', help='defaults to a temporary SQLite file in WAL mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        app.config['SQLALCHEMY_DATABASE_URI'] = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'rewards.db')}"
+        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config['THINK_SECONDS'] = args.think_ms / 1000
+        if args.database_url:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': args.concurrency, 'max_overflow': 0}
+        else:
+            app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'connect_args': {'timeout': 120}}
+        db.init_app(app)
+
+        with app.app_context():
+            if db.engine.dialect.name == 'sqlite':
+                event.listen(db.engine, 'connect', lambda connection, _: connection.execute('PRAGMA journal_mode=WAL'))
+            db.drop_all()
+            db.create_all()
+            user = User(email='guest@example.com')
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)  # One access log line per request drowns the results
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        server.socket.listen(args.concurrency)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}"
+
+        print(f"{'path':<6} {'requests':>9} {'succeeded':>10} {'stored':>7} {'lost':>6} {'seconds':>8}")
+        for path in ('orm', 'sql', 'ledger'):
+            succeeded, stored, elapsed = run(base_url, path, user_id, args.requests, args.concurrency)
+            print(f"{path:<6} {args.requests:>9} {succeeded:>10} {stored:>7} {succeeded - stored:>6} {elapsed:>8.2f}")
+
+        server.shutdown()
+        with app.app_context():
+            db.engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Throughput and consistency of the room store backends under several worker processes.
+
+Run from the backend directory:
+    python benchmarks/room_store_benchmark.py [--processes 4] [--ops 20000] [--read-ratio 0.9] [--rooms 200]
+
+Every process stands in for a gunicorn worker: it reads random rooms and,
+for the remaining operations, tries to reserve or release one with
+compare_and_set, counting the flips it won. Afterwards the number of
+reserved rooms must equal reservations won minus releases won across all
+processes, which only holds if no two workers ever won the same flip.
+"memory" cannot be shared between processes, so it runs the same workers
+as threads of one process for reference. The socket server runs in a
+process of its own, as it would in production. Reports total operations
+per second and read latency percentiles in microseconds.
+"""
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.room_store import MemoryRoomStore, RoomStoreServer, SocketRoomStore, SqliteRoomStore  # noqa: E402
+
+
+def worker(store, rooms, ops, read_ratio, seed, results):
+    rng = random.Random(seed)
+    reads, reserved, released = [], 0, 0
+    started = time.perf_counter()
+    for _ in range(ops):
+        room_id = rng.randrange(rooms)
+        if rng.random() < read_ratio:
+            read_started = time.perf_counter()
+            store.get('rooms', room_id)
+            reads.append(time.perf_counter() - read_started)
+        elif rng.random() < 0.5:
+            reserved += store.compare_and_set('rooms', room_id, False, True)
+        else:
+            released += store.compare_and_set('rooms', room_id, True, False)
+    results.put((time.perf_counter() - started, reads, reserved, released))
+
+
+def percentile(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] * 1e6 if values else 0.0
+
+
+def run(store, processes, args, threads=False):
+    store.seed('rooms', {room_id: False for room_id in range(args.rooms)})
+    context = multiprocessing.get_context('fork')
+    results = queue.Queue() if threads else context.Queue()
+    spawn = threading.Thread if threads else context.Process
+    workers = [spawn(target=worker, args=(store, args.rooms, args.ops, args.read_ratio, n, results))
+               for n in range(processes)]
+    started = time.perf_counter()
+    for process in workers:
+        process.start()
+    outcomes = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - started
+
+    reads = sorted(read for _, worker_reads, _, _ in outcomes for read in worker_reads)
+    net_reserved = sum(reserved - released for _, _, reserved, released in outcomes)
+    consistent = sum(store.all('rooms').values()) == net_reserved
+    return processes * args.ops / elapsed, percentile(reads, 0.5), percentile(reads, 0.99), consistent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--ops', type=int, default=20000, help='operations per process')
+    parser.add_argument('--read-ratio', type=float, default=0.9)
+    parser.add_argument('--rooms', type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        socket_path = os.path.join(tmpdir, 'rooms.sock')
+        server = multiprocessing.get_context('fork').Process(
+            target=lambda: RoomStoreServer(socket_path).serve_forever(), daemon=True)
+        server.start()
+        while not os.path.exists(socket_path):
+            time.sleep(0.01)
+        backends = [
+            ('memory', MemoryRoomStore()),
+            ('sqlite', SqliteRoomStore(os.path.join(tmpdir, 'rooms.db'))),
+            ('socket', SocketRoomStore(socket_path)),
+        ]
+
+        print(f"{'backend':<8} {'workers':>8} {'ops/s':>9} {'read p50 (us)':>14} {'read p99 (us)':>14} {'consistent':>11}")
+        for name, store in backends:
+            ops_per_second, p50, p99, consistent = run(store, args.processes, args, threads=name == 'memory')
+            print(f"{name:<8} {args.processes:>8} {ops_per_second:>9.0f} {p50:>14.1f} {p99:>14.1f} {str(consistent):>11}")
+
+        server.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
+from flask_login import LoginManager
+from flask_mail import Mail
+from flask_cors import CORS
+from apscheduler.schedulers.background import BackgroundScheduler
+
+# Shared extensions, bound to the application in create_app()
+db = SQLAlchemy()
+migrate = Migrate()
+login_manager = LoginManager()
+mail = Mail()
+cors = CORS()
+scheduler = BackgroundScheduler()
+
+
+def add_app_job(app, func, trigger, **trigger_args):
+    """
+    Register `func` on the shared scheduler so it runs inside `app`'s context.
+    Job ids default to the function's module and name, so re-registering replaces the job.
+    """
+    def run_in_app_context():
+        with app.app_context():
+            func()
+
+    job_id = trigger_args.pop('id', f"{func.__module__}.{func.__name__}")
+    return scheduler.add_job(run_in_app_context, trigger, id=job_id, replace_existing=True, **trigger_args)
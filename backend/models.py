@@ -1,13 +1,21 @@
-from app import db
+from extensions import db, login_manager
 from flask_login import UserMixin
 from datetime import datetime
+from sqlalchemy import DDL, event, exists, func
+
+# Single model registry shared by the core routes and every api/ feature blueprint
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    preferences = db.Column(db.String(500), nullable=True)  
-    reward_points = db.Column(db.Integer, default=0)
+    password = db.Column(db.String(256), nullable=True)  # Password hash; subscribers may not have one
+    preferences = db.Column(db.String(500), nullable=True)
+    reward_points = db.Column(db.Integer, default=0, index=True)  # Materialized from RewardLedgerEntry; offer tiers are selected by range
     visits = db.Column(db.Integer, default=0)
+    total_time_spent = db.Column(db.Integer, default=0)  # in seconds
+    confirmed = db.Column(db.Boolean, default=False)  # Email confirmation
+    last_login = db.Column(db.DateTime, nullable=True)
+    registration_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Added timestamp for user creation
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Added timestamp for updates
 
@@ -16,6 +24,135 @@ class Room(db.Model):
     room_number = db.Column(db.Integer, unique=True, nullable=False)
     room_type = db.Column(db.String(50), nullable=False)
     price = db.Column(db.Float, nullable=False)
-    available = db.Column(db.Boolean, default=True)
     description = db.Column(db.String(500), nullable=True)  # Added room description
+    rating = db.Column(db.Float, nullable=True)
+    amenities = db.Column(db.String(500), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Added timestamp for room creation
+
+class Booking(db.Model):
+    __table_args__ = (
+        db.Index('ix_bookings_room_dates', 'room_id', 'check_in', 'check_out'),  # Serves overlap lookups per room
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Walk-in bookings only carry guest_name
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+    guest_name = db.Column(db.String(100), nullable=True)
+    booked_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('bookings', lazy=True))
+    room = db.relationship('Room', backref=db.backref('bookings', lazy=True))
+
+# Postgres rejects overlapping stays for a room outright, backing up the check in services/booking.py
+event.listen(Booking.__table__, 'after_create', DDL('CREATE EXTENSION IF NOT EXISTS btree_gist').execute_if(dialect='postgresql'))
+event.listen(Booking.__table__, 'after_create', DDL(
+    'ALTER TABLE %(table)s ADD CONSTRAINT booking_no_overlap '
+    'EXCLUDE USING gist (room_id WITH =, tsrange(check_in, check_out) WITH &&)'
+).execute_if(dialect='postgresql'))
+
+class Reservation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    check_in = db.Column(db.DateTime, nullable=False)
+    check_out = db.Column(db.DateTime, nullable=False)
+    guest_name = db.Column(db.String(100), nullable=False)
+    room = db.relationship('Room', backref=db.backref('reservations', lazy=True))
+
+class RoomNight(db.Model):
+    # Sparse per-night inventory: a row per occupied night, written with the stay that holds it
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), primary_key=True)
+    night = db.Column(db.Date, primary_key=True, index=True)  # The primary key rejects a second stay on the same night
+    status = db.Column(db.String(20), nullable=False, default='booked')  # booked, reserved
+    booking_id = db.Column(db.Integer, db.ForeignKey('booking.id'), nullable=True, index=True)
+    reservation_id = db.Column(db.Integer, db.ForeignKey('reservation.id'), nullable=True, index=True)
+
+# Free tonight, derived from the inventory rather than stored; services/inventory.py answers date ranges
+Room.available = db.column_property(
+    ~exists().where(RoomNight.room_id == Room.id, RoomNight.night == func.current_date())
+)
+
+class Subscriber(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(120), unique=True, nullable=False)
+
+class Event(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    date = db.Column(db.DateTime, nullable=False)
+    location = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(50), nullable=False)
+
+class Campaign(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    content = db.Column(db.String(1000), nullable=False)
+    audience_segment = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Review(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('room.id'), nullable=False)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.String(1000), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user = db.relationship('User', backref=db.backref('reviews', lazy=True))
+    room = db.relationship('Room', backref=db.backref('reviews', lazy=True))
+
+class Interaction(db.Model):
+    __table_args__ = (
+        # Partial index: only open interactions, which end_interaction looks up per user
+        db.Index('ix_interaction_open', 'user_id', 'start_time',
+                 postgresql_where=db.text('end_time IS NULL'), sqlite_where=db.text('end_time IS NULL')),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=True)
+    user = db.relationship('User', backref=db.backref('interactions', lazy=True))
+
+class RewardLedgerEntry(db.Model):
+    # Append-only earn (+) and burn (-) events; folded into User.reward_points by the periodic rollup
+    __table_args__ = (
+        db.Index('ix_reward_ledger_entry_unrolled', 'user_id',
+                 postgresql_where=db.text('NOT rolled_up'), sqlite_where=db.text('rolled_up = 0')),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    points = db.Column(db.Integer, nullable=False)
+    reason = db.Column(db.String(50), nullable=False)  # booking, interaction, redemption
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    rolled_up = db.Column(db.Boolean, nullable=False, default=False)
+
+class UserEngagementDaily(db.Model):
+    # Per-user, per-day session rollup, updated as each interaction ends
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True, index=True)  # Day the session started
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    total_seconds = db.Column(db.Integer, nullable=False, default=0)
+    last_seen = db.Column(db.DateTime, nullable=False)
+
+class OutboxMessage(db.Model):
+    __table_args__ = (
+        db.Index('ix_outbox_message_due', 'status', 'next_attempt_at'),  # Serves the sender's claim query
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recipients = db.Column(db.String(1000), nullable=False)  # Comma-separated addresses
+    subject = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent or failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_until = db.Column(db.DateTime, nullable=True)  # Lease held by the sender working on it
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+# User loader for Flask-Login
+@login_manager.user_loader
+def load_user(user_id):
+    return User.query.get(int(user_id))
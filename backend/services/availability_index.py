@@ -0,0 +1,207 @@
+import bisect
+import logging
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.exc import SQLAlchemyError
+from extensions import add_app_job
+
+_PENDING_KEY = 'availability_index_pending'
+DEFAULT_REBUILD_SECONDS = 300
+
+
+def stay_key(stay):
+    """Index key of a Booking or Reservation: ('booking', id) or ('reservation', id)."""
+    return (type(stay).__name__.lower(), stay.id)
+
+
+class AvailabilityIndex:
+    """
+    In-process index of the stays holding each room: bookings and front desk
+    reservations, the same stays whose nights fill the RoomNight inventory.
+
+    Each room keeps its stays as parallel arrays sorted by check-in, plus a
+    running maximum of check-out times. A stay [check_in, check_out) overlaps
+    another when that one starts before check_out and ends after check_in,
+    so one bisect per room answers the question without touching the database.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+        self._ids = {}
+        self._max_ends = {}
+        self._stays = {}
+        self._lock = threading.RLock()
+        self._installed = False
+        self._pending_key = f'{_PENDING_KEY}.{id(self)}'  # Each installed index collects its own changes
+        self._replay = None  # Commits applied while a rebuild reads the database
+        self.loaded = False
+
+    def _reindex(self, room_id, pos):
+        ends = self._ends[room_id]
+        max_ends = self._max_ends[room_id]
+        del max_ends[pos:]
+        running = max_ends[-1] if max_ends else None
+        for end in ends[pos:]:
+            running = end if running is None or end > running else running
+            max_ends.append(running)
+
+    def add(self, key, room_id, check_in, check_out):
+        with self._lock:
+            if key in self._stays:
+                self.remove(key)
+            starts = self._starts.setdefault(room_id, [])
+            pos = bisect.bisect_right(starts, check_in)
+            starts.insert(pos, check_in)
+            self._ends.setdefault(room_id, []).insert(pos, check_out)
+            self._ids.setdefault(room_id, []).insert(pos, key)
+            self._max_ends.setdefault(room_id, [])
+            self._stays[key] = (room_id, check_in)
+            self._reindex(room_id, pos)
+
+    def remove(self, key):
+        with self._lock:
+            entry = self._stays.pop(key, None)
+            if entry is None:
+                return False
+            room_id, check_in = entry
+            starts, ids = self._starts[room_id], self._ids[room_id]
+            pos = bisect.bisect_left(starts, check_in)
+            while ids[pos] != key:
+                pos += 1
+            del starts[pos], self._ends[room_id][pos], ids[pos]
+            if starts:
+                self._reindex(room_id, pos)
+            else:
+                del self._starts[room_id], self._ends[room_id], self._ids[room_id], self._max_ends[room_id]
+            return True
+
+    def is_available(self, room_id, check_in, check_out):
+        with self._lock:
+            starts = self._starts.get(room_id)
+            if not starts:
+                return True
+            # Stays [0, pos) start before check_out; any of them ending after check_in conflicts
+            pos = bisect.bisect_left(starts, check_out)
+            return pos == 0 or self._max_ends[room_id][pos - 1] <= check_in
+
+    def rebuild(self, rows):
+        """Replace the index contents with (key, room_id, check_in, check_out) rows."""
+        grouped = {}
+        stays = {}
+        for key, room_id, check_in, check_out in rows:
+            grouped.setdefault(room_id, []).append((check_in, check_out, key))
+            stays[key] = (room_id, check_in)
+
+        starts, ends, ids, max_ends = {}, {}, {}, {}
+        for room_id, intervals in grouped.items():
+            intervals.sort(key=lambda interval: interval[0])
+            starts[room_id] = [start for start, _, _ in intervals]
+            ends[room_id] = [end for _, end, _ in intervals]
+            ids[room_id] = [key for _, _, key in intervals]
+            running, max_ends[room_id] = None, []
+            for end in ends[room_id]:
+                running = end if running is None or end > running else running
+                max_ends[room_id].append(running)
+
+        with self._lock:
+            self._starts, self._ends, self._ids, self._max_ends = starts, ends, ids, max_ends
+            self._stays = stays
+            self.loaded = True
+            # Changes committed while the rows were read may be missing from them; adding and removing are idempotent
+            replay, self._replay = self._replay or [], None
+            self._apply(replay)
+        logging.info(f"Availability index rebuilt with {len(stays)} stays.")
+
+    def rebuild_from_db(self):
+        from extensions import db
+        from models import Booking, Reservation
+
+        with self._lock:
+            self._replay = []
+        try:
+            rows = [(('booking', booking_id), room_id, check_in, check_out) for booking_id, room_id, check_in, check_out
+                    in db.session.query(Booking.id, Booking.room_id, Booking.check_in, Booking.check_out)]
+            rows += [(('reservation', reservation_id), room_id, check_in, check_out)
+                     for reservation_id, room_id, check_in, check_out
+                     in db.session.query(Reservation.id, Reservation.room_id, Reservation.check_in, Reservation.check_out)]
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        self.rebuild(rows)
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.rebuild_from_db()
+
+    def init_app(self, app):
+        """
+        Build the index from `app`'s database, keep it in sync with this
+        worker's commits, and rebuild it every AVAILABILITY_INDEX_REBUILD_SECONDS
+        to pick up stays committed by other workers. A stale answer costs a
+        409 when booking: the RoomNight primary key still rejects the stay.
+        """
+        from extensions import db
+
+        self.install(db.session)
+        with app.app_context():
+            try:
+                self.rebuild_from_db()
+            except SQLAlchemyError as e:
+                # Tables may not exist yet; the index loads lazily on first query instead
+                logging.warning(f"Availability index not built at startup: {e}")
+        add_app_job(app, self.rebuild_from_db, 'interval', id='availability_index.rebuild',
+                    seconds=app.config.get('AVAILABILITY_INDEX_REBUILD_SECONDS', DEFAULT_REBUILD_SECONDS))
+
+    def install(self, session):
+        """
+        Keep the index in sync with committed Booking and Reservation changes on `session`.
+
+        Changes are collected at flush time and only applied once the
+        transaction commits, so rolled-back stays never reach the index.
+        """
+        if self._installed:
+            return
+        event.listen(session, 'after_flush', self._collect_changes)
+        event.listen(session, 'after_commit', self._apply_changes)
+        event.listen(session, 'after_rollback', self._discard_changes)
+        self._installed = True
+
+    def _collect_changes(self, session, flush_context):
+        from models import Booking, Reservation
+
+        pending = session.info.setdefault(self._pending_key, [])
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, (Booking, Reservation)):
+                pending.append(('add', stay_key(obj), obj.room_id, obj.check_in, obj.check_out))
+        for obj in session.deleted:
+            if isinstance(obj, (Booking, Reservation)):
+                pending.append(('remove', stay_key(obj)))
+
+    def _apply_changes(self, session):
+        pending = session.info.pop(self._pending_key, None)
+        if not pending:
+            return
+        with self._lock:
+            if self._replay is not None:
+                self._replay.extend(pending)
+            if self.loaded:
+                self._apply(pending)
+
+    def _apply(self, changes):
+        for action, key, *interval in changes:
+            if action == 'add':
+                self.add(key, *interval)
+            else:
+                self.remove(key)
+
+    def _discard_changes(self, session):
+        session.info.pop(self._pending_key, None)
+
+
+# Shared index used by the availability endpoints
+availability_index = AvailabilityIndex()
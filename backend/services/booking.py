@@ -0,0 +1,75 @@
+from datetime import datetime
+from sqlalchemy.exc import IntegrityError
+from extensions import db
+from models import Booking, Reservation
+from services.inventory import holder_tonight, occupy, tonight, vacate
+
+
+class BookingConflict(Exception):
+    """The room is taken for some of those nights, or another request is booking them right now."""
+
+
+def _hold(stay, status, holder):
+    db.session.add(stay)
+    try:
+        db.session.flush()
+        occupy(stay.room_id, stay.check_in, stay.check_out, status, **{holder: stay.id})
+    except IntegrityError as e:
+        raise BookingConflict(f"Room {stay.room_id} is already booked for those dates") from e
+    return stay
+
+
+def reserve_room(room_id, check_in, check_out, **booking_fields):
+    """
+    Book `room_id` for [check_in, check_out) in the caller's transaction,
+    raising BookingConflict instead of double-booking.
+
+    Safe across workers: the booking takes its nights in the RoomNight
+    inventory, whose (room_id, night) primary key lets only one stay hold a
+    night. A competing insert waits for the first transaction and then
+    fails, on Postgres and SQLite alike; the bookings exclusion constraint
+    backs it up on Postgres. The caller commits, or rolls back on conflict.
+    """
+    return _hold(Booking(room_id=room_id, check_in=check_in, check_out=check_out, **booking_fields),
+                 'booked', 'booking_id')
+
+
+def hold_reservation(room_id, check_in, check_out, **reservation_fields):
+    """Like reserve_room, for the Reservation records kept by the data-driven decision feature."""
+    return _hold(Reservation(room_id=room_id, check_in=check_in, check_out=check_out, **reservation_fields),
+                 'reserved', 'reservation_id')
+
+
+def cancel_booking(booking):
+    """Delete `booking` and free its nights. The caller commits."""
+    vacate(booking_id=booking.id)
+    db.session.delete(booking)
+
+
+def cancel_reservation(reservation):
+    """Delete `reservation` and free its nights. The caller commits."""
+    vacate(reservation_id=reservation.id)
+    db.session.delete(reservation)
+
+
+def check_out_room(room_id):
+    """
+    Release the stay occupying `room_id` tonight: its nights from tonight on
+    are freed and it now checks out today, or it is cancelled outright if it
+    had not started yet. Returns False if the room is free tonight. The
+    caller commits.
+    """
+    night = holder_tonight(room_id)
+    if night is None:
+        return False
+    if night.booking_id is not None:
+        stay, cancel = db.session.get(Booking, night.booking_id), cancel_booking
+    else:
+        stay, cancel = db.session.get(Reservation, night.reservation_id), cancel_reservation
+    today = tonight()
+    if stay.check_in.date() >= today:
+        cancel(stay)
+    else:
+        vacate(booking_id=night.booking_id, reservation_id=night.reservation_id, from_night=today)
+        stay.check_out = datetime.combine(today, datetime.min.time())
+    return True
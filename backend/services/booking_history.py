@@ -0,0 +1,42 @@
+from collections import namedtuple
+from models import Booking, Room
+
+# Keeps IN (...) lists for multi-user lookups well below driver parameter limits
+HISTORY_CHUNK_SIZE = 1000
+
+BookedRoom = namedtuple('BookedRoom', ['booking_id', 'room_id', 'room_type', 'price'])
+
+
+class BookingHistoryLoader:
+    """
+    Loads past bookings joined with their rooms in a single query.
+
+    Replaces fetching bookings and then calling `Room.query.get` once per
+    booking.
+    """
+
+    def _query(self):
+        return Booking.query.with_entities(Booking.user_id, Booking.id, Room.id, Room.room_type, Room.price) \
+            .join(Room, Booking.room_id == Room.id).order_by(Booking.id)
+
+    def for_user(self, user_id):
+        """Return the user's bookings as BookedRoom rows, oldest first."""
+        rows = self._query().filter(Booking.user_id == user_id).all()
+        return [BookedRoom(*row[1:]) for row in rows]
+
+    def for_users(self, user_ids):
+        """Return {user_id: [BookedRoom, ...]} for many users, one query per chunk of ids."""
+        user_ids = list(dict.fromkeys(user_ids))
+        histories = {user_id: [] for user_id in user_ids}
+        for start in range(0, len(user_ids), HISTORY_CHUNK_SIZE):
+            chunk = user_ids[start:start + HISTORY_CHUNK_SIZE]
+            for row in self._query().filter(Booking.user_id.in_(chunk)).all():
+                histories[row[0]].append(BookedRoom(*row[1:]))
+        return histories
+
+    def room_types(self, user_id):
+        return [booked.room_type for booked in self.for_user(user_id)]
+
+
+# Shared loader used by the recommendation routes
+booking_history = BookingHistoryLoader()
@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from extensions import db
+from models import UserEngagementDaily
+
+DEFAULT_HISTORY_DAYS = 30
+MAX_HISTORY_DAYS = 365
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE; others fall back to update-then-insert
+UPSERT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def record_session(user_id, start_time, end_time):
+    """
+    Fold one finished interaction into the user's daily rollup in the caller's
+    transaction. The counters are incremented in SQL, so concurrent sessions
+    of the same user don't overwrite each other.
+    """
+    upsert_rollups(db.session.connection(), [rollup_row(user_id, start_time, end_time)])
+
+
+def session_start_time(value):
+    """
+    The naive local start time kept in the session cookie: an ISO string, or
+    for sessions started before that a datetime, which Flask's session
+    serializer hands back in UTC with the local wall-clock time.
+    """
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    return datetime.fromisoformat(value)
+
+
+def rollup_row(user_id, start_time, end_time):
+    return {'user_id': user_id, 'day': start_time.date(), 'sessions': 1,
+            'total_seconds': max(0, int((end_time - start_time).total_seconds())), 'last_seen': end_time}
+
+
+def upsert_rollups(connection, rows):
+    """Add each row's sessions and seconds to its (user_id, day) rollup; one executemany where supported."""
+    table = UserEngagementDaily.__table__
+    insert = UPSERT_INSERTS.get(connection.dialect.name)
+    if insert:
+        statement = insert(table)
+        excluded = statement.excluded
+        connection.execute(statement.on_conflict_do_update(index_elements=['user_id', 'day'], set_={
+            'sessions': table.c.sessions + excluded.sessions,
+            'total_seconds': table.c.total_seconds + excluded.total_seconds,
+            'last_seen': case((excluded.last_seen > table.c.last_seen, excluded.last_seen), else_=table.c.last_seen),
+        }), rows)
+        return
+
+    for row in rows:
+        updated = connection.execute(table.update().where(
+            table.c.user_id == row['user_id'], table.c.day == row['day'],
+        ).values(
+            sessions=table.c.sessions + row['sessions'],
+            total_seconds=table.c.total_seconds + row['total_seconds'],
+            last_seen=case((table.c.last_seen < row['last_seen'], row['last_seen']), else_=table.c.last_seen),
+        ))
+        if not updated.rowcount:
+            connection.execute(table.insert().values(**row))
+
+
+def user_engagement(user_id, today, days=DEFAULT_HISTORY_DAYS):
+    """The user's daily rollups for the last `days` days up to `today`, plus their totals."""
+    since = today - timedelta(days=days - 1)
+    rows = UserEngagementDaily.query.with_entities(
+        UserEngagementDaily.day, UserEngagementDaily.sessions, UserEngagementDaily.total_seconds,
+        UserEngagementDaily.last_seen,
+    ).filter(UserEngagementDaily.user_id == user_id, UserEngagementDaily.day >= since) \
+        .order_by(UserEngagementDaily.day).all()
+    return {
+        'days': [{'date': row.day.isoformat(), 'sessions': row.sessions, 'total_seconds': row.total_seconds,
+                  'last_seen': row.last_seen.strftime('%Y-%m-%d %H:%M:%S')} for row in rows],
+        'sessions': sum(row.sessions for row in rows),
+        'total_seconds': sum(row.total_seconds for row in rows),
+        'last_seen': max(row.last_seen for row in rows).strftime('%Y-%m-%d %H:%M:%S') if rows else None,
+    }
+
+
+def daily_summary(day):
+    """Active users, sessions and seconds across everyone for one day, from the rollup's day index."""
+    active_users, sessions, total_seconds = db.session.query(
+        func.count(UserEngagementDaily.user_id),
+        func.coalesce(func.sum(UserEngagementDaily.sessions), 0),
+        func.coalesce(func.sum(UserEngagementDaily.total_seconds), 0),
+    ).filter(UserEngagementDaily.day == day).one()
+    return {'date': day.isoformat(), 'active_users': active_users, 'sessions': sessions,
+            'total_seconds': total_seconds}
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from sqlalchemy import exists
+from extensions import db
+from models import Booking, Reservation, Room, RoomNight
+
+# RoomNight rows per insert round trip when rebuilding the inventory
+REBUILD_CHUNK_SIZE = 1000
+
+
+def tonight():
+    """Today's date as the database sees it (CURRENT_DATE on a UTC server), which `Room.available` uses."""
+    return datetime.utcnow().date()
+
+
+def stay_nights(check_in, check_out):
+    """The nights a stay occupies: every date from check-in up to, but not including, check-out."""
+    first, last = check_in.date(), check_out.date()
+    return [first + timedelta(days=n) for n in range((last - first).days)]
+
+
+def occupied_between(check_in, check_out):
+    """Correlated EXISTS for rooms with any night in [check_in, check_out) taken; one range scan of the primary key."""
+    return exists().where(
+        RoomNight.room_id == Room.id,
+        RoomNight.night >= check_in.date(),
+        RoomNight.night < check_out.date(),
+    )
+
+
+def free_between(check_in, check_out):
+    """Filter for rooms with every night in [check_in, check_out) free."""
+    return ~occupied_between(check_in, check_out)
+
+
+def occupy(room_id, check_in, check_out, status='booked', booking_id=None, reservation_id=None):
+    """
+    Take the stay's nights in the caller's transaction.
+
+    Nights are inserted in date order, so two overlapping stays collide on
+    the first night they share without deadlocking; the loser gets an
+    IntegrityError from the primary key.
+    """
+    rows = [
+        {'room_id': room_id, 'night': night, 'status': status,
+         'booking_id': booking_id, 'reservation_id': reservation_id}
+        for night in stay_nights(check_in, check_out)
+    ]
+    if rows:
+        db.session.execute(RoomNight.__table__.insert(), rows)
+
+
+def vacate(booking_id=None, reservation_id=None, from_night=None):
+    """Free the nights held by a booking or reservation, optionally only those from `from_night` on."""
+    nights = RoomNight.__table__
+    if booking_id is not None:
+        statement = nights.delete().where(nights.c.booking_id == booking_id)
+    else:
+        statement = nights.delete().where(nights.c.reservation_id == reservation_id)
+    if from_night is not None:
+        statement = statement.where(nights.c.night >= from_night)
+    return db.session.execute(statement).rowcount
+
+
+def holder_tonight(room_id):
+    """The RoomNight occupying `room_id` tonight, or None if the room is free."""
+    return db.session.get(RoomNight, (room_id, tonight()))
+
+
+def rebuild():
+    """
+    Repopulate the inventory from every booking and reservation, for
+    databases that predate the RoomNight table. Returns the number of nights
+    written. The caller commits.
+    """
+    db.session.execute(RoomNight.__table__.delete())
+    stays = [(booking, 'booked', {'booking_id': booking.id, 'reservation_id': None})
+             for booking in Booking.query.order_by(Booking.id)]
+    stays += [(reservation, 'reserved', {'booking_id': None, 'reservation_id': reservation.id})
+              for reservation in Reservation.query.order_by(Reservation.id)]
+    written, rows, seen = 0, [], set()
+    for stay, status, holder in stays:
+        for night in stay_nights(stay.check_in, stay.check_out):
+            if (stay.room_id, night) in seen:
+                continue  # Legacy overlaps keep the earliest stay
+            seen.add((stay.room_id, night))
+            rows.append(dict(holder, room_id=stay.room_id, night=night, status=status))
+            if len(rows) == REBUILD_CHUNK_SIZE:
+                db.session.execute(RoomNight.__table__.insert(), rows)
+                written, rows = written + len(rows), []
+    if rows:
+        db.session.execute(RoomNight.__table__.insert(), rows)
+        written += len(rows)
+    return written
@@ -0,0 +1,236 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from extensions import mail
+
+# Recipients read per round trip when a job streams its audience from the database
+RECIPIENT_CHUNK_SIZE = 1000
+
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 100  # Messages sent over one SMTP connection
+DEFAULT_RATE_PER_SECOND = 0  # 0 means unlimited
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_RETRY_BACKOFF = 1.0  # Seconds, doubled on each retry of the same message
+DEFAULT_BREAKER_THRESHOLD = 3
+DEFAULT_BREAKER_COOLDOWN = 60
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across every thread sharing it."""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0
+        self._next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            self._next_slot = max(now, self._next_slot) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Stops SMTP connection attempts after `threshold` consecutive failures.
+    While open, allow() lets one attempt through every `cooldown` seconds;
+    the first success closes it again. Shared by every thread of a dispatcher.
+    """
+
+    def __init__(self, threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=DEFAULT_BREAKER_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._clock = clock
+        self._failures = 0
+        self._retry_at = 0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._failures < self.threshold:
+                return True
+            now = self._clock()
+            if now < self._retry_at:
+                return False
+            self._retry_at = now + self.cooldown  # One trial connection per cooldown
+            return True
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+
+    def failure(self):
+        """Count a failed connection; returns whether the breaker is now open."""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.threshold:
+                self._retry_at = self._clock() + self.cooldown
+                return True
+            return False
+
+
+class DispatchRun:
+    """Counters for one dispatch() call."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = time.time()
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.duration_seconds = None
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def record(self, sent=0, failed=0, retries=0):
+        with self._lock:
+            self.sent += sent
+            self.failed += failed
+            self.retries += retries
+
+    def finish(self):
+        self.duration_seconds = time.perf_counter() - self._started
+
+    @property
+    def messages_per_second(self):
+        if not self.duration_seconds:
+            return None
+        return self.sent / self.duration_seconds
+
+    def as_dict(self):
+        return {
+            'name': self.name,
+            'started_at': self.started_at,
+            'duration_seconds': round(self.duration_seconds, 3) if self.duration_seconds is not None else None,
+            'sent': self.sent,
+            'failed': self.failed,
+            'retries': self.retries,
+            'messages_per_second': round(self.messages_per_second, 1) if self.messages_per_second else None,
+        }
+
+
+def is_permanent_failure(error):
+    # 5xx replies (bad mailbox, policy rejection) won't succeed on retry
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+class MailDispatcher:
+    """
+    Sends a stream of Flask-Mail messages in batches from a bounded thread pool.
+
+    Each batch reuses one SMTP connection (`mail.connect()`). Sends across all
+    workers are paced by a shared rate limit. Transient failures (disconnects,
+    4xx replies) reconnect and retry the message with exponential backoff;
+    permanent 5xx rejections are counted as failed and skipped. When the
+    server cannot be reached, a circuit breaker kept across runs makes the
+    remaining batches fail fast instead of each waiting out the connection
+    timeout and its retries. Settings are read from the app config
+    (MAIL_DISPATCH_*) at dispatch time.
+    """
+
+    def __init__(self, history=20):
+        self.runs = deque(maxlen=history)
+        self.breaker = CircuitBreaker()
+
+    def dispatch(self, name, messages):
+        """Send every message from the `messages` iterable and return the DispatchRun."""
+        app = current_app._get_current_object()
+        config = app.config
+        workers = config.get('MAIL_DISPATCH_WORKERS', DEFAULT_WORKERS)
+        batch_size = config.get('MAIL_DISPATCH_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        limiter = RateLimiter(config.get('MAIL_DISPATCH_RATE_PER_SECOND', DEFAULT_RATE_PER_SECOND))
+        max_retries = config.get('MAIL_DISPATCH_MAX_RETRIES', DEFAULT_MAX_RETRIES)
+        backoff = config.get('MAIL_DISPATCH_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+        self.breaker.threshold = config.get('MAIL_DISPATCH_BREAKER_THRESHOLD', DEFAULT_BREAKER_THRESHOLD)
+        self.breaker.cooldown = config.get('MAIL_DISPATCH_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN)
+
+        run = DispatchRun(name)
+        # Bounds the batches held in memory while the producer streams recipients
+        in_flight = threading.BoundedSemaphore(workers * 2)
+
+        def send_batch(batch):
+            try:
+                with app.app_context():
+                    self._send_batch(batch, run, limiter, max_retries, backoff)
+            except Exception as e:
+                logging.error(f"Mail dispatch '{name}' lost a batch of {len(batch)}: {e}")
+                run.record(failed=len(batch))
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='mail-dispatch') as pool:
+            batch = []
+            for message in messages:
+                batch.append(message)
+                if len(batch) == batch_size:
+                    in_flight.acquire()
+                    pool.submit(send_batch, batch)
+                    batch = []
+            if batch:
+                in_flight.acquire()
+                pool.submit(send_batch, batch)
+
+        run.finish()
+        self.runs.append(run)
+        logging.info(f"Mail dispatch '{name}': {run.sent} sent, {run.failed} failed, {run.retries} retries "
+                     f"in {run.duration_seconds:.2f}s ({run.messages_per_second or 0:.1f} msg/s).")
+        return run
+
+    def _send_batch(self, batch, run, limiter, max_retries, backoff):
+        pending = deque(batch)
+        attempts = 0
+        while pending:
+            if not self.breaker.allow():
+                logging.warning(f"SMTP server unreachable; not sending a batch of {len(pending)} emails")
+                run.record(failed=len(pending))
+                return
+            connected = False
+            try:
+                with mail.connect() as connection:
+                    connected = True
+                    self.breaker.success()
+                    while pending:
+                        limiter.acquire()
+                        try:
+                            connection.send(pending[0])
+                        except smtplib.SMTPException as e:
+                            if not is_permanent_failure(e):
+                                raise
+                            logging.warning(f"Rejected email to {pending[0].recipients}: {e}")
+                            run.record(failed=1)
+                        else:
+                            run.record(sent=1)
+                        pending.popleft()
+                        attempts = 0
+            except (smtplib.SMTPException, OSError) as e:
+                tripped = not connected and self.breaker.failure()
+                if not pending:  # Everything went out; only closing the connection failed
+                    break
+                attempts += 1
+                if attempts > max_retries:
+                    logging.error(f"Giving up on email to {pending[0].recipients} after {max_retries} retries: {e}")
+                    run.record(failed=1)
+                    pending.popleft()
+                    attempts = 0
+                    continue
+                if tripped:  # No point backing off; allow() decides when to try again
+                    continue
+                run.record(retries=1)
+                time.sleep(backoff * 2 ** (attempts - 1))
+
+    def recent_runs(self):
+        return [run.as_dict() for run in self.runs]
+
+
+# Shared dispatcher; keeps the last runs for /metrics/mail
+mail_dispatcher = MailDispatcher()
@@ -0,0 +1,175 @@
+import logging
+import smtplib
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import func, or_
+from extensions import db, mail
+from models import OutboxMessage
+from services.mail_dispatch import is_permanent_failure
+
+DEFAULT_BATCH_SIZE = 50  # Messages claimed per drain and sent over one SMTP connection
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_RETRY_BACKOFF = 30  # Seconds, doubled after each failed attempt
+DEFAULT_LEASE_SECONDS = 300  # A claimed message is retried by anyone once its lease runs out
+
+
+def enqueue_email(subject, recipients, body):
+    """
+    Add a message to the outbox in the caller's transaction; it is only sent
+    once that transaction commits, and is not lost if the SMTP server is down.
+    """
+    message = OutboxMessage(subject=subject, recipients=','.join(recipients), body=body)
+    db.session.add(message)
+    return message
+
+
+class OutboxSender:
+    """
+    Drains the outbox table: claims due messages under a lease, sends them
+    over one SMTP connection and records the outcome.
+
+    Delivery is at-least-once: a message is marked sent only after the SMTP
+    server accepted it, so a crash in between resends it once the lease
+    expires. Failed sends are retried with exponential backoff until
+    MAIL_OUTBOX_MAX_ATTEMPTS; permanent 5xx rejections fail immediately.
+    """
+
+    def __init__(self, latency_window=1000):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=latency_window)  # Enqueue-to-sent seconds
+        self._send_seconds = deque(maxlen=latency_window)  # SMTP time per message
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+
+    def _claim(self, batch_size, lease_seconds):
+        now = datetime.utcnow()
+        rows = OutboxMessage.query.with_entities(
+            OutboxMessage.id, OutboxMessage.subject, OutboxMessage.recipients, OutboxMessage.body,
+            OutboxMessage.attempts, OutboxMessage.created_at,
+        ).filter(
+            OutboxMessage.status == 'pending',
+            OutboxMessage.next_attempt_at <= now,
+            or_(OutboxMessage.locked_until.is_(None), OutboxMessage.locked_until < now),
+        ).order_by(OutboxMessage.id).limit(batch_size).with_for_update(skip_locked=True).all()
+        if rows:
+            OutboxMessage.query.filter(OutboxMessage.id.in_([row.id for row in rows])) \
+                .update({'locked_until': now + timedelta(seconds=lease_seconds)}, synchronize_session=False)
+        db.session.commit()
+        return rows
+
+    def _update(self, message_id, **values):
+        OutboxMessage.query.filter_by(id=message_id).update(values, synchronize_session=False)
+        db.session.commit()
+
+    def drain(self):
+        """
+        Send one batch of due messages. Returns how many were sent or given up
+        on, or 0 when the SMTP connection failed so callers stop draining.
+        """
+        config = current_app.config
+        batch_size = config.get('MAIL_OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+        max_attempts = config.get('MAIL_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        backoff = config.get('MAIL_OUTBOX_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+
+        claimed = self._claim(batch_size, config.get('MAIL_OUTBOX_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+        if not claimed:
+            return 0
+
+        pending = deque(claimed)
+        try:
+            with mail.connect() as connection:
+                while pending:
+                    row = pending[0]
+                    started = time.perf_counter()
+                    try:
+                        connection.send(Message(row.subject, recipients=row.recipients.split(','), body=row.body))
+                    except smtplib.SMTPException as e:
+                        if not is_permanent_failure(e):
+                            raise
+                        self._record_failure(row, e, max_attempts, backoff, permanent=True)
+                    else:
+                        self._record_sent(row, time.perf_counter() - started)
+                    pending.popleft()
+        except (smtplib.SMTPException, OSError) as e:
+            # The connection is gone: the current message counts as an attempt, the rest are released untouched
+            if pending:
+                self._record_failure(pending.popleft(), e, max_attempts, backoff)
+            if pending:
+                OutboxMessage.query.filter(OutboxMessage.id.in_([row.id for row in pending])) \
+                    .update({'locked_until': None}, synchronize_session=False)
+                db.session.commit()
+            logging.warning(f"Mail outbox drain stopped early: {e}")
+            return 0
+        return len(claimed)
+
+    def _record_sent(self, row, send_seconds):
+        sent_at = datetime.utcnow()
+        self._update(row.id, status='sent', sent_at=sent_at, attempts=row.attempts + 1, locked_until=None,
+                     last_error=None)
+        with self._lock:
+            self.sent += 1
+            self._send_seconds.append(send_seconds)
+            self._latencies.append((sent_at - row.created_at).total_seconds())
+
+    def _record_failure(self, row, error, max_attempts, backoff, permanent=False):
+        attempts = row.attempts + 1
+        values = {'attempts': attempts, 'locked_until': None, 'last_error': str(error)[:500]}
+        if permanent or attempts >= max_attempts:
+            values['status'] = 'failed'
+            logging.error(f"Giving up on outbox message {row.id} after {attempts} attempts: {error}")
+            with self._lock:
+                self.failed += 1
+        else:
+            values['next_attempt_at'] = datetime.utcnow() + timedelta(seconds=backoff * 2 ** (attempts - 1))
+            with self._lock:
+                self.retried += 1
+        self._update(row.id, **values)
+
+    def drain_all(self, max_batches=100):
+        """Drain batches until the due queue is empty (bounded so one run can't hog the scheduler)."""
+        total = 0
+        for _ in range(max_batches):
+            processed = self.drain()
+            total += processed
+            if not processed:
+                break
+        return total
+
+    def stats(self):
+        counts = dict(db.session.query(OutboxMessage.status, func.count(OutboxMessage.id))
+                      .group_by(OutboxMessage.status).all())
+        oldest_pending = db.session.query(func.min(OutboxMessage.created_at)) \
+            .filter(OutboxMessage.status == 'pending').scalar()
+
+        with self._lock:
+            latencies = sorted(self._latencies)
+            send_seconds = sorted(self._send_seconds)
+            totals = {'sent': self.sent, 'failed': self.failed, 'retried': self.retried}
+
+        def percentile(values, p):
+            if not values:
+                return None
+            return round(values[min(len(values) - 1, int(p * len(values)))] * 1000, 3)
+
+        return {
+            'queue_depth': counts.get('pending', 0),
+            'status_counts': counts,
+            'oldest_pending_age_seconds':
+                round((datetime.utcnow() - oldest_pending).total_seconds(), 3) if oldest_pending else None,
+            'since_start': totals,
+            'delivery_latency_ms': {'p50': percentile(latencies, 0.50), 'p99': percentile(latencies, 0.99)},
+            'smtp_send_ms': {'p50': percentile(send_seconds, 0.50), 'p99': percentile(send_seconds, 0.99)},
+        }
+
+
+# Shared sender; drained by the scheduler job the mail-sending features register
+outbox_sender = OutboxSender()
+
+
+def drain_outbox():
+    outbox_sender.drain_all()
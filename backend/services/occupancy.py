@@ -0,0 +1,75 @@
+import threading
+from collections import deque
+from datetime import datetime
+from extensions import add_app_job
+
+DEFAULT_SNAPSHOT_SECONDS = 60
+DEFAULT_HISTORY_SIZE = 1440  # A day of snapshots at the default one-minute interval
+
+_OCCUPIED = 'true'  # Canonical JSON of a reserved room in the boolean room maps
+
+
+def occupancy_labels(room_types):
+    """Labels counted per room: every room, its floor (room number // 100) and its room type."""
+    return {room_id: ('all', f'floor:{room_id // 100}', f'type:{room_type}')
+            for room_id, room_type in room_types.items()}
+
+
+def _rate(by_value):
+    total = sum(by_value.values())
+    occupied = by_value.get(_OCCUPIED, 0)
+    return {'occupied': occupied, 'total': total, 'occupancy_rate': occupied / total if total else 0.0}
+
+
+class OccupancyTracker:
+    """
+    Occupancy of a boolean RoomMap (True = reserved), read from the counters
+    the room store keeps per label as rooms are reserved and released, so
+    the current rate costs the same however many rooms there are. Snapshots
+    of the breakdown go into a bounded in-memory series for charting.
+    """
+
+    def __init__(self, rooms, history_size=DEFAULT_HISTORY_SIZE):
+        self.rooms = rooms
+        self._history = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Bind the room map to `app` and snapshot it every OCCUPANCY_SNAPSHOT_SECONDS."""
+        self.rooms.init_app(app)
+        with self._lock:
+            self._history = deque(self._history, maxlen=app.config.get('OCCUPANCY_HISTORY_SIZE', DEFAULT_HISTORY_SIZE))
+        add_app_job(app, self.snapshot, 'interval', id=f"{self.rooms.namespace}.occupancy_snapshot",
+                    seconds=app.config.get('OCCUPANCY_SNAPSHOT_SECONDS', DEFAULT_SNAPSHOT_SECONDS))
+
+    def rate(self, label='all'):
+        return _rate(self.rooms.counts().get(label, {}))['occupancy_rate']
+
+    def rates(self):
+        """Occupancy rate of every label, from a single read of the counters."""
+        return {label: _rate(by_value)['occupancy_rate'] for label, by_value in self.rooms.counts().items()}
+
+    def breakdown(self):
+        """Overall occupancy plus occupancy per floor and per room type."""
+        floors, room_types, overall = {}, {}, _rate({})
+        for label, by_value in self.rooms.counts().items():
+            kind, _, name = label.partition(':')
+            if kind == 'all':
+                overall = _rate(by_value)
+            elif kind == 'floor':
+                floors[name] = _rate(by_value)
+            elif kind == 'type':
+                room_types[name] = _rate(by_value)
+        return dict(overall, floors=floors, room_types=room_types)
+
+    def snapshot(self, now=None):
+        """Append the current breakdown, stamped with `now`, to the history; returns it."""
+        entry = dict(self.breakdown(), at=(now or datetime.utcnow()).isoformat(timespec='seconds'))
+        with self._lock:
+            self._history.append(entry)
+        return entry
+
+    def history(self, since=None):
+        """Snapshots oldest first, optionally only those taken at or after the ISO timestamp `since`."""
+        with self._lock:
+            return [entry for entry in self._history if since is None or entry['at'] >= since]
@@ -0,0 +1,238 @@
+import threading
+from collections import namedtuple
+from datetime import date, datetime
+from extensions import add_app_job
+from services.room_store import RoomMap
+
+DEFAULT_EVALUATE_SECONDS = 300
+DEFAULT_HISTORY_SIZE = 500  # Expired promotions kept for GET /promotions
+# Keys of the counters namespace
+PROMOTION_IDS = 0
+EXPIRED_COUNT = 1
+
+# Run a promotion while occupancy of `room_type` (None = every room) is below `threshold`,
+# between the `starts` and `ends` dates inclusive (None = open-ended)
+PromotionRule = namedtuple('PromotionRule', ['rule_id', 'description', 'discount', 'threshold',
+                                             'room_type', 'starts', 'ends'], defaults=(None, None, None))
+
+
+def rule_label(rule):
+    """Occupancy counter label a rule watches."""
+    return 'all' if rule.room_type is None else f'type:{rule.room_type}'
+
+
+def in_window(rule, today):
+    return (rule.starts is None or rule.starts <= today) and (rule.ends is None or today <= rule.ends)
+
+
+def rule_from_json(data):
+    """Build a PromotionRule from a request body; raises ValueError when it is incomplete or malformed."""
+    if not isinstance(data, dict):
+        raise ValueError("Rule must be a JSON object")
+    missing = [field for field in ('rule_id', 'description', 'discount', 'threshold') if data.get(field) is None]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    try:
+        threshold = float(data['threshold'])
+        starts, ends = (date.fromisoformat(data[field]) if data.get(field) else None for field in ('starts', 'ends'))
+    except (TypeError, ValueError):
+        raise ValueError("threshold must be a number and starts/ends YYYY-MM-DD dates")
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be an occupancy rate in (0, 1]")
+    if starts and ends and ends < starts:
+        raise ValueError("ends must not be before starts")
+    return PromotionRule(str(data['rule_id']), data['description'], data['discount'], threshold,
+                         data.get('room_type'), starts, ends)
+
+
+def rule_to_json(rule):
+    return dict(rule._asdict(), starts=rule.starts and rule.starts.isoformat(),
+                ends=rule.ends and rule.ends.isoformat())
+
+
+def rule_key(rule_id):
+    """Store key of a rule; prefixed so SQLite's INTEGER column never coerces ids such as '01' into numbers."""
+    return f'rule:{rule_id}'
+
+
+def _put(room_map, key, value):
+    """Set `key` to `value` whatever it holds, retrying lost races; returns the previous value (None if new)."""
+    while True:
+        current = room_map.get(key)
+        if current is None:
+            room_map.add({key: value})
+            if room_map.get(key) == value:
+                return None
+        elif current == value or room_map.compare_and_set(key, current, value):
+            return current
+
+
+def _increment(room_map, key):
+    while True:
+        current = room_map.get(key)
+        if room_map.compare_and_set(key, current, current + 1):
+            return current + 1
+
+
+class PromotionEngine:
+    """
+    Launches and expires promotions from threshold rules as the rooms of an
+    OccupancyTracker are reserved and released.
+
+    The engine subscribes to the tracker's RoomMap; a flip re-evaluates only
+    the rules watching a label the room carries, each against the occupancy
+    counters, so an event costs the same however many rooms there are.
+    A periodic sweep picks up date windows opening and closing, and flips
+    won by other workers on a shared room store.
+
+    Rules, running promotions, expired ones and the id counters live in
+    namespaces of the same room store as the rooms, so every worker agrees
+    on what has fired. Each rule has one running-promotion key, False when
+    idle: launching and expiring are compare_and_set on it, so when several
+    workers see the same flip exactly one launches (or expires) the
+    promotion and returns it. Expired promotions go to a ring of
+    PROMOTION_HISTORY_SIZE slots. Rules stored at runtime outlive restarts:
+    the `rules` passed in only seed ids the store does not have yet.
+    """
+
+    def __init__(self, occupancy, rules=(), history_size=DEFAULT_HISTORY_SIZE):
+        self.occupancy = occupancy
+        self.history_size = history_size
+        namespace = occupancy.rooms.namespace
+        self._stored_rules = RoomMap(f'{namespace}.promotion_rules',
+                                     {rule_key(rule.rule_id): rule_to_json(rule) for rule in rules})
+        self._running = RoomMap(f'{namespace}.promotions', {rule_key(rule.rule_id): False for rule in rules})
+        self._history = RoomMap(f'{namespace}.promotion_history', {})
+        self._counters = RoomMap(f'{namespace}.promotion_counters', {PROMOTION_IDS: 0, EXPIRED_COUNT: 0})
+        self._rules = {}  # This worker's copy of the stored rules, refreshed on every evaluation
+        self._rules_by_label = {}  # label -> {rule_id: rule}
+        # Evaluation reads the counters under the lock, so concurrent events apply in the order they read
+        self._lock = threading.RLock()
+        self._refresh_rules()
+        occupancy.rooms.subscribe(self.on_room_change)
+
+    def init_app(self, app):
+        """Evaluate every rule against `app`'s room store, then again every PROMOTION_EVALUATE_SECONDS."""
+        for room_map in (self._stored_rules, self._running, self._history, self._counters):
+            room_map.init_app(app)
+        self.history_size = app.config.get('PROMOTION_HISTORY_SIZE', DEFAULT_HISTORY_SIZE)
+        self.evaluate()
+        add_app_job(app, self.evaluate, 'interval', id=f"{self.occupancy.rooms.namespace}.promotion_rules",
+                    seconds=app.config.get('PROMOTION_EVALUATE_SECONDS', DEFAULT_EVALUATE_SECONDS))
+
+    def _refresh_rules(self):
+        rules = [rule_from_json(data) for data in self._stored_rules.all().values() if data]
+        with self._lock:
+            self._rules = {rule.rule_id: rule for rule in rules}
+            self._rules_by_label = {}
+            for rule in rules:
+                self._rules_by_label.setdefault(rule_label(rule), {})[rule.rule_id] = rule
+
+    def rules(self):
+        self._refresh_rules()
+        with self._lock:
+            return list(self._rules.values())
+
+    def rule(self, rule_id):
+        data = self._stored_rules.get(rule_key(rule_id))
+        return rule_from_json(data) if data else None
+
+    def add_rule(self, rule):
+        """Add or replace a rule; it is evaluated on the next event or sweep, or by calling evaluate()."""
+        self._running.add({rule_key(rule.rule_id): False})
+        _put(self._stored_rules, rule_key(rule.rule_id), rule_to_json(rule))
+        self._refresh_rules()
+        return rule
+
+    def remove_rule(self, rule_id, now=None):
+        """Drop a rule, expiring its promotion if one is running; returns the rule or None."""
+        if self._stored_rules.get(rule_key(rule_id)) is None:
+            return None
+        previous = _put(self._stored_rules, rule_key(rule_id), False)
+        self._refresh_rules()
+        if not previous:
+            return None
+        promotion = self._running.get(rule_key(rule_id))
+        if promotion:
+            self._expire(promotion, now or datetime.utcnow())
+        return rule_from_json(previous)
+
+    def active(self, rule_id):
+        """The promotion running for `rule_id`, or None."""
+        promotion = self._running.get(rule_key(rule_id))
+        return dict(promotion) if promotion else None
+
+    def promotions(self, active_only=False):
+        """Promotions in launch order: those still running, preceded by recently expired ones unless active_only."""
+        running = sorted((promotion for promotion in self._running.all().values() if promotion),
+                         key=lambda promotion: promotion['id'])
+        expired = [] if active_only else \
+            [promotion for _, promotion in sorted(self._history.all().values(), key=lambda entry: entry[0])][-self.history_size:]
+        return [dict(promotion) for promotion in expired + running]
+
+    def on_room_change(self, room_id, old, new):
+        """RoomMap listener: re-evaluate the rules watching any label of the flipped room."""
+        labels = (self.occupancy.rooms.labels or {}).get(room_id, ('all',))
+        with self._lock:
+            rule_ids = [rule_id for label in labels for rule_id in self._rules_by_label.get(label, ())]
+            if rule_ids:
+                self.evaluate(rule_ids)
+
+    def evaluate(self, rule_ids=None, now=None):
+        """
+        Launch or expire the promotions of `rule_ids` (every rule when None)
+        from one read of the occupancy counters. A rule's promotion runs while
+        today is inside its window and its label's rate is below the
+        threshold; labels no room carries never launch. A full sweep also
+        expires promotions whose rule was removed. Returns the promotions this
+        worker launched or expired.
+        """
+        now = now or datetime.utcnow()
+        changed = []
+        with self._lock:
+            self._refresh_rules()
+            rules = list(self._rules.values()) if rule_ids is None else \
+                [self._rules[rule_id] for rule_id in rule_ids if rule_id in self._rules]
+            if not rules and rule_ids is not None:
+                return changed
+            running = {promotion['rule_id']: promotion for promotion in self._running.all().values() if promotion}
+            rates = self.occupancy.rates()
+            for rule in rules:
+                rate = rates.get(rule_label(rule))
+                live = rate is not None and rate < rule.threshold and in_window(rule, now.date())
+                promotion = running.get(rule.rule_id)
+                if live and not promotion:
+                    changed.append(self._launch(rule, rate, now))
+                elif promotion and not live:
+                    changed.append(self._expire(promotion, now))
+            if rule_ids is None:
+                # Launched by a worker that read the rule just before another one removed it
+                changed += [self._expire(promotion, now) for rule_id, promotion in running.items()
+                            if rule_id not in self._rules]
+        return [promotion for promotion in changed if promotion]
+
+    def _launch(self, rule, rate, now):
+        """Start `rule`'s promotion unless another worker did first; returns it, or None."""
+        key = rule_key(rule.rule_id)
+        if self._running.get(key) is None:
+            self._running.add({key: False})  # Rule added by another worker before running keys were seeded
+        promotion = {
+            "id": _increment(self._counters, PROMOTION_IDS),
+            "rule_id": rule.rule_id,
+            "description": rule.description,
+            "discount": rule.discount,
+            "room_type": rule.room_type,
+            "occupancy_rate": rate,
+            "launched_at": now.isoformat(timespec='seconds'),
+            "expired_at": None,
+        }
+        return dict(promotion) if self._running.compare_and_set(key, False, promotion) else None
+
+    def _expire(self, promotion, now):
+        """End `promotion` unless another worker did first; returns it expired, or None."""
+        if not self._running.compare_and_set(rule_key(promotion['rule_id']), promotion, False):
+            return None
+        expired = dict(promotion, expired_at=now.isoformat(timespec='seconds'))
+        sequence = _increment(self._counters, EXPIRED_COUNT)
+        _put(self._history, sequence % self.history_size, [sequence, expired])
+        return expired
@@ -1,38 +1,293 @@
 # Commit: Added logging and input validation to recommend_rooms function
 
-from sklearn.neighbors import NearestNeighbors
-from sklearn.feature_extraction.text import TfidfVectorizer
-from models import Room
+from collections import deque, namedtuple
+from sqlalchemy import event, inspect
+from models import Room, Booking
+import importlib
 import logging
+import threading
+import time
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+_PENDING_KEY = 'room_recommender_pending'
+
+# scikit-learn, scipy and numpy take seconds to import, so they are loaded on first
+# use rather than at module import; warm_up() loads them ahead of traffic instead.
+ML_MODULES = ('numpy', 'scipy.sparse', 'sklearn.neighbors', 'sklearn.feature_extraction.text')
+
+# Keeps IN (...) lists for batch booking lookups well below driver parameter limits
+BATCH_CHUNK_SIZE = 1000
+
+# Immutable snapshot of a fitted model; swapped atomically so queries never see a half-built model
+_FittedModel = namedtuple('_FittedModel', ['vectorizer', 'nn', 'vectors', 'room_ids', 'fitted_at'])
+
+
+def room_document(room_type, price):
+    return f"{room_type} {price}"
+
+
+class RoomRecommender:
+    """
+    Long-lived TF-IDF + nearest neighbour model over room descriptions.
+
+    The model is fitted once and reused; a query only runs `transform` and
+    `kneighbors`. Room inserts and updates are folded in incrementally when
+    their terms are already in the vocabulary, otherwise (or after
+    `max_incremental_updates` changes, to refresh IDF weights) the next query
+    triggers a full refit.
+    """
+
+    def __init__(self, n_neighbors=5, max_incremental_updates=100, latency_window=1000):
+        self.n_neighbors = n_neighbors
+        self.max_incremental_updates = max_incremental_updates
+        self._model = None
+        self._stale = True
+        self._incremental_updates = 0
+        self._lock = threading.Lock()
+        self._fit_lock = threading.Lock()
+        self._installed = False
+        self._pending_key = f'{_PENDING_KEY}.{id(self)}'  # Each installed recommender collects its own changes
+        self.fit_count = 0
+        self.last_fit_seconds = None
+        self.query_count = 0
+        self._latencies = deque(maxlen=latency_window)
+
+    def fit(self, rows=None):
+        """Fit on (room_id, room_type, price) rows, loading them from the database if omitted."""
+        if rows is None:
+            rows = Room.query.with_entities(Room.id, Room.room_type, Room.price).order_by(Room.id).all()
+
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.neighbors import NearestNeighbors
+
+        started = time.perf_counter()
+        room_ids = [room_id for room_id, _, _ in rows]
+        model = None
+        if room_ids:
+            vectorizer = TfidfVectorizer()
+            vectors = vectorizer.fit_transform([room_document(room_type, price) for _, room_type, price in rows])
+            nn = NearestNeighbors(metric='cosine').fit(vectors)
+            model = _FittedModel(vectorizer, nn, vectors, room_ids, time.time())
+
+        with self._lock:
+            self._model = model
+            self._stale = False
+            self._incremental_updates = 0
+            self.fit_count += 1
+            self.last_fit_seconds = time.perf_counter() - started
+        logging.info(f"Fitted recommender on {len(room_ids)} rooms in {self.last_fit_seconds:.3f}s.")
+        return model
+
+    def invalidate(self):
+        with self._lock:
+            self._stale = True
+
+    def update_room(self, room_id, room_type, price):
+        """Fold a new or changed room into the fitted model without a full refit when possible."""
+        from scipy.sparse import vstack
+        from sklearn.neighbors import NearestNeighbors
+
+        with self._lock:
+            model = self._model
+            if self._stale or model is None or self._incremental_updates >= self.max_incremental_updates:
+                self._stale = True
+                return False
+
+            document = room_document(room_type, price)
+            analyzer = model.vectorizer.build_analyzer()
+            if any(term not in model.vectorizer.vocabulary_ for term in analyzer(document)):
+                self._stale = True
+                return False
+
+            row = model.vectorizer.transform([document])
+            vectors, room_ids = model.vectors, list(model.room_ids)
+            if room_id in room_ids:
+                position = room_ids.index(room_id)
+                vectors = vstack([vectors[:position], row, vectors[position + 1:]]).tocsr()
+            else:
+                vectors = vstack([vectors, row]).tocsr()
+                room_ids.append(room_id)
+            nn = NearestNeighbors(metric='cosine').fit(vectors)
+            self._model = model._replace(nn=nn, vectors=vectors, room_ids=room_ids)
+            self._incremental_updates += 1
+            return True
+
+    def remove_room(self, room_id):
+        from scipy.sparse import vstack
+        from sklearn.neighbors import NearestNeighbors
+
+        with self._lock:
+            model = self._model
+            if self._stale or model is None or room_id not in model.room_ids:
+                return
+            position = model.room_ids.index(room_id)
+            room_ids = model.room_ids[:position] + model.room_ids[position + 1:]
+            if not room_ids:
+                self._model = None
+                return
+            vectors = vstack([model.vectors[:position], model.vectors[position + 1:]]).tocsr()
+            nn = NearestNeighbors(metric='cosine').fit(vectors)
+            self._model = model._replace(nn=nn, vectors=vectors, room_ids=room_ids)
+
+    def _current_model(self):
+        if not self._stale:
+            return self._model
+        # Only one request pays for a refit; concurrent callers wait and reuse it
+        with self._fit_lock:
+            return self.fit() if self._stale else self._model
+
+    def recommend(self, user_preferences):
+        """Return the ids of the rooms closest to `user_preferences`, best match first."""
+        model = self._current_model()
+        if model is None:
+            return []
+
+        started = time.perf_counter()
+        user_vector = model.vectorizer.transform([user_preferences])
+        n_neighbors = min(self.n_neighbors, len(model.room_ids))
+        indices = model.nn.kneighbors(user_vector, n_neighbors=n_neighbors, return_distance=False)
+        room_ids = [model.room_ids[i] for i in indices.flatten()]
+        self._latencies.append(time.perf_counter() - started)
+        self.query_count += 1
+        return room_ids
+
+    def stats(self):
+        model = self._model
+        latencies = sorted(self._latencies)
+
+        def percentile(p):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            'rooms': len(model.room_ids) if model else 0,
+            'stale': self._stale,
+            'fit_count': self.fit_count,
+            'fit_seconds': self.last_fit_seconds,
+            'model_age_seconds': round(time.time() - model.fitted_at, 3) if model else None,
+            'incremental_updates': self._incremental_updates,
+            'query_count': self.query_count,
+            'query_latency_ms': {'p50': percentile(0.50), 'p99': percentile(0.99)},
+        }
+
+    def install(self, session):
+        """Apply committed Room inserts, updates and deletes on `session` to the model."""
+        if self._installed:
+            return
+        event.listen(session, 'after_flush', self._collect_changes)
+        event.listen(session, 'after_commit', self._apply_changes)
+        event.listen(session, 'after_rollback', self._discard_changes)
+        self._installed = True
+
+    def _collect_changes(self, session, flush_context):
+        pending = session.info.setdefault(self._pending_key, [])
+        for obj in list(session.new) + list(session.dirty):
+            # Rating and amenity edits also dirty the room; only description changes matter here
+            if isinstance(obj, Room) and (obj in session.new or _description_changed(obj)):
+                pending.append(('update', obj.id, obj.room_type, obj.price))
+        for obj in session.deleted:
+            if isinstance(obj, Room):
+                pending.append(('remove', obj.id))
+
+    def _apply_changes(self, session):
+        for action, room_id, *fields in session.info.pop(self._pending_key, []):
+            if action == 'update':
+                self.update_room(room_id, *fields)
+            else:
+                self.remove_room(room_id)
+
+    def _discard_changes(self, session):
+        session.info.pop(self._pending_key, None)
+
+
+def _description_changed(room):
+    attrs = inspect(room).attrs
+    return attrs.room_type.history.has_changes() or attrs.price.history.has_changes()
+
+
+# Shared recommender kept in memory for the lifetime of the worker
+room_recommender = RoomRecommender()
+
+
 def recommend_rooms(user_preferences):
     if not user_preferences or not isinstance(user_preferences, str):
         logging.error("Invalid user preferences provided.")
         return []
 
     try:
-        rooms = Room.query.all()
-        if not rooms:
+        room_ids = room_recommender.recommend(user_preferences)
+        if not room_ids:
             logging.warning("No rooms found in the database.")
             return []
 
-        descriptions = [f"{room.room_type} {room.price}" for room in rooms]
-        vectorizer = TfidfVectorizer()
-        vectors = vectorizer.fit_transform(descriptions)
-        
-        nn = NearestNeighbors(n_neighbors=5, metric='cosine')
-        nn.fit(vectors)
-        
-        user_vector = vectorizer.transform([user_preferences])
-        distances, indices = nn.kneighbors(user_vector)
-        
-        recommendations = [rooms[i] for i in indices.flatten()]
+        rooms_by_id = {room.id: room for room in Room.query.filter(Room.id.in_(room_ids)).all()}
+        recommendations = [rooms_by_id[room_id] for room_id in room_ids if room_id in rooms_by_id]
         logging.info(f"Generated {len(recommendations)} recommendations.")
         return recommendations
 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
         return []
+
+
+def recommend_rooms_for_users(user_ids, n_neighbors=3):
+    """
+    Price-similarity recommendations for many users at once.
+
+    Mirrors the per-user `recommend_rooms(user_id)` routes: available rooms
+    closest in price to each room a user has booked. Rooms and bookings are
+    loaded once for the whole batch and a single `kneighbors` call covers
+    every booking. Yields (user_id, rooms) in input order, where rooms are
+    (id, room_number, room_type, price, available) rows sorted by id.
+    """
+    from sklearn.neighbors import NearestNeighbors
+    import numpy as np
+
+    user_ids = list(dict.fromkeys(user_ids))
+    rooms = Room.query.with_entities(Room.id, Room.room_number, Room.room_type, Room.price, Room.available) \
+        .filter(Room.available).order_by(Room.id).all()
+    if not rooms:
+        for user_id in user_ids:
+            yield user_id, []
+        return
+
+    positions = {user_id: position for position, user_id in enumerate(user_ids)}
+    owners, booked_prices = [], []
+    for start in range(0, len(user_ids), BATCH_CHUNK_SIZE):
+        chunk = user_ids[start:start + BATCH_CHUNK_SIZE]
+        rows = Booking.query.with_entities(Booking.user_id, Room.price) \
+            .join(Room, Booking.room_id == Room.id).filter(Booking.user_id.in_(chunk)).all()
+        for user_id, price in rows:
+            owners.append(positions[user_id])
+            booked_prices.append(price)
+
+    n_neighbors = min(n_neighbors, len(rooms))
+    if booked_prices:
+        knn = NearestNeighbors(n_neighbors=n_neighbors)
+        knn.fit(np.array([room.price for room in rooms], dtype=float).reshape(-1, 1))
+        indices = knn.kneighbors(np.array(booked_prices, dtype=float).reshape(-1, 1), return_distance=False)
+        # Unique (user position, room index) pairs, sorted so each user's rooms are contiguous
+        pairs = np.unique(np.column_stack([np.repeat(owners, n_neighbors), indices.ravel()]), axis=0)
+    else:
+        pairs = np.empty((0, 2), dtype=int)
+    bounds = np.searchsorted(pairs[:, 0], np.arange(len(user_ids) + 1))
+
+    logging.info(f"Generated batch recommendations for {len(user_ids)} users from {len(booked_prices)} bookings.")
+    for position, user_id in enumerate(user_ids):
+        yield user_id, [rooms[i] for i in pairs[bounds[position]:bounds[position + 1], 1]]
+
+
+def warm_up(fit=True):
+    """
+    Import the ML libraries and optionally fit the shared recommender ahead of
+    the first request. Must run inside an application context when `fit` is set.
+    """
+    started = time.perf_counter()
+    for module_name in ML_MODULES:
+        importlib.import_module(module_name)
+    if fit:
+        room_recommender.fit()
+    logging.info(f"Recommender warm-up finished in {time.perf_counter() - started:.3f}s.")
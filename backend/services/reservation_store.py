@@ -0,0 +1,128 @@
+import bisect
+import itertools
+import threading
+from datetime import date, timedelta
+
+RESERVATION_FIELDS = ('room_id', 'guest_name', 'check_in', 'check_out')
+
+
+def _day(value):
+    return date.fromisoformat(value)
+
+
+def _iso_day(value):
+    """`value` as a 'YYYY-MM-DD' string; raises ValueError (or TypeError) for anything that is not an ISO date."""
+    return _day(value).isoformat()
+
+
+class ReservationStore:
+    """
+    In-process reservation records for the front desk endpoints.
+
+    Reservations are held by id, with secondary indexes by room and by
+    check-in date. Each index bucket is a dict used as a set, so adding or
+    removing a reservation is O(1) however many there are. Distinct
+    check-in dates are also kept in a sorted list: a stay overlaps
+    [start, end) only if it checks in before `end` and after `start` minus
+    the longest stay seen, so a range query bisects to that window instead
+    of scanning every reservation. Ids come from a counter and are never
+    reused. Dates are stored as 'YYYY-MM-DD' strings, normalized before any
+    state changes, so a bad date leaves the store untouched and stored dates
+    compare correctly as strings.
+    """
+
+    def __init__(self):
+        self._by_id = {}
+        self._by_room = {}
+        self._by_check_in = {}
+        self._check_in_days = []
+        self._longest_stay = timedelta(0)
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def _index(self, reservation):
+        reservation_id, check_in = reservation['id'], _day(reservation['check_in'])
+        self._by_room.setdefault(reservation['room_id'], {})[reservation_id] = None
+        bucket = self._by_check_in.get(check_in)
+        if bucket is None:
+            bucket = self._by_check_in[check_in] = {}
+            bisect.insort(self._check_in_days, check_in)
+        bucket[reservation_id] = None
+        self._longest_stay = max(self._longest_stay, _day(reservation['check_out']) - check_in)
+
+    def _unindex(self, reservation):
+        reservation_id, check_in = reservation['id'], _day(reservation['check_in'])
+        room = self._by_room[reservation['room_id']]
+        del room[reservation_id]
+        if not room:
+            del self._by_room[reservation['room_id']]
+        bucket = self._by_check_in[check_in]
+        del bucket[reservation_id]
+        if not bucket:
+            del self._by_check_in[check_in]
+            del self._check_in_days[bisect.bisect_left(self._check_in_days, check_in)]
+
+    def add(self, room_id, guest_name, check_in, check_out):
+        check_in, check_out = _iso_day(check_in), _iso_day(check_out)
+        with self._lock:
+            reservation = {'id': next(self._ids), 'room_id': room_id, 'guest_name': guest_name,
+                           'check_in': check_in, 'check_out': check_out}
+            self._by_id[reservation['id']] = reservation
+            self._index(reservation)
+            return dict(reservation)
+
+    def get(self, reservation_id):
+        with self._lock:
+            reservation = self._by_id.get(reservation_id)
+            return dict(reservation) if reservation else None
+
+    def update(self, reservation_id, **fields):
+        """Change any of RESERVATION_FIELDS, reindexing as needed. Returns the updated reservation or None."""
+        changes = {field: fields[field] for field in RESERVATION_FIELDS if field in fields}
+        for field in ('check_in', 'check_out'):
+            if field in changes:
+                changes[field] = _iso_day(changes[field])
+        with self._lock:
+            reservation = self._by_id.get(reservation_id)
+            if reservation is None:
+                return None
+            self._unindex(reservation)
+            reservation.update(changes)
+            self._index(reservation)
+            return dict(reservation)
+
+    def remove(self, reservation_id):
+        """Delete a reservation. Returns it, or None if there was none."""
+        with self._lock:
+            reservation = self._by_id.pop(reservation_id, None)
+            if reservation is not None:
+                self._unindex(reservation)
+            return reservation
+
+    def all(self):
+        with self._lock:
+            return [dict(reservation) for reservation in self._by_id.values()]
+
+    def for_room(self, room_id):
+        """Reservations for `room_id`, in id order."""
+        with self._lock:
+            return [dict(self._by_id[reservation_id]) for reservation_id in sorted(self._by_room.get(room_id, ()))]
+
+    def overlapping(self, start, end):
+        """Reservations staying any night in [start, end), in id order."""
+        start, end = _iso_day(start), _iso_day(end)
+        with self._lock:
+            days = self._check_in_days
+            first = bisect.bisect_left(days, _day(start) - self._longest_stay)
+            last = bisect.bisect_left(days, _day(end))
+            # ISO dates order as strings, so candidates are filtered without parsing them
+            matches = sorted(
+                reservation_id
+                for day in days[first:last]
+                for reservation_id in self._by_check_in[day]
+                if self._by_id[reservation_id]['check_out'] > start
+            )
+            return [dict(self._by_id[reservation_id]) for reservation_id in matches]
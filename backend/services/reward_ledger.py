@@ -0,0 +1,104 @@
+import logging
+from datetime import datetime
+from sqlalchemy import bindparam, func, select
+from extensions import db, add_app_job
+from models import RewardLedgerEntry, User
+
+BOOKING_REWARD_POINTS = 100
+ROLLUP_BATCH_SIZE = 1000  # Ledger entries folded into balances per transaction
+
+
+def award_points(user_id, points, reason):
+    """
+    Record an earn event in the caller's transaction.
+
+    Only appends to the ledger, so concurrent awards never contend on the
+    user's row; `rollup_balances` later folds them into User.reward_points.
+    """
+    if points:
+        award_points_bulk(db.session.connection(), [(user_id, points)], reason)
+
+
+def award_points_bulk(connection, awards, reason):
+    """Append one entry per (user_id, points) pair with a single executemany."""
+    created_at = datetime.utcnow()
+    connection.execute(RewardLedgerEntry.__table__.insert(), [
+        {'user_id': user_id, 'points': points, 'reason': reason, 'created_at': created_at, 'rolled_up': False}
+        for user_id, points in awards
+    ])
+
+
+def redeem_points(user_id, points, reason='redemption'):
+    """
+    Record a burn event in the caller's transaction, raising ValueError if
+    the balance can't cover it. Burns lock the user's row so two of them
+    can't both spend the same points; earns don't need to.
+    """
+    users = User.__table__
+    db.session.execute(select(users.c.id).where(users.c.id == user_id).with_for_update())
+    available = balance(user_id)
+    if points <= 0 or points > available:
+        raise ValueError(f"Cannot redeem {points} points from a balance of {available}")
+    award_points_bulk(db.session.connection(), [(user_id, -points)], reason)
+    return available - points
+
+
+def pending_points(user_id):
+    """Sum of the user's entries the rollup hasn't reached yet, from the unrolled partial index."""
+    return db.session.query(func.coalesce(func.sum(RewardLedgerEntry.points), 0)) \
+        .filter(RewardLedgerEntry.user_id == user_id, ~RewardLedgerEntry.rolled_up).scalar()
+
+
+def balance(user_id):
+    """Exact balance: the materialized User.reward_points plus entries not yet rolled up."""
+    materialized = db.session.query(User.reward_points).filter(User.id == user_id).scalar() or 0
+    return materialized + pending_points(user_id)
+
+
+def rollup_batch(batch_size=ROLLUP_BATCH_SIZE):
+    """
+    Fold one batch of unrolled entries into User.reward_points and mark
+    them rolled up, in one transaction. Returns the number of entries.
+    """
+    ledger, users = RewardLedgerEntry.__table__, User.__table__
+    rows = db.session.execute(
+        select(ledger.c.id, ledger.c.user_id, ledger.c.points).where(~ledger.c.rolled_up)
+        .order_by(ledger.c.id).limit(batch_size).with_for_update(skip_locked=True)
+    ).all()
+    if not rows:
+        db.session.rollback()
+        return 0
+
+    totals = {}
+    for _, user_id, points in rows:
+        totals[user_id] = totals.get(user_id, 0) + points
+    ids = [row.id for row in rows]
+    marked = db.session.execute(ledger.update().where(ledger.c.id.in_(ids), ~ledger.c.rolled_up)
+                                .values(rolled_up=True))
+    if marked.rowcount != len(ids):
+        # Another rollup got to some of these first (only possible without row locks, e.g. on SQLite)
+        db.session.rollback()
+        logging.warning("Reward rollup batch overlapped another run; retrying on the next one")
+        return 0
+
+    db.session.execute(users.update().where(users.c.id == bindparam('user_id_')).values(
+        reward_points=func.coalesce(users.c.reward_points, 0) + bindparam('points'),
+    ), [{'user_id_': user_id, 'points': points} for user_id, points in sorted(totals.items())])
+    db.session.commit()
+    return len(rows)
+
+
+def rollup_balances(max_batches=100):
+    """Roll up batches until no unrolled entries are left (bounded so one run can't hog the scheduler)."""
+    total = 0
+    for _ in range(max_batches):
+        rolled = rollup_batch()
+        total += rolled
+        if not rolled:
+            break
+    return total
+
+
+def schedule_rollup(app):
+    # Every feature that awards points registers this; the shared job id makes it run once
+    add_app_job(app, rollup_balances, 'interval', seconds=app.config.get('REWARD_ROLLUP_SECONDS', 60))
@@ -0,0 +1,152 @@
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import Response, jsonify, request, stream_with_context
+from models import Room
+from services.inventory import free_between
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Rows fetched per round trip when streaming an export
+EXPORT_CHUNK_SIZE = 1000
+
+# Keyset columns a listing can be ordered by; both are unique, so "after the last value" is exact
+SORT_COLUMNS = ('id', 'room_number')
+
+ROOM_SUMMARY_FIELDS = ('room_number', 'room_type', 'price', 'available')
+ROOM_DETAIL_FIELDS = ('id',) + ROOM_SUMMARY_FIELDS + ('description', 'rating', 'amenities')
+
+
+def _parse_bool(value, name):
+    if value.lower() in ('true', '1'):
+        return True
+    if value.lower() in ('false', '0'):
+        return False
+    raise ValueError(f"{name} must be true or false")
+
+
+def _parse_number(value, name, cast=float):
+    try:
+        return cast(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number")
+
+
+def _parse_date(value, name):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format")
+
+
+def parse_room_filters(args):
+    """
+    Read room_type, min_price, max_price and available from query args. Raises ValueError.
+    With check_in and check_out, `available` means free for every night of that stay rather than tonight.
+    """
+    filters = {}
+    if args.get('room_type'):
+        filters['room_type'] = args['room_type']
+    for name in ('min_price', 'max_price'):
+        if args.get(name):
+            filters[name] = _parse_number(args[name], name)
+    if args.get('available'):
+        filters['available'] = _parse_bool(args['available'], 'available')
+    if args.get('check_in') or args.get('check_out'):
+        if not (args.get('check_in') and args.get('check_out')):
+            raise ValueError("check_in and check_out must be given together")
+        stay = _parse_date(args['check_in'], 'check_in'), _parse_date(args['check_out'], 'check_out')
+        if stay[0] >= stay[1]:
+            raise ValueError("check_out must be after check_in")
+        filters['stay'] = stay
+    return filters
+
+
+def parse_page_args(args):
+    """Read sort, cursor and limit from query args. Raises ValueError."""
+    sort = args.get('sort', 'id')
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_COLUMNS)}")
+    cursor = _parse_number(args['cursor'], 'cursor', int) if args.get('cursor') else None
+    limit = _parse_number(args.get('limit', DEFAULT_PAGE_SIZE), 'limit', int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return sort, cursor, limit
+
+
+def rooms_query(fields, filters, sort='id'):
+    """Filtered rooms ordered by `sort`, loading only `fields` (plus the sort key)."""
+    sort_column = getattr(Room, sort)
+    columns = [getattr(Room, field) for field in fields]
+    query = Room.query.with_entities(sort_column.label('sort_key'), *columns)
+
+    if 'room_type' in filters:
+        query = query.filter(Room.room_type == filters['room_type'])
+    if 'min_price' in filters:
+        query = query.filter(Room.price >= filters['min_price'])
+    if 'max_price' in filters:
+        query = query.filter(Room.price <= filters['max_price'])
+    if 'available' in filters:
+        # Range lookups on the RoomNight primary key; bookings are never scanned
+        available = free_between(*filters['stay']) if 'stay' in filters else Room.available
+        query = query.filter(available if filters['available'] else ~available)
+    return query.order_by(sort_column)
+
+
+def room_page(fields, filters, sort='id', cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    One page of rooms after `cursor` (the last sort key of the previous page).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    query = rooms_query(fields, filters, sort)
+    if cursor is not None:
+        query = query.filter(getattr(Room, sort) > cursor)
+    rows = query.limit(limit + 1).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1].sort_key
+    return rows, None
+
+
+def _row_dict(row, fields):
+    return {field: getattr(row, field) for field in fields}
+
+
+def room_list_response(fields=ROOM_SUMMARY_FIELDS, not_found_if_empty=False):
+    """
+    Keyset-paginated JSON array of rooms for the current request.
+    The next page is advertised in the `Link` (rel="next") and `X-Next-Cursor` headers.
+    """
+    try:
+        filters = parse_room_filters(request.args)
+        sort, cursor, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    rows, next_cursor = room_page(fields, filters, sort, cursor, limit)
+    if not_found_if_empty and not rows and cursor is None:
+        return jsonify({"error": "No rooms found"}), 404
+
+    response = jsonify([_row_dict(row, fields) for row in rows])
+    if next_cursor is not None:
+        next_args = dict(request.args, cursor=next_cursor, limit=limit)
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(next_args)}>; rel="next"'
+        response.headers['X-Next-Cursor'] = str(next_cursor)
+    return response, 200
+
+
+def room_export_response(fields=ROOM_DETAIL_FIELDS):
+    """Every matching room as one JSON array, streamed in chunks instead of built in memory."""
+    try:
+        filters = parse_room_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def generate():
+        yield '['
+        for position, row in enumerate(rooms_query(fields, filters).yield_per(EXPORT_CHUNK_SIZE)):
+            yield (',' if position else '') + json.dumps(_row_dict(row, fields))
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json'), 200
@@ -0,0 +1,396 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+
+# Room maps (room_id -> JSON value, one namespace per feature) for room_map, view_room,
+# real_time and promtions. ROOM_STORE_BACKEND picks where they live:
+#   memory - a dict per worker process, lost on restart (the original behaviour)
+#   sqlite - a WAL-mode file at ROOM_STORE_SQLITE_PATH, shared by every worker on the host
+#   socket - one RoomStoreServer per host on ROOM_STORE_SOCKET, started with
+#            `python -m services.room_store serve --socket PATH`
+# Reservations go through compare_and_set, which is atomic on every backend and keeps a count
+# of rooms per value for each label a room was seeded with (floor, room type), so readers
+# such as services/occupancy.py never rescan the map.
+DEFAULT_SQLITE_PATH = 'room_store.db'
+DEFAULT_SOCKET = '/tmp/hotel-room-store.sock'
+
+
+def _canonical(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'))
+
+
+class MemoryRoomStore:
+    """Room maps held in this process."""
+
+    def __init__(self):
+        self._maps = {}
+        self._labels = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def seed(self, namespace, rooms, labels=None):
+        """
+        Add rooms not already in `namespace` with their initial values; existing values are kept.
+        `labels` maps room ids to the groups (e.g. floor, room type) whose rooms are counted per value.
+        """
+        with self._lock:
+            current = self._maps.setdefault(namespace, {})
+            room_labels = self._labels.setdefault(namespace, {})
+            counts = self._counts.setdefault(namespace, {})
+            for room_id, value in rooms.items():
+                if room_id in current:
+                    continue
+                current[room_id] = value
+                room_labels[room_id] = tuple((labels or {}).get(room_id, ()))
+                for label in room_labels[room_id]:
+                    by_value = counts.setdefault(label, {})
+                    by_value[_canonical(value)] = by_value.get(_canonical(value), 0) + 1
+
+    def all(self, namespace):
+        with self._lock:
+            return dict(self._maps.get(namespace, {}))
+
+    def get(self, namespace, room_id):
+        with self._lock:
+            return self._maps.get(namespace, {}).get(room_id)
+
+    def counts(self, namespace):
+        """Rooms per label and canonical JSON value, kept up to date by compare_and_set."""
+        with self._lock:
+            return {label: dict(by_value) for label, by_value in self._counts.get(namespace, {}).items()}
+
+    def compare_and_set(self, namespace, room_id, expected, value):
+        """Set the room to `value` only if it currently holds `expected`. Returns whether it did."""
+        with self._lock:
+            current = self._maps.get(namespace, {})
+            if room_id not in current or current[room_id] != expected:
+                return False
+            current[room_id] = value
+            counts = self._counts[namespace]
+            for label in self._labels[namespace][room_id]:
+                by_value = counts[label]
+                by_value[_canonical(expected)] -= 1
+                by_value[_canonical(value)] = by_value.get(_canonical(value), 0) + 1
+            return True
+
+
+class SqliteRoomStore:
+    """
+    Room maps in a SQLite file shared by every process that opens it.
+
+    Each thread keeps its own autocommit connection; WAL mode lets reads run
+    alongside the one writer. compare_and_set is a single conditional
+    UPDATE on the canonical JSON, wrapped in one transaction with the
+    per-label counts when the room has labels.
+    """
+
+    def __init__(self, path=DEFAULT_SQLITE_PATH, busy_timeout_ms=5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._labels = {}  # Fixed once a room is seeded, so safe to cache per process
+        connection = self._connect()
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS room_store ('
+            'namespace TEXT NOT NULL, room_id INTEGER NOT NULL, value TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, room_id)) WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS room_store_label ('
+            'namespace TEXT NOT NULL, room_id INTEGER NOT NULL, label TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, room_id, label)) WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS room_store_count ('
+            'namespace TEXT NOT NULL, label TEXT NOT NULL, value TEXT NOT NULL, rooms INTEGER NOT NULL, '
+            'PRIMARY KEY (namespace, label, value)) WITHOUT ROWID'
+        )
+
+    def _connect(self):
+        # Connections are not carried across a fork; a child opens its own
+        if getattr(self._local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                         isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return self._local.connection
+
+    @staticmethod
+    def _add_counts(connection, namespace, deltas):
+        connection.executemany(
+            'INSERT INTO room_store_count (namespace, label, value, rooms) VALUES (?, ?, ?, ?) '
+            'ON CONFLICT (namespace, label, value) DO UPDATE SET rooms = rooms + excluded.rooms',
+            [(namespace, label, value, delta) for label, value, delta in deltas],
+        )
+
+    def _room_labels(self, connection, namespace, room_id):
+        key = (namespace, room_id)
+        if key not in self._labels:
+            self._labels[key] = [label for label, in connection.execute(
+                'SELECT label FROM room_store_label WHERE namespace = ? AND room_id = ?', key)]
+        return self._labels[key]
+
+    def seed(self, namespace, rooms, labels=None):
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for room_id, value in rooms.items():
+                if not connection.execute(
+                    'INSERT OR IGNORE INTO room_store (namespace, room_id, value) VALUES (?, ?, ?)',
+                    (namespace, room_id, _canonical(value)),
+                ).rowcount:
+                    continue  # Seeded by another worker or an earlier run
+                room_labels = list((labels or {}).get(room_id, ()))
+                connection.executemany(
+                    'INSERT INTO room_store_label (namespace, room_id, label) VALUES (?, ?, ?)',
+                    [(namespace, room_id, label) for label in room_labels],
+                )
+                self._add_counts(connection, namespace, [(label, _canonical(value), 1) for label in room_labels])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+    def all(self, namespace):
+        rows = self._connect().execute(
+            'SELECT room_id, value FROM room_store WHERE namespace = ? ORDER BY room_id', (namespace,)
+        )
+        return {room_id: json.loads(value) for room_id, value in rows}
+
+    def get(self, namespace, room_id):
+        row = self._connect().execute(
+            'SELECT value FROM room_store WHERE namespace = ? AND room_id = ?', (namespace, room_id)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def counts(self, namespace):
+        counts = {}
+        for label, value, rooms in self._connect().execute(
+            'SELECT label, value, rooms FROM room_store_count WHERE namespace = ?', (namespace,)
+        ):
+            counts.setdefault(label, {})[value] = rooms
+        return counts
+
+    def compare_and_set(self, namespace, room_id, expected, value):
+        connection = self._connect()
+        update = ('UPDATE room_store SET value = ? WHERE namespace = ? AND room_id = ? AND value = ?',
+                  (_canonical(value), namespace, room_id, _canonical(expected)))
+        room_labels = self._room_labels(connection, namespace, room_id)
+        if not room_labels:
+            return connection.execute(*update).rowcount == 1
+
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            changed = connection.execute(*update).rowcount == 1
+            if changed:
+                self._add_counts(connection, namespace, [
+                    delta for label in room_labels
+                    for delta in ((label, _canonical(expected), -1), (label, _canonical(value), 1))
+                ])
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        return changed
+
+
+class SocketRoomStore:
+    """
+    Client for a RoomStoreServer on a Unix socket. Requests and replies are
+    one JSON document per line; each thread keeps its own connection and
+    reconnects once if it cannot reach the server. A request that was sent
+    is never sent again, since compare_and_set is not idempotent: if the
+    reply does not arrive the call raises.
+    """
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=5):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'pid', None) != os.getpid():
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock, self._local.file, self._local.pid = sock, sock.makefile('rb'), os.getpid()
+        return self._local
+
+    def _close(self):
+        if getattr(self._local, 'pid', None) == os.getpid():
+            self._local.file.close()
+            self._local.sock.close()
+        self._local.pid = None
+
+    def _call(self, op, namespace, **args):
+        request = (json.dumps(dict(args, op=op, namespace=namespace)) + '\n').encode()
+        for attempt in range(2):
+            try:
+                connection = self._connection()
+                connection.sock.sendall(request)
+                break
+            except OSError:
+                # Not sent, so a fresh connection may try again
+                self._close()
+                if attempt:
+                    raise
+        try:
+            line = connection.file.readline()
+        except OSError:
+            self._close()
+            raise
+        if not line:
+            self._close()
+            raise ConnectionError("room store server closed the connection before replying")
+        reply = json.loads(line)
+        if 'error' in reply:
+            raise RuntimeError(f"room store server: {reply['error']}")
+        return reply['result']
+
+    def seed(self, namespace, rooms, labels=None):
+        self._call('seed', namespace, rooms=[[room_id, value] for room_id, value in rooms.items()],
+                   labels=[[room_id, list(room_labels)] for room_id, room_labels in (labels or {}).items()])
+
+    def all(self, namespace):
+        return {room_id: value for room_id, value in self._call('all', namespace)}
+
+    def get(self, namespace, room_id):
+        return self._call('get', namespace, room_id=room_id)
+
+    def counts(self, namespace):
+        return self._call('counts', namespace)
+
+    def compare_and_set(self, namespace, room_id, expected, value):
+        return self._call('compare_and_set', namespace, room_id=room_id, expected=expected, value=value)
+
+
+class _RoomStoreHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        store = self.server.store
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                op, namespace = request['op'], request['namespace']
+                if op == 'seed':
+                    result = store.seed(namespace, {room_id: value for room_id, value in request['rooms']},
+                                        {room_id: room_labels for room_id, room_labels in request.get('labels', [])})
+                elif op == 'all':
+                    result = [[room_id, value] for room_id, value in store.all(namespace).items()]
+                elif op == 'get':
+                    result = store.get(namespace, request['room_id'])
+                elif op == 'counts':
+                    result = store.counts(namespace)
+                elif op == 'compare_and_set':
+                    result = store.compare_and_set(namespace, request['room_id'], request['expected'], request['value'])
+                else:
+                    raise ValueError(f"unknown op {op!r}")
+                reply = {'result': result}
+            except (KeyError, TypeError, ValueError) as e:
+                reply = {'error': str(e)}
+            self.wfile.write((json.dumps(reply) + '\n').encode())
+
+
+class RoomStoreServer(socketserver.ThreadingUnixStreamServer):
+    """Serves one MemoryRoomStore to every worker on the host over a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path=DEFAULT_SOCKET, store=None):
+        if os.path.exists(path):
+            os.unlink(path)  # Left behind by a previous server
+        self.store = store or MemoryRoomStore()
+        super().__init__(path, _RoomStoreHandler)
+
+
+def room_store_for(app):
+    """The room store configured for `app`, created on first use and shared by its features."""
+    store = app.extensions.get('room_store')
+    if store is None:
+        backend = app.config.get('ROOM_STORE_BACKEND', 'memory')
+        if backend == 'memory':
+            store = MemoryRoomStore()
+        elif backend == 'sqlite':
+            store = SqliteRoomStore(app.config.get('ROOM_STORE_SQLITE_PATH', DEFAULT_SQLITE_PATH))
+        elif backend == 'socket':
+            store = SocketRoomStore(app.config.get('ROOM_STORE_SOCKET', DEFAULT_SOCKET))
+        else:
+            raise ValueError(f"Unknown ROOM_STORE_BACKEND {backend!r}; use memory, sqlite or socket")
+        app.extensions['room_store'] = store
+    return store
+
+
+class RoomMap:
+    """
+    One feature's room map on the configured store. Until init_app binds it
+    to an app it uses a private in-memory store, as the features always did.
+    Callbacks passed to subscribe() hear about every flip this process wins.
+    """
+
+    def __init__(self, namespace, rooms, labels=None):
+        self.namespace = namespace
+        self.initial = dict(rooms)
+        self.labels = labels
+        self.store = None
+        self._listeners = []
+
+    def init_app(self, app):
+        self.store = room_store_for(app)
+        self.store.seed(self.namespace, self.initial, self.labels)
+
+    def _store(self):
+        if self.store is None:
+            store = MemoryRoomStore()
+            store.seed(self.namespace, self.initial, self.labels)
+            self.store = store
+        return self.store
+
+    def __contains__(self, room_id):
+        return self.get(room_id) is not None
+
+    def __len__(self):
+        return len(self.all())
+
+    def all(self):
+        return self._store().all(self.namespace)
+
+    def get(self, room_id):
+        return self._store().get(self.namespace, room_id)
+
+    def counts(self):
+        return self._store().counts(self.namespace)
+
+    def add(self, rooms):
+        """Seed rooms not already in the map, e.g. ones created at runtime; existing values are kept."""
+        self.initial.update(rooms)  # Also seeded into the shared store if init_app has not run yet
+        self._store().seed(self.namespace, rooms, self.labels)
+
+    def subscribe(self, listener):
+        """Call `listener(room_id, old, new)` after each successful compare_and_set made through this map."""
+        self._listeners.append(listener)
+
+    def compare_and_set(self, room_id, expected, value):
+        changed = self._store().compare_and_set(self.namespace, room_id, expected, value)
+        if changed:
+            for listener in self._listeners:
+                listener(room_id, expected, value)
+        return changed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the shared room store server for ROOM_STORE_BACKEND=socket.')
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--socket', default=os.getenv('ROOM_STORE_SOCKET', DEFAULT_SOCKET))
+    args = parser.parse_args()
+
+    with RoomStoreServer(args.socket) as server:
+        print(f"Room store listening on {args.socket}")
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+DEFAULT_BATCH_MS = 100
+UPDATE_EVENT = 'room_updates'
+
+
+def subscription_labels(data, known_labels):
+    """
+    Socket.IO rooms for a subscribe request such as {"floors": [1], "room_types": ["Suite"]}.
+    Neither floors nor room types means every room. Raises ValueError naming unknown ones.
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        raise ValueError("Subscription must be an object with floors and/or room_types")
+    labels = [f'floor:{floor}' for floor in data.get('floors') or ()] + \
+        [f'type:{room_type}' for room_type in data.get('room_types') or ()]
+    unknown = [label for label in labels if label not in known_labels]
+    if unknown:
+        raise ValueError(f"Unknown floors or room types: {', '.join(unknown)}")
+    return labels or ['all']
+
+
+class RoomUpdateBatcher:
+    """
+    Coalesces room status changes into one delta message per Socket.IO room
+    (a label of the RoomMap: 'all', a floor or a room type).
+
+    Subscribed to a RoomMap, every flip lands in a map keyed by room, so a
+    room that changes several times between flushes is sent once with its
+    latest status, and one that ends where it started is not sent at all.
+    Every REALTIME_BATCH_MS a flusher sends each label that has changes a
+    single `room_updates` message holding only its rooms, so a client pays
+    for the floors it watches rather than the whole hotel. Each label has its
+    own sequence number; a client that sees a gap should reload /api/rooms.
+    Statuses are absolute, so a client in two rooms (a floor and a room
+    type) receiving the same room twice is harmless. With REALTIME_BATCH_MS
+    at 0 every change is sent as it happens.
+    """
+
+    def __init__(self, labels, emit, interval_ms=DEFAULT_BATCH_MS, spawn=None, sleep=time.sleep):
+        self.labels = labels or {}
+        self.emit = emit  # emit(label, payload)
+        self.interval = interval_ms / 1000
+        self._spawn = spawn or self._spawn_thread
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps each label's sequence in order
+        self._stopping = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+        self._atexit_registered = False
+        self._pending = {}  # room_id -> [status before this batch, latest status]
+        self._sequences = {}
+        self.changes = 0
+        self.flushes = 0
+        self.messages = 0
+
+    def init_app(self, app):
+        self.interval = app.config.get('REALTIME_BATCH_MS', DEFAULT_BATCH_MS) / 1000
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def add(self, room_id, old, new):
+        """RoomMap listener: queue a flip of `room_id` from `old` to `new`."""
+        with self._lock:
+            change = self._pending.get(room_id)
+            if change is None:
+                self._pending[room_id] = [old, new]
+            else:
+                change[1] = new
+            self.changes += 1
+        if not self.interval:
+            self.flush()
+        else:
+            self._ensure_flusher()
+
+    @staticmethod
+    def _spawn_thread(target):
+        thread = threading.Thread(target=target, name='room-update-flusher', daemon=True)
+        thread.start()
+        return thread
+
+    def _ensure_flusher(self):
+        # Started on first use and per process, so forked workers each get their own
+        if self._flusher_pid == os.getpid() or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                self._flusher = self._spawn(self._run)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f"Room update flush failed: {e}")
+
+    def drain(self):
+        """Take the pending changes as {label: {room_id: latest status}}, leaving out rooms back where they started."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        deltas = {}
+        for room_id, (old, new) in pending.items():
+            if old == new:
+                continue
+            for label in self.labels.get(room_id, ('all',)):
+                deltas.setdefault(label, {})[room_id] = new
+        return deltas
+
+    def flush(self):
+        """Send every label its delta; returns the number of messages sent."""
+        with self._flush_lock:
+            deltas = self.drain()
+            for label, rooms in deltas.items():
+                sequence = self._sequences.get(label, 0) + 1
+                self._sequences[label] = sequence
+                self.emit(label, {'label': label, 'seq': sequence, 'rooms': rooms})
+            with self._lock:
+                self.flushes += bool(deltas)
+                self.messages += len(deltas)
+            return len(deltas)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batch_ms': round(self.interval * 1000),
+                'pending_rooms': len(self._pending),
+                'changes': self.changes,
+                'flushes': self.flushes,
+                'messages': self.messages,
+            }
+
+    def close(self):
+        """Stop the flusher and send what is left; registered to run at interpreter exit."""
+        self._stopping.set()
+        self.flush()
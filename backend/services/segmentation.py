@@ -0,0 +1,102 @@
+from collections import namedtuple
+from sqlalchemy import and_, case, func, or_, true
+from extensions import db
+from models import User
+
+# A user is in a tier when their value is above `threshold`; tiers are listed highest threshold first
+Tier = namedtuple('Tier', ['segment', 'threshold', 'discount'])
+
+# Audience name for campaigns that target every user
+ALL_USERS = 'all'
+
+
+class Segmentation:
+    """
+    Threshold tiers over one User column, evaluated in the database.
+
+    `label()` is a single SQL CASE expression, so a whole table is segmented
+    in one pass; counts are one GROUP BY and membership is a range predicate
+    on the column. Users at or below the lowest threshold fall in
+    `default_tier`, or in no segment when it is None.
+    """
+
+    def __init__(self, name, column, tiers, default_tier=None):
+        self.name = name
+        self.column = column
+        self.tiers = sorted(tiers, key=lambda tier: tier.threshold, reverse=True)
+        self.default_tier = default_tier
+        self.discounts = {tier.segment: tier.discount for tier in self.all_tiers}
+
+    @property
+    def all_tiers(self):
+        return self.tiers + ([self.default_tier] if self.default_tier else [])
+
+    @property
+    def segments(self):
+        return [tier.segment for tier in self.all_tiers]
+
+    def label(self):
+        value = func.coalesce(self.column, 0)
+        return case(*[(value > tier.threshold, tier.segment) for tier in self.tiers],
+                    else_=self.default_tier.segment if self.default_tier else None)
+
+    def condition(self, segment):
+        """Range predicate selecting the users in `segment`; lets the database use an index on the column."""
+        upper = None
+        for tier in self.tiers:
+            if tier.segment == segment:
+                lower = self.column > tier.threshold
+                return lower if upper is None else and_(lower, self.column <= upper)
+            upper = tier.threshold
+        if self.default_tier and segment == self.default_tier.segment:
+            return or_(self.column <= self.tiers[-1].threshold, self.column.is_(None))
+        raise ValueError(f"Unknown segment '{segment}' for {self.name}")
+
+    def eligible(self):
+        """Predicate for users in any segment."""
+        if self.default_tier:
+            return true()
+        return self.column > self.tiers[-1].threshold
+
+    def labelled_query(self, *columns):
+        """Query of (*columns, segment) for every user in a segment."""
+        return db.session.query(*columns, self.label().label('segment')).filter(self.eligible())
+
+    def counts(self):
+        """{segment: user count} for every segment, from one grouped query."""
+        label = self.label()
+        rows = db.session.query(label, func.count(User.id)).filter(self.eligible()).group_by(label).all()
+        counts = dict.fromkeys(self.segments, 0)
+        counts.update({segment: count for segment, count in rows})
+        return counts
+
+    def members(self, segment, *columns):
+        """Query of `columns` (default: user id) for the users in `segment`."""
+        return db.session.query(*(columns or (User.id,))).filter(self.condition(segment))
+
+
+TIME_SPENT = Segmentation('time_spent', User.total_time_spent, [
+    Tier('time_spent_high', 3600, '30%'),  # Over an hour on the platform
+    Tier('time_spent_medium', 1800, '20%'),  # Over 30 minutes
+], default_tier=Tier('time_spent_low', None, '10%'))
+
+REWARD_POINTS = Segmentation('reward_points', User.reward_points, [
+    Tier('reward_points_gold', 1000, '50%'),
+    Tier('reward_points_silver', 500, '25%'),
+])
+
+SEGMENTATIONS = {segmentation.name: segmentation for segmentation in (TIME_SPENT, REWARD_POINTS)}
+
+
+def find_segmentation(segment):
+    for segmentation in SEGMENTATIONS.values():
+        if segment in segmentation.segments:
+            return segmentation
+    raise ValueError(f"Unknown audience segment '{segment}'")
+
+
+def audience_query(audience_segment, *columns):
+    """Users targeted by a Campaign.audience_segment: ALL_USERS or any tier segment name."""
+    if audience_segment == ALL_USERS:
+        return db.session.query(*(columns or (User.id,)))
+    return find_segmentation(audience_segment).members(audience_segment, *columns)
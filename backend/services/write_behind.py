@@ -0,0 +1,250 @@
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+from sqlalchemy import bindparam, func
+from extensions import db
+from models import Interaction, User
+from services.engagement import rollup_row, upsert_rollups
+from services.reward_ledger import award_points_bulk
+
+DEFAULT_FLUSH_MS = 200
+DEFAULT_MAX_EVENTS = 500  # Buffered events that wake the flusher before its interval is up
+DEFAULT_MAX_PENDING = 10000  # Buffered events, retries included, beyond which new events are dropped
+DEFAULT_MAX_ATTEMPTS = 5  # Writes of one batch before it is logged and dropped
+MAX_BACKOFF_SECONDS = 30
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces high-frequency interaction events in memory and writes them in
+    bulk, instead of one commit per /start_interaction or /end_interaction.
+
+    Reward points are summed per user into one executemany of ledger
+    entries, time spent into one executemany UPDATE, and finished
+    interactions are inserted in one executemany and folded into the
+    engagement rollup per (user, day). A flusher thread
+    writes every WRITE_BEHIND_FLUSH_MS, or sooner once
+    WRITE_BEHIND_MAX_EVENTS are waiting; the buffer is flushed again at
+    interpreter exit.
+
+    The loss window is bounded: a crash loses at most one flush interval of
+    events, and never more than WRITE_BEHIND_MAX_PENDING, because events
+    arriving once that many are held (retries included) are dropped and
+    counted rather than buffered. A batch whose write fails is kept apart
+    and retried, with the flusher backing off exponentially, until it has
+    failed WRITE_BEHIND_MAX_ATTEMPTS times; it is then logged and dropped,
+    so one bad row holds back the events behind it only that long. With
+    WRITE_BEHIND_ENABLED off every event is written as it arrives.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush at a time keeps per-user updates ordered
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._atexit_registered = False
+        self.enabled = True
+        self.flush_interval = DEFAULT_FLUSH_MS / 1000
+        self.max_events = DEFAULT_MAX_EVENTS
+        self.max_pending = DEFAULT_MAX_PENDING
+        self.max_attempts = DEFAULT_MAX_ATTEMPTS
+        self._reset()
+        self._retries = []  # [batch, failed attempts], oldest first
+        self._retry_events = 0
+        self._consecutive_failures = 0
+        self._backoff_until = 0.0
+        self._full = False  # Logged once until a flush makes room
+        self.flushes = 0
+        self.flushed_events = 0
+        self.failures = 0
+        self.dropped_events = 0
+        self.last_flush_ms = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('WRITE_BEHIND_ENABLED', True)
+        self.flush_interval = app.config.get('WRITE_BEHIND_FLUSH_MS', DEFAULT_FLUSH_MS) / 1000
+        self.max_events = app.config.get('WRITE_BEHIND_MAX_EVENTS', DEFAULT_MAX_EVENTS)
+        self.max_pending = app.config.get('WRITE_BEHIND_MAX_PENDING', DEFAULT_MAX_PENDING)
+        self.max_attempts = app.config.get('WRITE_BEHIND_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        if not self._atexit_registered:
+            atexit.register(self.close)
+            self._atexit_registered = True
+
+    def _reset(self):
+        self._points = defaultdict(int)
+        self._seconds = defaultdict(int)
+        self._interactions = []
+        self._rollups = {}
+        self._pending = 0
+
+    def add_reward_points(self, user_id, points):
+        def add():
+            self._points[user_id] += points
+        if points:
+            self._add(add)
+
+    def record_interaction(self, user_id, start_time, end_time, stored=False):
+        """
+        A finished interaction: added to time spent and the daily rollup, and
+        stored as an Interaction row unless `stored` says its row exists already.
+        """
+        def add():
+            row = rollup_row(user_id, start_time, end_time)
+            if not stored:
+                self._interactions.append({'user_id': user_id, 'start_time': start_time, 'end_time': end_time})
+            self._seconds[user_id] += row['total_seconds']
+            self._merge_rollup(row)
+        self._add(add)
+
+    def pending_reward_points(self, user_id):
+        with self._lock:
+            return self._points.get(user_id, 0) + sum(batch[0].get(user_id, 0) for batch, _ in self._retries)
+
+    def _merge_rollup(self, row):
+        key = (row['user_id'], row['day'])
+        current = self._rollups.get(key)
+        if current is None:
+            self._rollups[key] = dict(row)
+        else:
+            current['sessions'] += row['sessions']
+            current['total_seconds'] += row['total_seconds']
+            current['last_seen'] = max(current['last_seen'], row['last_seen'])
+
+    def _add(self, apply):
+        with self._lock:
+            if self._pending + self._retry_events >= self.max_pending:
+                if not self._full:
+                    logging.warning(f"Write-behind buffer full at {self.max_pending} events; dropping new ones")
+                    self._full = True
+                self.dropped_events += 1
+                return
+            apply()
+            self._pending += 1
+            pending = self._pending
+        if not self.enabled:
+            self.flush()
+        elif pending >= self.max_events:
+            self._wake.set()
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # Started on first use, so forked workers each get their own thread
+        if not self.enabled or (self._thread and self._thread.is_alive()) or self._stopping.is_set():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='write-behind-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self, force=False):
+        """
+        Write batches awaiting a retry, then everything buffered so far, each
+        in its own transaction. While backing off after a failure nothing is
+        written unless `force`. Returns the number of events written.
+        """
+        with self._flush_lock:
+            if not force and time.monotonic() < self._backoff_until:
+                return 0
+            with self._lock:
+                batches, self._retries, self._retry_events = self._retries, [], 0
+                if self._pending:
+                    batches.append([(self._points, self._seconds, self._interactions, self._rollups, self._pending), 0])
+                    self._reset()
+
+            written = 0
+            for position, (batch, attempts) in enumerate(batches):
+                points, seconds, interactions, rollups, pending = batch
+                started = time.perf_counter()
+                try:
+                    self._write(points, seconds, interactions, list(rollups.values()))
+                except Exception as e:
+                    self._failed(batches[position:], e)
+                    break
+                with self._lock:
+                    self.flushes += 1
+                    self.flushed_events += pending
+                    self.last_flush_ms = round((time.perf_counter() - started) * 1000, 3)
+                    self._consecutive_failures = 0
+                    self._backoff_until = 0.0
+                    self._full = False
+                written += pending
+            return written
+
+    def _failed(self, batches, error):
+        """Put back the batches of a failed flush and back off; the batch that failed is dropped once out of attempts."""
+        (batch, attempts), rest = batches[0], batches[1:]
+        attempts += 1
+        pending = batch[4]
+        if attempts < self.max_attempts:
+            rest.insert(0, [batch, attempts])
+            logging.error(f"Write-behind flush of {pending} events failed (attempt {attempts} of "
+                          f"{self.max_attempts}), retrying: {error}")
+        else:
+            points, seconds, interactions = batch[:3]
+            logging.error(f"Write-behind dropped {pending} events after {attempts} failed writes: {error}; "
+                          f"reward points {dict(points)}, seconds {dict(seconds)}, interactions {interactions}")
+        with self._lock:
+            self._retries = rest + self._retries
+            self._retry_events = sum(kept[4] for kept, _ in self._retries)
+            self.failures += 1
+            if attempts >= self.max_attempts:
+                self.dropped_events += pending
+            self._consecutive_failures += 1
+            backoff = min(self.flush_interval * 2 ** self._consecutive_failures, MAX_BACKOFF_SECONDS)
+            self._backoff_until = time.monotonic() + backoff
+
+    def _write(self, points, seconds, interactions, rollups):
+        users = User.__table__
+        # A separate connection: never commits the calling request's session
+        with db.get_engine(self.app).begin() as connection:
+            awards = [(user_id, delta) for user_id, delta in sorted(points.items()) if delta]
+            if awards:
+                award_points_bulk(connection, awards, 'interaction')
+            if seconds:
+                # A fixed lock order across workers avoids deadlocks
+                connection.execute(users.update().where(users.c.id == bindparam('user_id_')).values(
+                    total_time_spent=func.coalesce(users.c.total_time_spent, 0) + bindparam('seconds'),
+                ), [{'user_id_': user_id, 'seconds': delta} for user_id, delta in sorted(seconds.items())])
+            if interactions:
+                connection.execute(Interaction.__table__.insert(), interactions)
+            if rollups:
+                upsert_rollups(connection, sorted(rollups, key=lambda row: (row['user_id'], row['day'])))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'pending_events': self._pending + self._retry_events,
+                'retrying_events': self._retry_events,
+                'flushes': self.flushes,
+                'flushed_events': self.flushed_events,
+                'failures': self.failures,
+                'dropped_events': self.dropped_events,
+                'last_flush_ms': self.last_flush_ms,
+            }
+
+    def close(self):
+        """Stop the flusher and write what is left; registered to run at interpreter exit."""
+        self._stopping.set()
+        self._wake.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        if self.app is not None:
+            self.flush(force=True)
+
+
+# Shared buffer; bound to the app by the features that track interactions
+write_behind = WriteBehindBuffer()
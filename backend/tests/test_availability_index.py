@@ -0,0 +1,118 @@
+import unittest
+from datetime import datetime
+from flask import Flask
+from extensions import db
+from models import Room
+from services.availability_index import AvailabilityIndex
+from services.booking import cancel_booking, cancel_reservation, hold_reservation, reserve_room
+
+
+def day(n):
+    return datetime(2025, 1, n)
+
+
+def booking(n):
+    return ('booking', n)
+
+
+class TestAvailabilityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = AvailabilityIndex()
+        self.index.rebuild([
+            (booking(1), 1, day(5), day(8)),
+            (booking(2), 1, day(10), day(12)),
+            (booking(3), 2, day(1), day(20)),
+        ])
+
+    def test_overlap_is_half_open(self):
+        self.assertTrue(self.index.is_available(1, day(8), day(10)))
+        self.assertTrue(self.index.is_available(1, day(1), day(5)))
+        self.assertFalse(self.index.is_available(1, day(7), day(9)))
+        self.assertFalse(self.index.is_available(1, day(4), day(13)))
+
+    def test_long_booking_blocks_later_short_windows(self):
+        self.index.add(booking(4), 2, day(3), day(4))
+        self.assertFalse(self.index.is_available(2, day(15), day(16)))
+
+    def test_add_and_remove_keep_index_in_sync(self):
+        self.index.add(booking(4), 3, day(8), day(9))
+        self.assertFalse(self.index.is_available(3, day(8), day(10)))
+        self.assertTrue(self.index.remove(booking(4)))
+        self.assertTrue(self.index.is_available(3, day(8), day(10)))
+        self.assertTrue(self.index.remove(booking(3)))
+        self.assertTrue(self.index.is_available(2, day(15), day(16)))
+        self.assertFalse(self.index.remove(booking(3)))
+
+    def test_re_adding_a_booking_moves_it(self):
+        self.index.add(booking(2), 1, day(20), day(22))
+        self.assertTrue(self.index.is_available(1, day(10), day(12)))
+        self.assertFalse(self.index.is_available(1, day(21), day(23)))
+
+    def test_bookings_and_reservations_with_the_same_id_are_separate_stays(self):
+        self.index.add(('reservation', 1), 3, day(1), day(3))
+        self.assertFalse(self.index.is_available(3, day(2), day(4)))
+        self.assertFalse(self.index.is_available(1, day(6), day(7)))
+
+
+class TestAvailabilityIndexSync(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                               SCHEDULER_ENABLED=False)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Room(id=1, room_number=101, room_type='Suite', price=200),
+                            Room(id=2, room_number=102, room_type='Double', price=120)])
+        db.session.commit()
+        self.index = AvailabilityIndex()
+        self.index.install(db.session)
+        self.index.rebuild_from_db()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_commits_update_the_index(self):
+        stay = reserve_room(1, day(5), day(8), guest_name='Guest')
+        held = hold_reservation(2, day(5), day(8), guest_name='Front desk')
+        self.assertTrue(self.index.is_available(2, day(6), day(7)))  # Not committed yet
+        db.session.commit()
+        self.assertFalse(self.index.is_available(1, day(6), day(7)))
+        self.assertFalse(self.index.is_available(2, day(6), day(7)))
+
+        cancel_booking(stay)
+        cancel_reservation(held)
+        db.session.commit()
+        self.assertTrue(self.index.is_available(1, day(6), day(7)))
+        self.assertTrue(self.index.is_available(2, day(6), day(7)))
+
+    def test_each_installed_index_sees_the_commits(self):
+        other = AvailabilityIndex()
+        other.install(db.session)
+        other.rebuild_from_db()
+        reserve_room(1, day(5), day(8), guest_name='Guest')
+        db.session.commit()
+        self.assertFalse(self.index.is_available(1, day(6), day(7)))
+        self.assertFalse(other.is_available(1, day(6), day(7)))
+
+    def test_rolled_back_stays_never_reach_the_index(self):
+        hold_reservation(1, day(5), day(8), guest_name='Front desk')
+        db.session.rollback()
+        self.assertTrue(self.index.is_available(1, day(6), day(7)))
+
+    def test_rebuild_loads_bookings_and_reservations(self):
+        reserve_room(1, day(5), day(8), guest_name='Guest')
+        hold_reservation(2, day(10), day(12), guest_name='Front desk')
+        db.session.commit()
+        fresh = AvailabilityIndex()
+        fresh.rebuild_from_db()
+        self.assertFalse(fresh.is_available(1, day(7), day(9)))
+        self.assertFalse(fresh.is_available(2, day(11), day(12)))
+        self.assertTrue(fresh.is_available(2, day(5), day(10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import Flask
+from extensions import db
+from models import Booking, Room, RoomNight
+from services.booking import BookingConflict, cancel_booking, check_out_room, reserve_room
+from services.inventory import rebuild, tonight
+
+
+class TestReserveRoom(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(self.tmpdir.name, 'bookings.db')}",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30}},
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Room(id=1, room_number=101, room_type='Suite', price=200),
+                            Room(id=2, room_number=102, room_type='Double', price=120)])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmpdir.cleanup()
+
+    def book(self, room_id, check_in=datetime(2026, 5, 1), check_out=datetime(2026, 5, 3), guest='Guest'):
+        with self.app.app_context():
+            try:
+                reserve_room(room_id, check_in, check_out, guest_name=guest)
+                db.session.commit()
+                return True
+            except BookingConflict:
+                db.session.rollback()
+                return False
+
+    def test_concurrent_requests_book_a_room_once(self):
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            results = list(pool.map(self.book, [1] * 50))
+
+        self.assertEqual(results.count(True), 1)
+        self.assertEqual(Booking.query.filter_by(room_id=1).count(), 1)
+        self.assertEqual(RoomNight.query.filter_by(room_id=1).count(), 2)
+
+    def test_overlapping_stays_conflict(self):
+        self.assertTrue(self.book(2, datetime(2026, 5, 2), datetime(2026, 5, 4), 'Walk-in'))
+
+        self.assertFalse(self.book(2))
+        self.assertEqual(Booking.query.filter_by(room_id=2).count(), 1)
+        self.assertEqual(RoomNight.query.filter_by(room_id=2).count(), 2)  # The failed attempt's nights were rolled back
+        self.assertTrue(self.book(2, datetime(2026, 5, 4), datetime(2026, 5, 6)))
+
+    def test_availability_follows_the_nights_booked(self):
+        today = datetime.combine(tonight(), datetime.min.time())
+        self.assertTrue(self.book(1, today + timedelta(days=30), today + timedelta(days=32)))
+        self.assertTrue(db.session.get(Room, 1).available)  # Booked next month, free tonight
+
+        self.assertTrue(self.book(2, today - timedelta(days=1), today + timedelta(days=2)))
+        db.session.expire_all()
+        self.assertFalse(db.session.get(Room, 2).available)
+        self.assertEqual([room.id for room in Room.query.filter(Room.available)], [1])
+
+    def test_check_out_frees_the_remaining_nights(self):
+        today = datetime.combine(tonight(), datetime.min.time())
+        self.book(1, today - timedelta(days=2), today + timedelta(days=2))
+        self.assertFalse(check_out_room(2))
+        self.assertTrue(check_out_room(1))
+        db.session.commit()
+
+        booking = Booking.query.filter_by(room_id=1).one()
+        self.assertEqual(booking.check_out, today)
+        self.assertEqual(RoomNight.query.filter_by(room_id=1).count(), 2)  # The nights already stayed are kept
+        self.assertTrue(db.session.get(Room, 1).available)
+
+        cancel_booking(booking)
+        db.session.commit()
+        self.assertEqual(RoomNight.query.count(), 0)
+
+    def test_rebuild_from_existing_bookings(self):
+        db.session.add_all([Booking(room_id=1, check_in=datetime(2026, 5, 1), check_out=datetime(2026, 5, 4)),
+                            Booking(room_id=2, check_in=datetime(2026, 5, 3), check_out=datetime(2026, 5, 4))])
+        db.session.commit()
+
+        self.assertEqual(rebuild(), 4)
+        db.session.commit()
+        self.assertEqual(rebuild(), 4)  # Idempotent
+        self.assertFalse(self.book(1, datetime(2026, 5, 3), datetime(2026, 5, 5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import Booking, Room
+from services.booking_history import BookingHistoryLoader
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+class TestBookingHistoryLoader(unittest.TestCase):
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Room(id=1, room_number=101, room_type='Single', price=100),
+                            Room(id=2, room_number=102, room_type='Suite', price=300)])
+        db.session.add_all([Booking(user_id=user_id, room_id=1 + n % 2, check_in=datetime(2025, 1, 1),
+                                    check_out=datetime(2025, 1, 2)) for user_id in (1, 2, 3) for n in range(25)])
+        db.session.commit()
+        db.session.expunge_all()
+        self.loader = BookingHistoryLoader()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_single_user_history_is_one_query(self):
+        with count_queries() as statements:
+            room_types = self.loader.room_types(1)
+        self.assertEqual(len(statements), 1)
+        self.assertEqual(len(room_types), 25)
+        self.assertEqual(room_types[:3], ['Single', 'Suite', 'Single'])
+
+    def test_many_user_histories_are_one_query(self):
+        with count_queries() as statements:
+            histories = self.loader.for_users([1, 2, 3, 4])
+        self.assertEqual(len(statements), 1)
+        self.assertEqual([len(histories[user_id]) for user_id in (1, 2, 3, 4)], [25, 25, 25, 0])
+        self.assertEqual(histories[2][1].price, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from datetime import date, datetime
+from flask import Flask
+from flask.json.tag import TaggedJSONSerializer
+from sqlalchemy import text
+from extensions import db
+from models import User, UserEngagementDaily
+from services.engagement import daily_summary, record_session, session_start_time, user_engagement
+
+
+class TestEngagementRollup(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.users = [User(email=f"guest{n}@example.com") for n in range(2)]
+        db.session.add_all(self.users)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_open_interactions_use_a_partial_index(self):
+        sql = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'ix_interaction_open'")).scalar()
+        self.assertIn('WHERE end_time IS NULL', sql)
+
+    def test_sessions_accumulate_per_day(self):
+        user_id = self.users[0].id
+        record_session(user_id, datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 9, 30))
+        record_session(user_id, datetime(2026, 3, 1, 8), datetime(2026, 3, 1, 8, 10))  # Ends before the last one
+        record_session(user_id, datetime(2026, 3, 2, 23, 50), datetime(2026, 3, 3, 0, 20))
+        record_session(self.users[1].id, datetime(2026, 3, 1, 12), datetime(2026, 3, 1, 12, 1))
+        db.session.commit()
+
+        row = db.session.get(UserEngagementDaily, (user_id, date(2026, 3, 1)))
+        self.assertEqual((row.sessions, row.total_seconds, row.last_seen), (2, 2400, datetime(2026, 3, 1, 9, 30)))
+
+        engagement = user_engagement(user_id, date(2026, 3, 3), days=7)
+        self.assertEqual([day['date'] for day in engagement['days']], ['2026-03-01', '2026-03-02'])
+        self.assertEqual((engagement['sessions'], engagement['total_seconds']), (3, 4200))
+        self.assertEqual(engagement['last_seen'], '2026-03-03 00:20:00')
+        self.assertEqual(user_engagement(user_id, date(2026, 3, 3), days=1)['days'], [])
+
+        self.assertEqual(daily_summary(date(2026, 3, 1)),
+                         {'date': '2026-03-01', 'active_users': 2, 'sessions': 3, 'total_seconds': 2460})
+        self.assertEqual(daily_summary(date(2026, 4, 1))['active_users'], 0)
+
+    def test_session_start_time_reads_old_and_new_cookies(self):
+        started = datetime(2026, 3, 1, 9, 30)
+        serializer = TaggedJSONSerializer()
+        old_cookie = serializer.loads(serializer.dumps({'start_time': started}))['start_time']
+        self.assertEqual(session_start_time(old_cookie), started)
+        self.assertEqual(session_start_time(started.isoformat()), started)
+
+    def test_rollup_is_discarded_with_the_transaction(self):
+        record_session(self.users[0].id, datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 9, 30))
+        db.session.rollback()
+        self.assertEqual(UserEngagementDaily.query.count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+import unittest
+from utils.import_profile import BACKEND_DIR, ROOT_DIR, parse_importtime, summarize
+
+SAMPLE = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     sklearn.utils
+import time:      2000 |       2120 |   sklearn.neighbors
+import time:       300 |        300 |   api
+import time:        40 |         40 |   services.booking_history
+import time:       500 |       2960 | api.machine_learning
+"""
+
+
+class TestImportProfile(unittest.TestCase):
+    def test_parse_importtime(self):
+        timings = parse_importtime(SAMPLE)
+        self.assertEqual([timing.module for timing in timings],
+                         ['sklearn.utils', 'sklearn.neighbors', 'api', 'services.booking_history', 'api.machine_learning'])
+        self.assertEqual([timing.depth for timing in timings], [2, 1, 1, 1, 0])
+        self.assertEqual(timings[1].cumulative_us, 2120)
+
+    def test_summary_skips_parent_package(self):
+        profile = summarize('api.machine_learning', parse_importtime(SAMPLE), top=5)
+        self.assertEqual(profile.total_us, 2960)
+        self.assertEqual([timing.module for timing in profile.heaviest], ['sklearn.neighbors', 'services.booking_history'])
+
+    def test_app_import_does_not_load_ml_libraries(self):
+        env = dict(os.environ, DATABASE_URL='sqlite://', SCHEDULER_ENABLED='false',
+                   PYTHONPATH=os.pathsep.join([BACKEND_DIR, ROOT_DIR]))
+        script = "import sys, app; print(sorted({'sklearn', 'scipy', 'numpy'} & set(sys.modules)))"
+        result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout.strip(), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,183 @@
+import socketserver
+import threading
+import unittest
+from flask import Flask
+from flask_mail import Message
+from extensions import mail
+from services.mail_dispatch import CircuitBreaker, MailDispatcher
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    """Just enough SMTP to accept mail from smtplib and record it."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInSMTPHandler)
+        self.lock = threading.Lock()
+        self.delivered = []
+        self.connections = 0
+        self.rejected_recipients = set()
+        self.transient_failures = 0  # Next N DATA commands get a 451 reply
+
+    def take_transient_failure(self):
+        with self.lock:
+            if self.transient_failures:
+                self.transient_failures -= 1
+                return True
+            return False
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply('220 stand-in ready')
+        recipients = []
+        while True:
+            line = self.rfile.readline().decode().strip()
+            if not line:
+                return
+            command = line.split(' ', 1)[0].upper()
+            if command in ('EHLO', 'HELO'):
+                self.reply('250 stand-in')
+            elif command == 'MAIL':
+                recipients = []
+                self.reply('250 OK')
+            elif command == 'RCPT':
+                address = line.split(':', 1)[1].strip().strip('<>')
+                if address in server.rejected_recipients:
+                    self.reply('550 No such user')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif command == 'DATA':
+                if server.take_transient_failure():
+                    self.reply('451 Try again later')
+                    continue
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                while self.rfile.readline().rstrip(b'\r\n') != b'.':
+                    pass
+                with server.lock:
+                    server.delivered.extend(recipients)
+                self.reply('250 OK')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('250 OK')
+
+
+class HangUpServer(socketserver.ThreadingTCPServer):
+    """An SMTP server that is down: counts connections and closes them before the greeting."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), socketserver.BaseRequestHandler)
+        self.connections = 0
+
+    def process_request(self, request, client_address):
+        self.connections += 1
+        self.shutdown_request(request)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold_and_allows_one_trial_per_cooldown(self):
+        now = [0]
+        breaker = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: now[0])
+        breaker.failure()
+        self.assertTrue(breaker.allow())
+        breaker.failure()
+        self.assertFalse(breaker.allow())
+
+        now[0] = 10
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())  # The trial is in flight
+        breaker.failure()
+        now[0] = 15
+        self.assertFalse(breaker.allow())
+
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+        breaker.success()
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+
+
+class TestMailDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.app = Flask(__name__)
+        self.app.config.update(
+            MAIL_SERVER='127.0.0.1', MAIL_PORT=self.server.server_address[1], MAIL_USE_TLS=False,
+            MAIL_DEFAULT_SENDER='offers@example.com', MAIL_DISPATCH_WORKERS=3, MAIL_DISPATCH_BATCH_SIZE=20,
+            MAIL_DISPATCH_RATE_PER_SECOND=0, MAIL_DISPATCH_MAX_RETRIES=2, MAIL_DISPATCH_RETRY_BACKOFF=0.01,
+        )
+        mail.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.dispatcher = MailDispatcher()
+
+    def tearDown(self):
+        self.ctx.pop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def messages(self, count):
+        return (Message('Offer', recipients=[f"guest{n}@example.com"], body='Hello') for n in range(count))
+
+    def test_batches_share_a_connection(self):
+        run = self.dispatcher.dispatch('test', self.messages(100))
+        self.assertEqual((run.sent, run.failed, run.retries), (100, 0, 0))
+        self.assertEqual(sorted(self.server.delivered), sorted(f"guest{n}@example.com" for n in range(100)))
+        self.assertEqual(self.server.connections, 5)
+        self.assertEqual(self.dispatcher.recent_runs()[0]['sent'], 100)
+
+    def test_transient_failures_are_retried_and_rejections_skipped(self):
+        self.server.transient_failures = 2
+        self.server.rejected_recipients = {'guest3@example.com'}
+        run = self.dispatcher.dispatch('test', self.messages(10))
+        self.assertEqual((run.sent, run.failed, run.retries), (9, 1, 2))
+        self.assertNotIn('guest3@example.com', self.server.delivered)
+        self.assertEqual(len(self.server.delivered), 9)
+
+    def test_gives_up_after_max_retries(self):
+        self.server.transient_failures = 3
+        run = self.dispatcher.dispatch('test', self.messages(2))
+        self.assertEqual((run.sent, run.failed, run.retries), (1, 1, 2))
+
+    def test_unreachable_server_fails_fast(self):
+        down = HangUpServer()
+        threading.Thread(target=down.serve_forever, daemon=True).start()
+        self.addCleanup(down.server_close)
+        self.addCleanup(down.shutdown)
+        self.app.config.update(MAIL_PORT=down.server_address[1], MAIL_DISPATCH_WORKERS=1,
+                               MAIL_DISPATCH_BREAKER_THRESHOLD=2, MAIL_DISPATCH_BREAKER_COOLDOWN=60)
+        mail.init_app(self.app)
+        now = [0]
+        self.dispatcher.breaker = CircuitBreaker(clock=lambda: now[0])
+
+        run = self.dispatcher.dispatch('test', self.messages(100))
+        self.assertEqual((run.sent, run.failed, run.retries), (0, 100, 1))
+        self.assertEqual(down.connections, 2)  # Not one per batch and retry
+        self.dispatcher.dispatch('test', self.messages(20))
+        self.assertEqual(down.connections, 2)  # Still open across runs
+
+        self.app.config.update(MAIL_PORT=self.server.server_address[1])
+        mail.init_app(self.app)
+        now[0] = 60  # Cooldown over: one trial connection, which succeeds and closes the breaker
+        run = self.dispatcher.dispatch('test', self.messages(20))
+        self.assertEqual((run.sent, run.failed), (20, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
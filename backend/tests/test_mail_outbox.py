@@ -0,0 +1,76 @@
+import threading
+import unittest
+from flask import Flask
+from extensions import db, mail
+from models import OutboxMessage
+from services.mail_outbox import OutboxSender, enqueue_email
+from test_mail_dispatch import StandInSMTPServer
+
+
+class TestMailOutbox(unittest.TestCase):
+    def setUp(self):
+        self.server = StandInSMTPServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            MAIL_SERVER='127.0.0.1', MAIL_PORT=self.server.server_address[1], MAIL_USE_TLS=False,
+            MAIL_DEFAULT_SENDER='hotel@example.com', MAIL_OUTBOX_BATCH_SIZE=2, MAIL_OUTBOX_MAX_ATTEMPTS=2,
+            MAIL_OUTBOX_RETRY_BACKOFF=0,
+        )
+        db.init_app(self.app)
+        mail.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.sender = OutboxSender()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def enqueue(self, count):
+        for n in range(count):
+            enqueue_email('Confirm your subscription', [f"guest{n}@example.com"], 'Click the link.')
+        db.session.commit()
+
+    def test_messages_are_only_queued_when_the_transaction_commits(self):
+        enqueue_email('Confirm your subscription', ['guest@example.com'], 'Click the link.')
+        db.session.rollback()
+        self.assertEqual(OutboxMessage.query.count(), 0)
+
+    def test_drain_sends_every_due_message_in_batches(self):
+        self.enqueue(5)
+        self.assertEqual(self.sender.stats()['queue_depth'], 5)
+
+        self.assertEqual(self.sender.drain_all(), 5)
+        self.assertEqual(sorted(self.server.delivered), [f"guest{n}@example.com" for n in range(5)])
+        self.assertEqual(self.server.connections, 3)
+        stats = self.sender.stats()
+        self.assertEqual(stats['queue_depth'], 0)
+        self.assertEqual(stats['status_counts'], {'sent': 5})
+        self.assertIsNotNone(stats['delivery_latency_ms']['p50'])
+
+    def test_failed_sends_are_retried_then_given_up(self):
+        self.server.transient_failures = 1
+        self.server.rejected_recipients = {'guest2@example.com'}
+        self.enqueue(3)
+
+        self.assertEqual(self.sender.drain_all(), 0)  # The 451 ends the first drain
+        self.assertEqual(self.sender.drain_all(), 3)
+        self.assertEqual(sorted(self.server.delivered), ['guest0@example.com', 'guest1@example.com'])
+
+        statuses = {message.recipients: (message.status, message.attempts) for message in OutboxMessage.query}
+        self.assertEqual(statuses, {
+            'guest0@example.com': ('sent', 2),
+            'guest1@example.com': ('sent', 1),
+            'guest2@example.com': ('failed', 1),
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
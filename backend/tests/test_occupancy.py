@@ -0,0 +1,45 @@
+import unittest
+from datetime import datetime
+from flask import Flask
+from services.occupancy import OccupancyTracker, occupancy_labels
+from services.room_store import RoomMap
+
+ROOM_TYPES = {101: 'Single', 102: 'Suite', 201: 'Single', 202: 'Single'}
+
+
+class TestOccupancyTracker(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(OCCUPANCY_HISTORY_SIZE=2)
+        self.rooms = RoomMap('occupancy', {room_id: False for room_id in ROOM_TYPES},
+                             labels=occupancy_labels(ROOM_TYPES))
+        self.occupancy = OccupancyTracker(self.rooms)
+        self.occupancy.init_app(self.app)
+
+    def test_counters_follow_reservations(self):
+        self.assertEqual(self.occupancy.rate(), 0.0)
+        self.rooms.compare_and_set(101, False, True)
+        self.rooms.compare_and_set(201, False, True)
+        self.rooms.compare_and_set(201, True, False)
+        self.rooms.compare_and_set(202, False, True)
+
+        breakdown = self.occupancy.breakdown()
+        self.assertEqual(breakdown['occupancy_rate'], 0.5)
+        self.assertEqual(breakdown['floors']['1'], {'occupied': 1, 'total': 2, 'occupancy_rate': 0.5})
+        self.assertEqual(breakdown['room_types']['Single']['occupied'], 2)
+        self.assertEqual(breakdown['room_types']['Suite']['occupancy_rate'], 0.0)
+
+    def test_history_keeps_the_latest_snapshots(self):
+        for minute in range(3):
+            if minute:
+                self.rooms.compare_and_set(100 + minute, False, True)
+            self.occupancy.snapshot(datetime(2026, 5, 1, 9, minute))
+
+        history = self.occupancy.history()
+        self.assertEqual([entry['at'] for entry in history], ['2026-05-01T09:01:00', '2026-05-01T09:02:00'])
+        self.assertEqual([entry['occupied'] for entry in history], [1, 2])
+        self.assertEqual(len(self.occupancy.history(since='2026-05-01T09:02:00')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from datetime import date, datetime
+from flask import Flask
+from services.occupancy import OccupancyTracker, occupancy_labels
+from services.promotion_rules import PromotionEngine, PromotionRule, rule_from_json
+from services.room_store import RoomMap
+
+ROOM_TYPES = {101: 'Single', 102: 'Single', 103: 'Suite', 104: 'Suite'}
+NOW = datetime(2026, 7, 1, 12, 0)
+
+
+class TestPromotionEngine(unittest.TestCase):
+    def setUp(self):
+        self.rooms = RoomMap('promotions', {room_id: False for room_id in ROOM_TYPES},
+                             labels=occupancy_labels(ROOM_TYPES))
+        self.engine = PromotionEngine(OccupancyTracker(self.rooms), [
+            PromotionRule('quiet', "Quiet hotel", "20%", 0.5),
+            PromotionRule('suites', "Suite deal", "10%", 0.5, room_type='Suite'),
+        ])
+
+    def test_reservations_launch_and_expire_promotions(self):
+        launched = self.engine.evaluate(now=NOW)
+        self.assertEqual(sorted(promotion['rule_id'] for promotion in launched), ['quiet', 'suites'])
+        self.assertEqual(self.engine.evaluate(now=NOW), [])  # Already running: never launched twice
+
+        self.rooms.compare_and_set(103, False, True)  # Suites at 50%, hotel at 25%
+        self.assertIsNone(self.engine.active('suites'))
+        self.assertIsNotNone(self.engine.active('quiet'))
+
+        self.rooms.compare_and_set(101, False, True)  # Hotel at 50%
+        self.assertEqual(self.engine.promotions(active_only=True), [])
+
+        self.rooms.compare_and_set(103, True, False)  # Suites at 0%, hotel at 25%: both launch again
+        promotions = self.engine.promotions()
+        self.assertEqual([promotion['rule_id'] for promotion in promotions], ['suites', 'quiet', 'quiet', 'suites'])
+        self.assertEqual([promotion['expired_at'] is None for promotion in promotions], [False, False, True, True])
+        self.assertEqual([promotion['id'] for promotion in promotions[2:]], [3, 4])
+
+    def test_date_window(self):
+        self.engine.add_rule(PromotionRule('summer', "Summer", "15%", 1.0, starts=date(2026, 7, 1),
+                                           ends=date(2026, 8, 31)))
+        self.engine.evaluate(['summer'], now=datetime(2026, 6, 30))
+        self.assertIsNone(self.engine.active('summer'))
+        self.engine.evaluate(['summer'], now=NOW)
+        self.assertEqual(self.engine.active('summer')['launched_at'], '2026-07-01T12:00:00')
+        self.engine.evaluate(['summer'], now=datetime(2026, 9, 1))
+        self.assertIsNone(self.engine.active('summer'))
+
+    def test_remove_rule_expires_its_promotion(self):
+        self.engine.evaluate(now=NOW)
+        self.engine.remove_rule('quiet', now=NOW)
+        self.assertIsNone(self.engine.active('quiet'))
+        self.assertEqual([rule.rule_id for rule in self.engine.rules()], ['suites'])
+
+    def test_init_app_evaluates_against_the_app_store(self):
+        app = Flask(__name__)
+        self.engine.occupancy.init_app(app)
+        self.engine.init_app(app)
+        self.assertEqual(len(self.engine.promotions(active_only=True)), 2)
+
+
+class TestSharedPromotionState(unittest.TestCase):
+    """Two workers: separate engines and room maps on one SQLite room store."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.workers = [self.worker() for _ in range(2)]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def worker(self):
+        app = Flask(__name__)
+        app.config.update(ROOM_STORE_BACKEND='sqlite', ROOM_STORE_SQLITE_PATH=os.path.join(self.tmp.name, 'rooms.db'),
+                          SCHEDULER_ENABLED=False)
+        rooms = RoomMap('promotions', {room_id: False for room_id in ROOM_TYPES}, labels=occupancy_labels(ROOM_TYPES))
+        engine = PromotionEngine(OccupancyTracker(rooms), [PromotionRule('quiet', "Quiet hotel", "20%", 0.5)])
+        engine.occupancy.init_app(app)
+        engine.init_app(app)
+        return rooms, engine
+
+    def test_a_promotion_fires_once_across_workers(self):
+        (first_rooms, first), (second_rooms, second) = self.workers
+        self.assertEqual(first.promotions(), second.promotions())
+        self.assertEqual(len(first.promotions(active_only=True)), 1)
+        self.assertEqual(second.evaluate(now=NOW), [])
+
+        first_rooms.compare_and_set(101, False, True)
+        second_rooms.compare_and_set(102, False, True)  # Hotel at 50%: expired by this worker's event
+        self.assertEqual(first.evaluate(now=NOW), [])
+        self.assertEqual([promotion['id'] for promotion in second.promotions()], [1])
+        self.assertIsNotNone(first.promotions()[0]['expired_at'])
+
+        first_rooms.compare_and_set(101, True, False)
+        self.assertEqual(second.active('quiet')['id'], 2)
+
+    def test_rule_changes_reach_every_worker(self):
+        (_, first), (_, second) = self.workers
+        second.add_rule(PromotionRule('01', "Numeric id", "5%", 1.0))
+        second.add_rule(PromotionRule('1', "Another one", "5%", 1.0))
+        self.assertEqual([promotion['rule_id'] for promotion in first.evaluate(now=NOW)], ['01', '1'])
+        self.assertEqual(second.evaluate(now=NOW), [])
+
+        self.assertEqual(first.remove_rule('quiet', now=NOW).rule_id, 'quiet')
+        self.assertIsNone(second.remove_rule('quiet', now=NOW))
+        self.assertIsNone(second.active('quiet'))
+        self.assertEqual(sorted(rule.rule_id for rule in second.rules()), ['01', '1'])
+
+
+class TestRuleFromJson(unittest.TestCase):
+    def test_parses_window(self):
+        rule = rule_from_json({'rule_id': 'x', 'description': 'd', 'discount': '5%', 'threshold': '0.3',
+                               'room_type': 'Suite', 'starts': '2026-12-20', 'ends': '2027-01-02'})
+        self.assertEqual(rule.threshold, 0.3)
+        self.assertEqual(rule.ends, date(2027, 1, 2))
+
+    def test_rejects_bad_rules(self):
+        for data in (None, {'rule_id': 'x'},
+                     {'rule_id': 'x', 'description': 'd', 'discount': '5%', 'threshold': 2},
+                     {'rule_id': 'x', 'description': 'd', 'discount': '5%', 'threshold': 0.5, 'starts': 'soon'}):
+            with self.assertRaises(ValueError):
+                rule_from_json(data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import json
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest import mock
+from flask import Flask
+from sqlalchemy import event
+from extensions import db
+from models import Booking, Room
+from services import recommendation_service
+from services.recommendation_service import RoomRecommender, recommend_rooms_for_users, room_recommender
+
+# routes/ lives next to backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from routes.room_routes import room_routes  # noqa: E402
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+app.register_blueprint(room_routes, url_prefix='/rooms')
+
+
+@contextmanager
+def count_booking_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM booking' in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+
+
+class TestRoomRecommender(unittest.TestCase):
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([
+            Room(id=1, room_number=101, room_type='Single', price=80),
+            Room(id=2, room_number=102, room_type='Double', price=120),
+            Room(id=3, room_number=103, room_type='Suite', price=300),
+        ])
+        db.session.commit()
+        self.recommender = RoomRecommender(n_neighbors=2)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_model_is_fitted_once_and_reused(self):
+        self.assertEqual(self.recommender.recommend('suite')[0], 3)
+        self.assertEqual(self.recommender.recommend('single')[0], 1)
+        self.assertEqual(self.recommender.fit_count, 1)
+        self.assertFalse(self.recommender.stats()['stale'])
+
+    def test_known_terms_are_folded_in_without_a_refit(self):
+        self.recommender.fit()
+        self.assertTrue(self.recommender.update_room(4, 'Suite', 300))
+        self.assertEqual(sorted(self.recommender.recommend('suite 300')), [3, 4])
+        self.assertTrue(self.recommender.update_room(3, 'Single', 80))  # A changed room replaces its row
+        self.assertEqual(sorted(self.recommender.recommend('single 80')), [1, 3])
+
+        self.recommender.remove_room(1)
+        self.assertEqual(self.recommender.recommend('single 80')[0], 3)
+        self.assertNotIn(1, self.recommender.recommend('single 80'))
+        self.assertEqual(self.recommender.fit_count, 1)
+        self.assertEqual(self.recommender.stats()['rooms'], 3)
+        self.assertEqual(self.recommender.stats()['incremental_updates'], 2)
+
+    def test_term_missing_from_the_vocabulary_triggers_a_refit(self):
+        self.recommender.fit()
+        db.session.add(Room(id=4, room_number=104, room_type='Penthouse', price=900))
+        db.session.commit()
+        self.assertFalse(self.recommender.update_room(4, 'Penthouse', 900))
+        self.assertTrue(self.recommender.stats()['stale'])
+
+        self.assertEqual(self.recommender.recommend('penthouse')[0], 4)
+        self.assertEqual(self.recommender.fit_count, 2)
+
+    def test_refit_after_max_incremental_updates(self):
+        recommender = RoomRecommender(max_incremental_updates=1)
+        recommender.fit()
+        self.assertTrue(recommender.update_room(4, 'Suite', 300))
+        self.assertFalse(recommender.update_room(5, 'Suite', 300))
+        recommender.recommend('suite')
+        self.assertEqual(recommender.fit_count, 2)
+        self.assertEqual(recommender.stats()['incremental_updates'], 0)
+
+    def test_committed_room_changes_reach_the_model(self):
+        self.recommender.install(db.session)
+        self.recommender.fit()
+        db.session.add(Room(id=4, room_number=104, room_type='Suite', price=300))
+        db.session.commit()
+        self.assertEqual(self.recommender.stats()['rooms'], 4)
+
+        db.session.delete(db.session.get(Room, 4))
+        db.session.commit()
+        self.assertEqual(self.recommender.stats()['rooms'], 3)
+        self.assertEqual(self.recommender.fit_count, 1)
+
+    def test_stats_count_queries_and_latency(self):
+        stats = self.recommender.stats()
+        self.assertEqual((stats['fit_count'], stats['query_count'], stats['model_age_seconds']), (0, 0, None))
+        self.assertEqual(stats['query_latency_ms'], {'p50': None, 'p99': None})
+
+        for _ in range(3):
+            self.recommender.recommend('double')
+        stats = self.recommender.stats()
+        self.assertEqual((stats['rooms'], stats['fit_count'], stats['query_count']), (3, 1, 3))
+        self.assertIsNotNone(stats['fit_seconds'])
+        self.assertIsNotNone(stats['query_latency_ms']['p99'])
+
+    def test_stats_endpoint_reports_the_shared_recommender(self):
+        room_recommender.fit()
+        room_recommender.recommend('suite')
+        response = app.test_client().get('/rooms/recommendations/stats')
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body['rooms'], 3)
+        self.assertEqual(body['fit_count'], room_recommender.fit_count)
+        self.assertEqual(body['query_count'], room_recommender.query_count)
+
+
+class TestBatchRecommendations(unittest.TestCase):
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([Room(id=n, room_number=100 + n, room_type='Double', price=price)
+                            for n, price in enumerate([80, 90, 200, 300, 310], start=1)])
+        # User 1 booked a cheap room twice, user 2 the suites, user 3 nothing
+        stays = [(1, 1), (1, 2), (2, 4), (2, 5)]
+        db.session.add_all([Booking(user_id=user_id, room_id=room_id, check_in=datetime(2025, 1, n + 1),
+                                    check_out=datetime(2025, 1, n + 2)) for n, (user_id, room_id) in enumerate(stays)])
+        db.session.commit()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def recommended(self, user_ids, **kwargs):
+        return [(user_id, [room.id for room in rooms]) for user_id, rooms in recommend_rooms_for_users(user_ids, **kwargs)]
+
+    def test_recommendations_are_grouped_per_user_in_input_order(self):
+        self.assertEqual(self.recommended([3, 2, 1, 2], n_neighbors=2), [
+            (3, []),
+            (2, [4, 5]),
+            (1, [1, 2]),
+        ])
+
+    def test_bookings_are_loaded_in_chunks(self):
+        expected = self.recommended([1, 2, 3, 4, 5])
+        with mock.patch.object(recommendation_service, 'BATCH_CHUNK_SIZE', 2), count_booking_queries() as queries:
+            self.assertEqual(self.recommended([1, 2, 3, 4, 5]), expected)
+        self.assertEqual(len(queries), 3)
+
+    def test_batch_endpoint_streams_one_ndjson_line_per_user(self):
+        response = self.client.post('/rooms/recommendations/batch', json={'user_ids': [2, 3]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line['user_id'] for line in lines], [2, 3])
+        self.assertEqual([room['room_number'] for room in lines[0]['recommendations']], [103, 104, 105])
+        self.assertEqual(lines[1]['recommendations'], [])
+
+    def test_batch_endpoint_rejects_ids_that_are_not_integers(self):
+        for user_ids in ([1, True], [False], ['1'], 1, None):
+            response = self.client.post('/rooms/recommendations/batch', json={'user_ids': user_ids})
+            self.assertEqual(response.status_code, 400, user_ids)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from services.reservation_store import ReservationStore
+
+
+class TestReservationStore(unittest.TestCase):
+    def setUp(self):
+        self.store = ReservationStore()
+        self.store.add(1, 'Ada', '2026-05-01', '2026-05-04')
+        self.store.add(2, 'Grace', '2026-05-03', '2026-05-05')
+        self.store.add(1, 'Linus', '2026-05-10', '2026-05-24')
+
+    def ids(self, reservations):
+        return [reservation['id'] for reservation in reservations]
+
+    def test_ids_are_not_reused_after_a_delete(self):
+        self.assertEqual(self.store.remove(3)['guest_name'], 'Linus')
+        self.assertIsNone(self.store.remove(3))
+        self.assertEqual(self.store.add(3, 'Barbara', '2026-06-01', '2026-06-02')['id'], 4)
+        self.assertEqual(self.ids(self.store.all()), [1, 2, 4])
+
+    def test_lookups_by_room_and_dates(self):
+        self.assertEqual(self.ids(self.store.for_room(1)), [1, 3])
+        self.assertEqual(self.ids(self.store.overlapping('2026-05-04', '2026-05-11')), [2, 3])
+        self.assertEqual(self.ids(self.store.overlapping('2026-05-20', '2026-05-21')), [3])  # Long stays are found too
+        self.assertEqual(self.store.overlapping('2026-05-05', '2026-05-10'), [])  # Check-out day is free
+
+    def test_bad_dates_leave_the_store_untouched(self):
+        with self.assertRaises(ValueError):
+            self.store.add(3, 'Ken', '2026-5-1', '2026-05-02')
+        with self.assertRaises(ValueError):
+            self.store.update(1, room_id=3, check_in='2026-5-1')
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.get(1)['room_id'], 1)
+        self.assertEqual(self.ids(self.store.for_room(1)), [1, 3])
+        self.assertEqual(self.store.remove(1)['check_in'], '2026-05-01')
+
+    def test_dates_are_normalized(self):
+        reservation = self.store.add(3, 'Ken', '20260601', '2026-06-03')
+        self.assertEqual(reservation['check_in'], '2026-06-01')
+        self.assertEqual(self.ids(self.store.overlapping('20260602', '2026-06-05')), [reservation['id']])
+
+    def test_update_moves_the_reservation_between_indexes(self):
+        self.store.update(1, room_id=2, check_in='2026-05-20', check_out='2026-05-22')
+        self.assertEqual(self.ids(self.store.for_room(1)), [3])
+        self.assertEqual(self.ids(self.store.for_room(2)), [1, 2])
+        self.assertEqual(self.ids(self.store.overlapping('2026-05-01', '2026-05-03')), [])
+        self.assertEqual(self.store.get(1)['guest_name'], 'Ada')
+
+    def test_returned_records_are_copies(self):
+        self.store.get(1)['room_id'] = 9
+        self.assertEqual(self.store.get(1)['room_id'], 1)
+
+    def test_concurrent_adds_get_unique_ids(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            added = list(pool.map(lambda n: self.store.add(n % 5, 'Guest', '2026-07-01', '2026-07-03'), range(1000)))
+
+        self.assertEqual(len({reservation['id'] for reservation in added}), 1000)
+        self.assertEqual(len(self.store), 1003)
+        self.assertEqual(len(self.store.overlapping('2026-07-02', '2026-07-03')), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
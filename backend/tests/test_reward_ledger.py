@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask
+from extensions import db
+from models import RewardLedgerEntry, User
+from services.reward_ledger import award_points, balance, pending_points, redeem_points, rollup_balances
+
+
+class TestRewardLedger(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI=f"sqlite:///{os.path.join(self.tmpdir.name, 'rewards.db')}",
+            SQLALCHEMY_TRACK_MODIFICATIONS=False,
+            SQLALCHEMY_ENGINE_OPTIONS={'connect_args': {'timeout': 30}},
+        )
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        user = User(email='guest@example.com', reward_points=None)
+        db.session.add(user)
+        db.session.commit()
+        self.user_id = user.id
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.ctx.pop()
+        self.tmpdir.cleanup()
+
+    def award(self, points):
+        with self.app.app_context():
+            award_points(self.user_id, points, 'booking')
+            db.session.commit()
+
+    def materialized(self):
+        return db.session.query(User.reward_points).filter(User.id == self.user_id).scalar()
+
+    def test_awards_are_appended_then_rolled_up(self):
+        self.award(5)
+        self.award(100)
+        self.assertEqual(self.materialized(), 0)
+        self.assertEqual((pending_points(self.user_id), balance(self.user_id)), (105, 105))
+
+        self.assertEqual(rollup_balances(), 2)
+        self.assertEqual((self.materialized(), pending_points(self.user_id)), (105, 0))
+        self.assertEqual(rollup_balances(), 0)
+        self.assertEqual(RewardLedgerEntry.query.count(), 2)
+
+    def test_redemptions_cannot_overdraw(self):
+        self.award(50)
+        self.assertEqual(redeem_points(self.user_id, 30), 20)
+        db.session.commit()
+        with self.assertRaises(ValueError):
+            redeem_points(self.user_id, 21)
+        db.session.rollback()
+
+        rollup_balances()
+        self.assertEqual(self.materialized(), 20)
+
+    def test_concurrent_awards_are_not_lost(self):
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            list(pool.map(self.award, [1] * 200))
+
+        rollup_balances()
+        self.assertEqual(self.materialized(), 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import os
+import sys
+import unittest
+from datetime import timedelta
+from flask import Flask
+from extensions import db
+from models import Room, RoomNight
+from services.inventory import tonight
+
+# routes/ lives next to backend/
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from routes.room_routes import room_routes  # noqa: E402
+
+app = Flask(__name__)
+app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+db.init_app(app)
+app.register_blueprint(room_routes, url_prefix='/rooms')
+
+
+class TestRoomListing(unittest.TestCase):
+    def setUp(self):
+        self.ctx = app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([
+            Room(id=n + 1, room_number=100 + n, room_type=('Suite' if n % 3 == 0 else 'Single'), price=50 + 10 * n)
+            for n in range(25)
+        ])
+        # Odd rooms are taken tonight; room 100 is taken from the night after next
+        db.session.add_all([RoomNight(room_id=n + 1, night=tonight()) for n in range(1, 25, 2)])
+        db.session.add(RoomNight(room_id=1, night=tonight() + timedelta(days=2)))
+        db.session.commit()
+        self.client = app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def fetch_all_pages(self, url):
+        room_numbers, pages = [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            room_numbers += [room['room_number'] for room in response.get_json()]
+            pages += 1
+            url = response.headers.get('Link', '').partition('<')[2].partition('>')[0] or None
+        return room_numbers, pages
+
+    def test_pages_cover_every_room_once(self):
+        room_numbers, pages = self.fetch_all_pages('/rooms/?limit=10')
+        self.assertEqual(room_numbers, list(range(100, 125)))
+        self.assertEqual(pages, 3)
+
+    def test_filters_are_kept_across_pages(self):
+        room_numbers, _ = self.fetch_all_pages('/rooms/?limit=2&sort=room_number&room_type=Suite&available=true&max_price=250')
+        self.assertEqual(room_numbers, [100, 106, 112, 118])
+
+    def test_available_for_a_stay_checks_every_night(self):
+        today = tonight()
+        stay = f"check_in={today + timedelta(days=1)}&check_out={today + timedelta(days=3)}"
+        room_numbers, _ = self.fetch_all_pages(f'/rooms/?room_type=Suite&available=true&{stay}')
+        self.assertEqual(room_numbers, [103, 106, 109, 112, 115, 118, 121, 124])
+        room_numbers, _ = self.fetch_all_pages(f'/rooms/?available=false&{stay}')
+        self.assertEqual(room_numbers, [100])
+
+    def test_invalid_params_are_rejected(self):
+        self.assertEqual(self.client.get('/rooms/?limit=0').status_code, 400)
+        self.assertEqual(self.client.get('/rooms/?min_price=cheap').status_code, 400)
+        self.assertEqual(self.client.get('/rooms/?sort=price').status_code, 400)
+        self.assertEqual(self.client.get('/rooms/?available=true&check_in=2026-05-01').status_code, 400)
+        self.assertEqual(self.client.get('/rooms/?check_in=2026-05-03&check_out=2026-05-01').status_code, 400)
+
+    def test_export_streams_every_matching_room(self):
+        response = self.client.get('/rooms/export?room_type=Single')
+        self.assertEqual(response.status_code, 200)
+        rooms = json.loads(response.get_data(as_text=True))
+        self.assertEqual(len(rooms), 16)
+        self.assertEqual(rooms[0]['room_number'], 101)
+        self.assertIn('amenities', rooms[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import unittest
+from flask import Flask
+from services.room_store import (MemoryRoomStore, RoomMap, RoomStoreServer, SocketRoomStore, SqliteRoomStore,
+                                 room_store_for)
+
+ROOMS = {room_id: False for room_id in range(101, 141)}
+LABELS = {room_id: ('all', f'floor:{room_id // 10}') for room_id in ROOMS}
+
+
+def reserve_everything(store, results):
+    """Worker process: try to take every room, reporting the ones this process got."""
+    results.put([room_id for room_id in ROOMS if store.compare_and_set('rooms', room_id, False, True)])
+
+
+class RoomStoreContract:
+    """Checks every backend must pass; subclasses provide make_store()."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.store = self.make_store()
+        self.store.seed('rooms', ROOMS, LABELS)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_seed_keeps_existing_values(self):
+        self.assertTrue(self.store.compare_and_set('rooms', 101, False, True))
+        self.store.seed('rooms', {101: False, 999: False})
+        self.assertIs(self.store.get('rooms', 101), True)
+        self.assertIs(self.store.get('rooms', 999), False)
+        self.assertIsNone(self.store.get('other', 101))
+
+    def test_counts_follow_compare_and_set(self):
+        self.store.compare_and_set('rooms', 101, False, True)
+        self.store.compare_and_set('rooms', 101, False, True)  # Lost, so not counted
+        self.store.compare_and_set('rooms', 115, False, True)
+        self.store.compare_and_set('rooms', 115, True, False)
+        self.store.seed('rooms', {101: False}, {101: ('all',)})  # Already seeded: neither value nor counts change
+
+        counts = self.store.counts('rooms')
+        self.assertEqual(counts['all'], {'false': 39, 'true': 1})
+        self.assertEqual(counts['floor:10'], {'false': 8, 'true': 1})
+        self.assertEqual(counts['floor:11'], {'false': 10, 'true': 0})
+
+    def test_compare_and_set(self):
+        self.store.seed('details', {1: {'type': 'Suite', 'available': True}})
+        self.assertFalse(self.store.compare_and_set('details', 1, {'type': 'Suite', 'available': False}, {}))
+        self.assertTrue(self.store.compare_and_set(
+            'details', 1, {'available': True, 'type': 'Suite'}, {'type': 'Suite', 'available': False}))
+        self.assertEqual(self.store.all('details'), {1: {'type': 'Suite', 'available': False}})
+        self.assertFalse(self.store.compare_and_set('details', 2, None, True))
+
+
+class TestMemoryRoomStore(RoomStoreContract, unittest.TestCase):
+    def make_store(self):
+        return MemoryRoomStore()
+
+    def test_room_map_defaults_to_memory(self):
+        rooms = RoomMap('rooms', ROOMS)
+        self.assertIn(101, rooms)
+        self.assertEqual(len(rooms), 40)
+
+        app = Flask(__name__)
+        rooms.init_app(app)
+        self.assertIsInstance(room_store_for(app), MemoryRoomStore)
+
+
+class SharedRoomStoreContract(RoomStoreContract):
+    def test_processes_never_take_the_same_room(self):
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        workers = [context.Process(target=reserve_everything, args=(self.store, results)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        taken = [room_id for _ in workers for room_id in results.get(timeout=30)]
+        for worker in workers:
+            worker.join(timeout=30)
+
+        self.assertEqual(sorted(taken), list(ROOMS))
+        self.assertTrue(all(self.store.all('rooms').values()))
+        self.assertEqual(self.store.counts('rooms')['all'], {'false': 0, 'true': 40})
+
+
+class TestSqliteRoomStore(SharedRoomStoreContract, unittest.TestCase):
+    def make_store(self):
+        return SqliteRoomStore(os.path.join(self.tmpdir.name, 'rooms.db'))
+
+    def test_state_survives_a_restart(self):
+        self.store.compare_and_set('rooms', 102, False, True)
+        reopened = SqliteRoomStore(self.store.path)
+        self.assertIs(reopened.get('rooms', 102), True)
+
+
+class TestSocketRoomStore(SharedRoomStoreContract, unittest.TestCase):
+    def make_store(self):
+        path = os.path.join(self.tmpdir.name, 'rooms.sock')
+        self.server = RoomStoreServer(path)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return SocketRoomStore(path)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        super().tearDown()
+
+    def test_sent_request_is_not_repeated(self):
+        path = os.path.join(self.tmpdir.name, 'silent.sock')
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(path)
+        listener.listen()
+        listener.settimeout(0.05)  # Lets the server thread notice the test is done
+        received, done = [], threading.Event()
+
+        def read_each_request_and_hang_up():
+            while not done.is_set():
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    continue
+                with connection, connection.makefile('rb') as requests:
+                    received.append(requests.readline())
+
+        server = threading.Thread(target=read_each_request_and_hang_up, daemon=True)
+        server.start()
+        with self.assertRaises(ConnectionError):
+            SocketRoomStore(path).compare_and_set('rooms', 101, False, True)
+        done.set()
+        server.join()
+        listener.close()
+        self.assertEqual(len(received), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from services.occupancy import occupancy_labels
+from services.room_store import RoomMap
+from services.room_updates import RoomUpdateBatcher, subscription_labels
+
+ROOM_TYPES = {101: 'Single', 102: 'Suite', 201: 'Single'}
+LABELS = occupancy_labels(ROOM_TYPES)
+
+
+class TestRoomUpdateBatcher(unittest.TestCase):
+    def setUp(self):
+        self.sent = []
+        self.rooms = RoomMap('updates', {room_id: False for room_id in ROOM_TYPES}, labels=LABELS)
+        self.batcher = RoomUpdateBatcher(LABELS, lambda label, payload: self.sent.append(payload),
+                                         spawn=lambda target: None)
+        self.rooms.subscribe(self.batcher.add)
+
+    def test_changes_are_coalesced_per_label(self):
+        self.rooms.compare_and_set(101, False, True)
+        self.rooms.compare_and_set(101, True, False)
+        self.rooms.compare_and_set(101, False, True)
+        self.rooms.compare_and_set(201, False, True)
+        self.rooms.compare_and_set(102, False, True)
+        self.rooms.compare_and_set(102, True, False)  # Back where it started: not sent
+        self.assertEqual(self.sent, [])
+
+        self.assertEqual(self.batcher.flush(), 4)
+        by_label = {payload['label']: payload for payload in self.sent}
+        self.assertEqual(sorted(by_label), ['all', 'floor:1', 'floor:2', 'type:Single'])
+        self.assertEqual(by_label['floor:1']['rooms'], {101: True})
+        self.assertEqual(by_label['all']['rooms'], {101: True, 201: True})
+        self.assertEqual(self.batcher.flush(), 0)
+
+        self.rooms.compare_and_set(201, True, False)
+        self.batcher.flush()
+        self.assertEqual(self.sent[-3], {'label': 'all', 'seq': 2, 'rooms': {201: False}})
+        self.assertEqual(self.batcher.stats()['changes'], 7)
+
+    def test_zero_interval_sends_each_change(self):
+        self.batcher.interval = 0
+        self.rooms.compare_and_set(102, False, True)
+        self.assertEqual([payload['label'] for payload in self.sent], ['all', 'floor:1', 'type:Suite'])
+
+
+class TestSubscriptionLabels(unittest.TestCase):
+    def test_labels(self):
+        known = {label for labels in LABELS.values() for label in labels}
+        self.assertEqual(subscription_labels(None, known), ['all'])
+        self.assertEqual(subscription_labels({'floors': [2], 'room_types': ['Suite']}, known),
+                         ['floor:2', 'type:Suite'])
+        with self.assertRaises(ValueError):
+            subscription_labels({'floors': [7]}, known)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from flask import Flask
+from extensions import db
+from models import User
+from services.segmentation import REWARD_POINTS, TIME_SPENT, audience_query
+
+
+class TestSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        # Values sit on both sides of every threshold, including the boundaries themselves
+        for n, (points, seconds) in enumerate([(0, 0), (500, 1800), (501, 1801), (1000, 3600), (1001, 3601),
+                                               (None, None)]):
+            db.session.add(User(email=f"guest{n}@example.com", reward_points=points, total_time_spent=seconds))
+        db.session.commit()
+        db.session.query(User).filter_by(email='guest5@example.com') \
+            .update({'reward_points': None, 'total_time_spent': None})
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def emails(self, query):
+        return sorted(email for email, in query)
+
+    def test_counts_cover_every_segment(self):
+        self.assertEqual(REWARD_POINTS.counts(), {'reward_points_gold': 1, 'reward_points_silver': 2})
+        self.assertEqual(TIME_SPENT.counts(),
+                         {'time_spent_high': 1, 'time_spent_medium': 2, 'time_spent_low': 3})
+
+    def test_members_match_the_case_labels(self):
+        labelled = dict(TIME_SPENT.labelled_query(User.email).all())
+        for segment in TIME_SPENT.segments:
+            members = self.emails(TIME_SPENT.members(segment, User.email))
+            self.assertEqual(members, sorted(email for email, label in labelled.items() if label == segment))
+        self.assertEqual(labelled['guest5@example.com'], 'time_spent_low')
+
+    def test_users_below_the_lowest_tier_are_left_out(self):
+        labelled = dict(REWARD_POINTS.labelled_query(User.email).all())
+        self.assertEqual(labelled, {'guest2@example.com': 'reward_points_silver',
+                                    'guest3@example.com': 'reward_points_silver',
+                                    'guest4@example.com': 'reward_points_gold'})
+        self.assertEqual(REWARD_POINTS.discounts[labelled['guest4@example.com']], '50%')
+
+    def test_audience_query(self):
+        self.assertEqual(len(audience_query('all').all()), 6)
+        self.assertEqual(self.emails(audience_query('reward_points_gold', User.email)), ['guest4@example.com'])
+        with self.assertRaises(ValueError):
+            audience_query('platinum')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import time
+import unittest
+from datetime import datetime
+from flask import Flask
+from extensions import db
+from models import Interaction, RewardLedgerEntry, User, UserEngagementDaily
+from services.reward_ledger import balance
+from services.write_behind import WriteBehindBuffer
+
+
+class TestWriteBehindBuffer(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI='sqlite://', SQLALCHEMY_TRACK_MODIFICATIONS=False,
+                               WRITE_BEHIND_FLUSH_MS=60000, WRITE_BEHIND_MAX_EVENTS=5, WRITE_BEHIND_MAX_PENDING=10)
+        db.init_app(self.app)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        self.users = [User(email=f"guest{n}@example.com", reward_points=0, total_time_spent=0) for n in range(2)]
+        db.session.add_all(self.users)
+        db.session.commit()
+        self.user_ids = [user.id for user in self.users]
+        self.buffer = WriteBehindBuffer(self.app)
+
+    def tearDown(self):
+        self.buffer.close()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def balances(self):
+        db.session.expire_all()
+        return [(balance(user.id), user.total_time_spent) for user in User.query.order_by(User.id)]
+
+    def test_events_are_coalesced_into_one_flush(self):
+        first, second = self.user_ids
+        self.buffer.add_reward_points(first, 3)
+        self.buffer.add_reward_points(first, 4)
+        self.buffer.record_interaction(second, datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 9, 10))
+        self.buffer.record_interaction(second, datetime(2026, 3, 1, 10), datetime(2026, 3, 1, 10, 5))
+        self.assertEqual(self.buffer.pending_reward_points(first), 7)
+        self.assertEqual(self.balances(), [(0, 0), (0, 0)])
+
+        self.assertEqual(self.buffer.flush(), 4)
+        self.assertEqual(self.balances(), [(7, 0), (0, 900)])
+        self.assertEqual(Interaction.query.count(), 2)
+        rollup = UserEngagementDaily.query.one()
+        self.assertEqual((rollup.sessions, rollup.total_seconds), (2, 900))
+        self.assertEqual(self.buffer.stats()['flushes'], 1)
+
+    def test_stored_interaction_only_adds_time_spent(self):
+        user_id = self.user_ids[0]
+        self.buffer.record_interaction(user_id, datetime(2026, 3, 1, 9), datetime(2026, 3, 1, 9, 2), stored=True)
+        self.assertEqual(self.buffer.flush(), 1)
+        self.assertEqual(self.balances()[0], (0, 120))
+        self.assertEqual(Interaction.query.count(), 0)
+        self.assertEqual(UserEngagementDaily.query.one().total_seconds, 120)
+
+    def test_flusher_wakes_after_max_events(self):
+        for _ in range(5):
+            self.buffer.add_reward_points(self.user_ids[0], 1)
+        deadline = time.monotonic() + 5
+        while self.buffer.stats()['pending_events'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.balances()[0], (5, 0))
+
+    def test_disabled_buffer_writes_each_event(self):
+        self.buffer.enabled = False
+        self.buffer.add_reward_points(self.user_ids[0], 2)
+        self.assertEqual(self.balances()[0], (2, 0))
+
+    def test_failed_flush_keeps_the_events(self):
+        self.buffer.add_reward_points(self.user_ids[0], 2)
+        RewardLedgerEntry.__table__.drop(db.engine)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(self.buffer.stats()['pending_events'], 1)
+        self.assertEqual(self.buffer.pending_reward_points(self.user_ids[0]), 2)
+
+        self.assertEqual(self.buffer.flush(), 0)  # Backing off
+        RewardLedgerEntry.__table__.create(db.engine)
+        self.assertEqual(self.buffer.flush(force=True), 1)
+        self.assertEqual(self.balances()[0][0], 2)
+
+    def test_failing_batch_is_dropped_after_max_attempts(self):
+        write = self.buffer._write
+
+        def reject_bad_row(points, *args):
+            if 9999 in points:
+                raise ValueError("bad row")
+            write(points, *args)
+        self.buffer._write = reject_bad_row
+        self.buffer.max_attempts = 2
+        self.buffer.add_reward_points(9999, 5)
+        self.assertEqual(self.buffer.flush(), 0)
+        self.buffer.add_reward_points(self.user_ids[0], 2)
+        self.assertEqual(self.buffer.flush(force=True), 0)  # The bad batch fails again and is dropped
+
+        self.assertEqual(self.buffer.flush(force=True), 1)
+        self.assertEqual(self.balances()[0][0], 2)
+        stats = self.buffer.stats()
+        self.assertEqual((stats['failures'], stats['dropped_events'], stats['pending_events']), (2, 1, 0))
+
+    def test_full_buffer_drops_new_events_without_flushing(self):
+        RewardLedgerEntry.__table__.drop(db.engine)
+        for _ in range(12):
+            self.buffer.add_reward_points(self.user_ids[0], 1)
+        stats = self.buffer.stats()
+        self.assertEqual((stats['pending_events'], stats['dropped_events']), (10, 2))
+        RewardLedgerEntry.__table__.create(db.engine)
+
+    def test_close_flushes_what_is_left(self):
+        self.buffer.add_reward_points(self.user_ids[0], 2)
+        self.buffer.close()
+        self.assertEqual(self.balances()[0], (2, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
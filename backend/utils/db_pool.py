@@ -0,0 +1,127 @@
+import bisect
+import logging
+import threading
+import time
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Upper bounds (ms) of the checkout wait histogram buckets; waits above the last land in "+Inf"
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Counters for connection checkouts: wait time histogram, overflow connections and timeouts."""
+
+    def __init__(self, buckets_ms=WAIT_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.overflow_events = 0
+            self.timeouts = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self._wait_counts = [0] * (len(self.buckets_ms) + 1)
+
+    def observe_checkout(self, wait_ms):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self._wait_counts[bisect.bisect_left(self.buckets_ms, wait_ms)] += 1
+
+    def observe_overflow(self):
+        with self._lock:
+            self.overflow_events += 1
+
+    def observe_timeout(self, wait_ms):
+        with self._lock:
+            self.timeouts += 1
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def snapshot(self, pool=None):
+        with self._lock:
+            labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ['+Inf']
+            data = {
+                'checkouts': self.checkouts,
+                'overflow_events': self.overflow_events,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait_ms / self.checkouts, 3) if self.checkouts else None,
+                'max_wait_ms': round(self.max_wait_ms, 3),
+                'wait_ms_histogram': dict(zip(labels, self._wait_counts)),
+            }
+        if isinstance(pool, QueuePool):
+            data.update({
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                'overflow': pool.overflow(),
+            })
+        return data
+
+
+# Process-wide metrics for the application engine's pool
+pool_metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited and whether it needed an overflow connection."""
+
+    metrics = pool_metrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # QueuePool._do_get retries by calling itself; only the outermost call is timed
+        self._timing = threading.local()
+
+    def _do_get(self):
+        if getattr(self._timing, 'active', False):
+            return super()._do_get()
+
+        self._timing.active = True
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            wait_ms = (time.perf_counter() - started) * 1000
+            self.metrics.observe_timeout(wait_ms)
+            logging.warning(f"Connection pool checkout timed out after {wait_ms:.1f}ms "
+                            f"({self.checkedout()} connections checked out).")
+            raise
+        finally:
+            self._timing.active = False
+        self.metrics.observe_checkout((time.perf_counter() - started) * 1000)
+        return connection
+
+    def _inc_overflow(self):
+        created = super()._inc_overflow()
+        # _overflow starts at -pool_size, so it only turns positive past the core pool
+        if created and self._overflow > 0:
+            self.metrics.observe_overflow()
+        return created
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS built from the DB_POOL_* / DB_STATEMENT_TIMEOUT_MS
+    settings. SQLite keeps SQLAlchemy's default pool, which can't be sized.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite':
+        return {}
+
+    options = {
+        'poolclass': InstrumentedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.get_backend_name() == 'postgresql' and config.get('DB_STATEMENT_TIMEOUT_MS'):
+        options['connect_args'] = {'options': f"-c statement_timeout={int(config['DB_STATEMENT_TIMEOUT_MS'])}"}
+    return options
@@ -0,0 +1,60 @@
+import os
+import re
+import subprocess
+import sys
+from collections import namedtuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(BACKEND_DIR)
+
+# Imported before the marker so the shared Flask/SQLAlchemy stack isn't charged to each feature
+BASELINE_MODULES = ('extensions', 'models')
+_MARKER = '-- feature imports --'
+
+# `python -X importtime` line: "import time: <self us> | <cumulative us> | <indent><module>"
+_IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)\s*$')
+
+ImportTiming = namedtuple('ImportTiming', ['module', 'self_us', 'cumulative_us', 'depth'])
+FeatureProfile = namedtuple('FeatureProfile', ['module', 'total_us', 'heaviest'])
+
+
+def parse_importtime(output):
+    """Parse `-X importtime` stderr into ImportTiming rows, in the order Python reports them."""
+    timings = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            timings.append(ImportTiming(module, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return timings
+
+
+def summarize(module_name, timings, top=5):
+    """Total cold import time of `module_name` and its heaviest direct imports."""
+    total_us = sum(timing.cumulative_us for timing in timings if timing.depth == 0)
+    # Parent packages are reported as children of the submodule; they aren't its imports
+    parents = {module_name.rsplit('.', depth)[0] for depth in range(1, module_name.count('.') + 1)}
+    direct = [timing for timing in timings if timing.depth == 1 and timing.module not in parents]
+    heaviest = sorted(direct, key=lambda timing: timing.cumulative_us, reverse=True)[:top]
+    return FeatureProfile(module_name, total_us, heaviest)
+
+
+def profile_import(module_name, top=5, python=sys.executable):
+    """
+    Import `module_name` in a fresh interpreter under `-X importtime` and
+    summarize the time spent beyond the shared baseline modules.
+    """
+    # __import__ goes through the C import path that -X importtime instruments; importlib.import_module doesn't
+    script = (
+        f"import sys; import {', '.join(BASELINE_MODULES)}; "
+        f"sys.stderr.write({_MARKER!r} + '\\n'); sys.stderr.flush(); "
+        f"__import__({module_name!r})"
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [BACKEND_DIR, ROOT_DIR, os.getenv('PYTHONPATH')])))
+    result = subprocess.run([python, '-X', 'importtime', '-c', script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module_name} failed: {result.stderr.strip().splitlines()[-1]}")
+
+    _, _, feature_output = result.stderr.partition(_MARKER)
+    return summarize(module_name, parse_importtime(feature_output), top=top)
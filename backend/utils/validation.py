@@ -0,0 +1,30 @@
+import re
+from datetime import datetime
+
+EMAIL_PATTERN = re.compile(r"[^@]+@[^@]+\.[^@]+")
+
+# Validators return an error message, or None when the payload is valid
+
+def validate_booking_data(data):
+    if not isinstance(data, dict):
+        return "Request body must be a JSON object"
+    if not isinstance(data.get('user_id'), int):
+        return "user_id is required"
+    try:
+        check_in = datetime.strptime(data.get('check_in') or '', '%Y-%m-%d')
+        check_out = datetime.strptime(data.get('check_out') or '', '%Y-%m-%d')
+    except (TypeError, ValueError):
+        return "check_in and check_out are required as YYYY-MM-DD"
+    if check_in >= check_out:
+        return "check_out must be after check_in"
+    return None
+
+def validate_user_data(data):
+    if not isinstance(data, dict):
+        return "Request body must be a JSON object"
+    email = data.get('email')
+    if not email or not EMAIL_PATTERN.match(email):
+        return "A valid email is required"
+    if not data.get('password'):
+        return "Password is required"
+    return None
@@ -6,12 +6,14 @@ CREATE TABLE users (
     visits INT DEFAULT 0
 );
 
+-- Promotion tiers select users by reward_points range
+CREATE INDEX ix_users_reward_points ON users (reward_points);
+
 CREATE TABLE rooms (
     id SERIAL PRIMARY KEY,
     room_number INT UNIQUE NOT NULL,
     room_type VARCHAR(50) NOT NULL,
-    price FLOAT NOT NULL,
-    available BOOLEAN DEFAULT TRUE
+    price FLOAT NOT NULL
 );
 
 CREATE TABLE bookings (
@@ -21,3 +23,71 @@ CREATE TABLE bookings (
     check_in TIMESTAMP NOT NULL,
     check_out TIMESTAMP NOT NULL
 );
+
+CREATE INDEX ix_bookings_room_dates ON bookings (room_id, check_in, check_out);
+
+-- One row per occupied night; a room is free for a stay when none of its nights has a row
+CREATE TABLE room_night (
+    room_id INT NOT NULL REFERENCES rooms(id),
+    night DATE NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'booked',
+    booking_id INT REFERENCES bookings(id),
+    reservation_id INT,
+    PRIMARY KEY (room_id, night)
+);
+
+CREATE INDEX ix_room_night_night ON room_night (night);
+CREATE INDEX ix_room_night_booking_id ON room_night (booking_id);
+CREATE INDEX ix_room_night_reservation_id ON room_night (reservation_id);
+
+CREATE TABLE outbox_message (
+    id SERIAL PRIMARY KEY,
+    recipients VARCHAR(1000) NOT NULL,
+    subject VARCHAR(200) NOT NULL,
+    body TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    last_error VARCHAR(500),
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT now(),
+    locked_until TIMESTAMP,
+    sent_at TIMESTAMP
+);
+
+CREATE INDEX ix_outbox_message_due ON outbox_message (status, next_attempt_at);
+
+CREATE TABLE interaction (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id),
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP
+);
+
+CREATE INDEX ix_interaction_open ON interaction (user_id, start_time) WHERE end_time IS NULL;
+
+CREATE TABLE user_engagement_daily (
+    user_id INT NOT NULL REFERENCES users(id),
+    day DATE NOT NULL,
+    sessions INT NOT NULL DEFAULT 0,
+    total_seconds INT NOT NULL DEFAULT 0,
+    last_seen TIMESTAMP NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE INDEX ix_user_engagement_daily_day ON user_engagement_daily (day);
+
+CREATE TABLE reward_ledger_entry (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id),
+    points INT NOT NULL,
+    reason VARCHAR(50) NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT now(),
+    rolled_up BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+CREATE INDEX ix_reward_ledger_entry_unrolled ON reward_ledger_entry (user_id) WHERE NOT rolled_up;
+
+-- Overlapping stays for one room are rejected by the database itself
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+    EXCLUDE USING gist (room_id WITH =, tsrange(check_in, check_out) WITH &&);
@@ -1,33 +1,30 @@
-from flask import Blueprint, request, jsonify, abort
-from models import Room, Booking
-from app import db
-from services.recommendation_service import recommend_rooms
+from flask import Blueprint, request, jsonify, abort, Response, stream_with_context
+from models import Room
+from extensions import db
+from services.booking import BookingConflict, check_out_room, reserve_room
+from services.recommendation_service import recommend_rooms, recommend_rooms_for_users, room_recommender
+from services.room_listing import ROOM_DETAIL_FIELDS, room_export_response, room_list_response
 from datetime import datetime  # Added for booking timestamps
+import json
 from utils.validation import validate_booking_data  # Added for input validation
 
 # Blueprint for room-related routes
 room_routes = Blueprint('room_routes', __name__)
 
-# Get all rooms
+# Keep the cached recommender in sync with room changes once the blueprint is registered
+@room_routes.record_once
+def init_recommender(state):
+    room_recommender.install(db.session)
+
+# List rooms a page at a time (keyset cursor), optionally filtered by room_type, min_price, max_price and available
 @room_routes.route('/', methods=['GET'])
 def get_rooms():
-    rooms = Room.query.all()
-    if not rooms:
-        return jsonify({"error": "No rooms found"}), 404
-
-    rooms_data = [
-        {
-            'room_number': room.room_number,
-            'room_type': room.room_type,
-            'price': room.price,
-            'available': room.available,
-            'description': room.description,  # Added room description
-            'rating': room.rating,  # Added room rating
-            'amenities': room.amenities,  # Added room amenities
-        }
-        for room in rooms
-    ]
-    return jsonify(rooms_data), 200
+    return room_list_response(ROOM_DETAIL_FIELDS, not_found_if_empty=True)
+
+# Export every matching room as a streamed JSON array
+@room_routes.route('/export', methods=['GET'])
+def export_rooms():
+    return room_export_response(ROOM_DETAIL_FIELDS)
 
 # Book a room
 @room_routes.route('/<int:room_id>/book', methods=['POST'])
@@ -37,9 +34,6 @@ def book_room(room_id):
     if not room:
         return jsonify({"error": f"Room with ID {room_id} not found"}), 404
 
-    if not room.available:
-        return jsonify({"error": f"Room {room.room_number} is already booked"}), 400
-
     try:
         # Extract and validate input data
         data = request.get_json()
@@ -48,21 +42,19 @@ def book_room(room_id):
             return jsonify({"error": validation_error}), 400
 
         user_id = data.get('user_id')
+        check_in = datetime.strptime(data['check_in'], '%Y-%m-%d')
+        check_out = datetime.strptime(data['check_out'], '%Y-%m-%d')
 
-        # Create a booking with timestamp
-        booking = Booking(
-            user_id=user_id,
-            room_id=room_id,
-            booked_at=datetime.utcnow()  # Added booking timestamp
-        )
-        room.available = False
-
-        # Persist the changes
-        db.session.add(booking)
+        # Takes the stay's nights in the inventory; a concurrent request for any of them gets a conflict
+        reserve_room(room_id, check_in, check_out, user_id=user_id, booked_at=datetime.utcnow())
         db.session.commit()
 
         return jsonify({"message": f"Room {room.room_number} booked successfully"}), 200
 
+    except BookingConflict as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 409
+
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
@@ -83,6 +75,34 @@ def get_recommendations():
     except Exception as e:
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
+# Get room recommendations for many users at once, streamed as NDJSON (one line per user)
+@room_routes.route('/recommendations/batch', methods=['POST'])
+def get_batch_recommendations():
+    data = request.get_json(silent=True) or {}
+    user_ids = data.get('user_ids')
+
+    # bool is a subclass of int, but true/false are not user ids
+    if not isinstance(user_ids, list) or \
+            not all(isinstance(user_id, int) and not isinstance(user_id, bool) for user_id in user_ids):
+        return jsonify({"error": "user_ids must be a list of integer ids"}), 400
+
+    def generate():
+        for user_id, rooms in recommend_rooms_for_users(user_ids):
+            yield json.dumps({
+                'user_id': user_id,
+                'recommendations': [
+                    {'room_number': room.room_number, 'room_type': room.room_type, 'price': room.price, 'available': room.available}
+                    for room in rooms
+                ],
+            }) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson'), 200
+
+# Get recommender fit time, model age and query latency
+@room_routes.route('/recommendations/stats', methods=['GET'])
+def get_recommendation_stats():
+    return jsonify(room_recommender.stats()), 200
+
 # Release a room
 @room_routes.route('/<int:room_id>/release', methods=['POST'])
 def release_room(room_id):
@@ -91,19 +111,12 @@ def release_room(room_id):
     if not room:
         return jsonify({"error": f"Room with ID {room_id} not found"}), 404
 
-    if room.available:
-        return jsonify({"error": f"Room {room.room_number} is already available"}), 400
-
     try:
-        # Find and delete the booking
-        booking = Booking.query.filter_by(room_id=room_id).first()
-        if booking:
-            db.session.delete(booking)
-            room.available = True
+        # Check out tonight's stay, freeing its remaining nights
+        if check_out_room(room_id):
             db.session.commit()
             return jsonify({"message": f"Room {room.room_number} released successfully"}), 200
-        else:
-            return jsonify({"error": "No booking found for this room"}), 404
+        return jsonify({"error": f"Room {room.room_number} is already available"}), 400
 
     except Exception as e:
         db.session.rollback()
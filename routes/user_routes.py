@@ -1,5 +1,5 @@
 from flask import request, jsonify, Blueprint
-from app import db, login_manager
+from extensions import db, login_manager
 from flask_login import login_user, logout_user, current_user, login_required
 from models import User
 from werkzeug.security import check_password_hash, generate_password_hash